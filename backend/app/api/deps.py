@@ -0,0 +1,43 @@
+"""Service dependency providers
+
+Services are created by the application lifespan and kept on
+``app.state``; routes receive them through these providers.
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from app.middleware.rate_limit import RateLimitBudget
+from app.services.enhancement_jobs import EnhancementJobManager
+from app.services.gemini_service import GeminiService
+from app.services.ml_service import MLService
+
+
+async def get_ml_service(request: Request) -> MLService:
+    """Dependency to get ML service"""
+    ml_service = getattr(request.app.state, "ml_service", None)
+    if ml_service is None:
+        raise HTTPException(status_code=503, detail="ML Service not available")
+    return ml_service
+
+
+async def get_gemini_service(request: Request) -> GeminiService:
+    """Dependency to get Gemini service"""
+    gemini_service = getattr(request.app.state, "gemini_service", None)
+    if gemini_service is None:
+        raise HTTPException(status_code=503, detail="Gemini Service not available")
+    return gemini_service
+
+
+async def get_enhancement_jobs(request: Request) -> EnhancementJobManager:
+    """Dependency to get the deferred enhancement job manager"""
+    enhancement_jobs = getattr(request.app.state, "enhancement_jobs", None)
+    if enhancement_jobs is None:
+        raise HTTPException(status_code=503, detail="Enhancement jobs not available")
+    return enhancement_jobs
+
+
+async def get_rate_limit(request: Request) -> Optional[RateLimitBudget]:
+    """Dependency to get the client's rate limit budget (None when not limited)"""
+    return getattr(request.state, "rate_limit", None)
@@ -1,22 +1,16 @@
 """Diseases API routes"""
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import Optional
 import logging
 
-from app.models.schemas import DiseasesListResponse, DiseaseInfo, SeverityLevel
+from app.models.schemas import DiseasesListResponse
+from app.api.deps import get_ml_service
 from app.services.ml_service import MLService
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-async def get_ml_service() -> MLService:
-    """Dependency to get ML service"""
-    from main import ml_service
-    if ml_service is None:
-        raise HTTPException(status_code=503, detail="ML Service not available")
-    return ml_service
-
 @router.get("/diseases", response_model=DiseasesListResponse)
 async def get_diseases(
     severity: Optional[str] = Query(None, description="Filter by severity level"),
@@ -27,31 +21,11 @@ async def get_diseases(
     Get list of available diseases
     """
     try:
-        diseases_data = ml_service.get_diseases_list()
-        
-        # Filter by severity if specified
-        if severity:
-            diseases_data = [d for d in diseases_data if d['severity'].lower() == severity.lower()]
-        
-        # Search by name if specified
-        if search:
-            search_lower = search.lower()
-            diseases_data = [d for d in diseases_data if search_lower in d['name'].lower()]
-        
-        # Convert to response format
-        diseases = [
-            DiseaseInfo(
-                name=d['name'],
-                description=f"Medical condition: {d['name']}",
-                symptoms=[],  # Could be populated from datasets
-                severity=SeverityLevel(d['severity'])
-            )
-            for d in diseases_data
-        ]
-        
-        return DiseasesListResponse(
-            diseases=diseases,
-            total=len(diseases)
+        # Severity filters are index lookups; bodies without a search term
+        # are pre-serialized when the catalog is built
+        return Response(
+            content=ml_service.disease_catalog.body(severity, search),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -1,21 +1,24 @@
 """Health check API routes"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 import time
 import logging
 
+from app.core import tracing
 from app.models.schemas import HealthResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint
     """
     try:
-        from main import ml_service, gemini_service
+        state = request.app.state
+        ml_service = getattr(state, "ml_service", None)
+        gemini_service = getattr(state, "gemini_service", None)
         
         services = {
             "ml_service": "healthy" if ml_service and ml_service.is_initialized else "unavailable",
@@ -39,22 +42,34 @@ async def health_check():
         )
 
 @router.get("/health/detailed")
-async def detailed_health_check():
+async def detailed_health_check(request: Request):
     """
     Detailed health check with service information
     """
     try:
-        from main import ml_service, gemini_service
+        state = request.app.state
+        ml_service = getattr(state, "ml_service", None)
+        gemini_service = getattr(state, "gemini_service", None)
+        enhancement_jobs = getattr(state, "enhancement_jobs", None)
         
         ml_status = {
             "initialized": ml_service.is_initialized if ml_service else False,
             "model_loaded": ml_service.model is not None if ml_service else False,
-            "datasets_loaded": len(ml_service.datasets) if ml_service else 0
+            "datasets_loaded": len(ml_service.datasets) if ml_service else 0,
+            "model_version": ml_service.model_version if ml_service else None,
+            "inference": ml_service.executor.stats() if ml_service and ml_service.executor else None,
+            "prediction_cache": ml_service.prediction_cache.stats() if ml_service else None
         }
         
         gemini_status = {
             "initialized": gemini_service.is_initialized if gemini_service else False,
-            "api_key_configured": bool(gemini_service.api_key) if gemini_service else False
+            "api_key_configured": bool(gemini_service.api_key) if gemini_service else False,
+            "cache": gemini_service.cache.stats() if gemini_service else None,
+            "persistent_cache": gemini_service.store.stats() if gemini_service and gemini_service.store else None,
+            "singleflight": gemini_service.inflight.stats() if gemini_service else None,
+            "upstream": gemini_service.sender.stats() if gemini_service else None,
+            "circuit_breaker": gemini_service.breaker.stats() if gemini_service else None,
+            "connection_pool": gemini_service.pool_stats() if gemini_service and gemini_service.client else None
         }
         
         return {
@@ -63,8 +78,10 @@ async def detailed_health_check():
             "version": "1.0.0",
             "services": {
                 "ml_service": ml_status,
-                "gemini_service": gemini_status
-            }
+                "gemini_service": gemini_status,
+                "enhancement_jobs": enhancement_jobs.stats() if enhancement_jobs else None
+            },
+            "trace_export": tracing.export_stats()
         }
         
     except Exception as e:
@@ -0,0 +1,17 @@
+"""Metrics API routes"""
+
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Request, pipeline stage and dependency metrics in the Prometheus text format
+    """
+    # Snapshot files of the other workers are read off the event loop
+    content = await run_in_threadpool(REGISTRY.render, REGISTRY.collect())
+    return Response(content=content, media_type=CONTENT_TYPE)
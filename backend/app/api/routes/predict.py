@@ -1,85 +1,188 @@
 """Prediction API routes"""
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import asyncio
+import json
 import logging
 import time
 
-from app.models.schemas import SymptomRequest, PredictionResponse
+from app.core.config import get_settings
+from app.core.tracing import stage
+from app.models.schemas import (
+    SymptomRequest,
+    PredictionResponse,
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    BatchPredictionResult,
+    EnhancementJobResponse,
+    SymptomCorrection,
+    DiseaseCandidate,
+)
+from app.api.deps import get_enhancement_jobs, get_gemini_service, get_ml_service, get_rate_limit
+from app.middleware.rate_limit import RateLimitBudget, rate_limited_response
 from app.services.ml_service import MLService
+from app.services.circuit_breaker import CircuitOpenError
 from app.services.gemini_service import GeminiService
+from app.services.enhancement_jobs import EnhancementJobManager, JobQueueFull, COMPLETED
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-async def get_ml_service() -> MLService:
-    """Dependency to get ML service"""
-    from main import ml_service
-    if ml_service is None:
-        raise HTTPException(status_code=503, detail="ML Service not available")
-    return ml_service
+# Fields of PredictionResponse that the AI answer can provide
+ENHANCED_FIELDS = (
+    'description', 'severity', 'precautions', 'medications', 'traditionalMedicines',
+    'homeRemedies', 'diet', 'workouts', 'consultationAdvice'
+)
 
-async def get_gemini_service() -> GeminiService:
-    """Dependency to get Gemini service"""
-    from main import gemini_service
-    if gemini_service is None:
-        raise HTTPException(status_code=503, detail="Gemini Service not available")
-    return gemini_service
+def _build_prediction_response(
+    disease: str,
+    confidence: float,
+    enhanced_info: Dict[str, Any],
+    source: str,
+    corrections: Sequence[Tuple[str, str, bool]] = (),
+    differential: Sequence[Tuple[str, float]] = (),
+    score_type: Optional[str] = None
+) -> PredictionResponse:
+    """Create a prediction response from (possibly AI-enhanced) disease info"""
+    return PredictionResponse(
+        disease=disease,
+        description=enhanced_info.get('description', ''),
+        severity=enhanced_info.get('severity', 'Moderate'),
+        precautions=enhanced_info.get('precautions', []),
+        medications=enhanced_info.get('medications', []),
+        traditionalMedicines=enhanced_info.get('traditionalMedicines', []),
+        homeRemedies=enhanced_info.get('homeRemedies', []),
+        diet=enhanced_info.get('diet', ''),
+        workouts=enhanced_info.get('workouts', []),
+        consultationAdvice=enhanced_info.get('consultationAdvice', ''),
+        confidence=confidence,
+        differential=[
+            DiseaseCandidate(disease=name, score=score) for name, score in differential
+        ] or None,
+        scoreType=score_type,
+        source=source,
+        corrections=[
+            SymptomCorrection(input=raw, resolved=resolved, applied=applied)
+            for raw, resolved, applied in corrections
+        ] or None
+    )
+
+def _unrecognized_message(corrections: Sequence[Tuple[str, str, bool]]) -> str:
+    """Error for symptoms that were all unrecognized, with any uncertain matches"""
+    suggestions = [resolved for _, resolved, applied in corrections if not applied]
+    if suggestions:
+        return (
+            "None of the entered symptoms are recognized. "
+            f"Did you mean: {', '.join(suggestions)}? Please check spelling and try again."
+        )
+    return "None of the entered symptoms are recognized. Please check spelling and try again."
+
+async def _predict_from_request(
+    request: SymptomRequest,
+    ml_service: MLService
+) -> Tuple[str, float, List[Tuple[str, float]], Tuple[Tuple[str, str, bool], ...]]:
+    """Parse the symptoms of a request and run the ML prediction
+    
+    Returns the disease, the confidence, the ranked ``(disease, score)``
+    differential and the ``(input, resolved, applied)`` symptom corrections.
+    """
+    # Parse symptoms
+    with stage("parse_symptoms"):
+        symptoms_list = [s.strip() for s in request.symptoms.split(',') if s.strip()]
+    
+    if not symptoms_list:
+        raise HTTPException(status_code=400, detail="No valid symptoms provided")
+    
+    encoded = ml_service.encode_symptoms(symptoms_list)
+    differential, = await ml_service.rank_encoded(
+        [encoded], request.top_k or get_settings().PREDICTION_TOP_K
+    )
+    
+    if not differential:
+        raise HTTPException(status_code=400, detail=_unrecognized_message(encoded.corrections))
+    
+    predicted_disease, confidence = differential[0]
+    return predicted_disease, confidence, differential, encoded.corrections
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_disease(
     request: SymptomRequest,
+    deferred: bool = Query(False, description="Return the ML result now and enhance with AI in the background"),
     ml_service: MLService = Depends(get_ml_service),
-    gemini_service: GeminiService = Depends(get_gemini_service)
+    gemini_service: GeminiService = Depends(get_gemini_service),
+    enhancement_jobs: EnhancementJobManager = Depends(get_enhancement_jobs)
 ):
     """
     Predict disease from symptoms using ML model and enhance with AI
+    
+    With ``deferred=true`` the ML prediction and dataset information are
+    returned immediately together with an ``enhancementJobId``; the AI
+    enhanced result is then available from
+    ``GET /predict/{job_id}/enhancement``.
     """
     try:
-        logger.info(f"Prediction request: {request.symptoms}")
-        
-        # Parse symptoms
-        symptoms_list = [s.strip() for s in request.symptoms.split(',') if s.strip()]
-        
-        if not symptoms_list:
-            raise HTTPException(status_code=400, detail="No valid symptoms provided")
-        
         # Get ML prediction
-        predicted_disease, confidence = await ml_service.predict_disease(symptoms_list)
-        
-        if predicted_disease is None:
-            raise HTTPException(
-                status_code=400, 
-                detail="None of the entered symptoms are recognized. Please check spelling and try again."
-            )
+        predicted_disease, confidence, differential, corrections = await _predict_from_request(
+            request, ml_service
+        )
         
         # Get basic disease information
         basic_info = ml_service.get_disease_info(predicted_disease)
         
+        if deferred:
+            response = _build_prediction_response(
+                predicted_disease,
+                confidence,
+                gemini_service.basic_enhancement(predicted_disease, basic_info),
+                source="ML",
+                corrections=corrections,
+                differential=differential,
+                score_type=ml_service.score_type
+            )
+            
+            if gemini_service.is_initialized and enhancement_jobs.available:
+                try:
+                    job = await enhancement_jobs.submit(
+                        predicted_disease, request.symptoms, basic_info, confidence, differential, corrections
+                    )
+                    response.enhancementJobId = job.id
+                    response.enhancementStatus = job.status
+                except JobQueueFull:
+                    logger.warning("Enhancement job queue full, returning ML-only prediction")
+                    response.enhancementStatus = "rejected"
+            else:
+                response.enhancementStatus = "unavailable"
+            
+            return response
+        
         # Enhance with AI if available
-        enhanced_info = await gemini_service.enhance_prediction(
+        enhanced_info, ai_enhanced = await gemini_service.enhance_prediction(
             predicted_disease, 
             request.symptoms, 
             basic_info
         )
         
         # Create response
-        response = PredictionResponse(
-            disease=predicted_disease,
-            description=enhanced_info.get('description', ''),
-            severity=enhanced_info.get('severity', 'Moderate'),
-            precautions=enhanced_info.get('precautions', []),
-            medications=enhanced_info.get('medications', []),
-            traditionalMedicines=enhanced_info.get('traditionalMedicines', []),
-            homeRemedies=enhanced_info.get('homeRemedies', []),
-            diet=enhanced_info.get('diet', ''),
-            workouts=enhanced_info.get('workouts', []),
-            consultationAdvice=enhanced_info.get('consultationAdvice', ''),
-            confidence=confidence,
-            source="ML+AI" if gemini_service.is_initialized else "ML"
+        response = _build_prediction_response(
+            predicted_disease,
+            confidence,
+            enhanced_info,
+            source="ML+AI" if ai_enhanced else "ML",
+            corrections=corrections,
+            differential=differential,
+            score_type=ml_service.score_type
         )
         
-        logger.info(f"Prediction successful: {predicted_disease} (confidence: {confidence:.2f})")
+        logger.debug(
+            "Prediction successful",
+            extra={"disease": predicted_disease, "confidence": round(confidence, 3)}
+        )
         return response
         
     except HTTPException:
@@ -87,3 +190,238 @@ async def predict_disease(
     except Exception as e:
         logger.error(f"Prediction error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error during prediction")
+
+@router.get("/predict/{job_id}/enhancement", response_model=EnhancementJobResponse)
+async def get_prediction_enhancement(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish (long-poll)"),
+    enhancement_jobs: EnhancementJobManager = Depends(get_enhancement_jobs),
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """
+    Get the AI enhanced result of a deferred prediction
+    """
+    job = await enhancement_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Enhancement job not found or expired")
+    
+    job = await enhancement_jobs.wait(job, min(wait, get_settings().ENHANCEMENT_MAX_WAIT))
+    
+    result = None
+    if job.status == COMPLETED:
+        result = _build_prediction_response(
+            job.disease,
+            job.confidence,
+            job.result,
+            source="ML+AI" if job.ai_enhanced else "ML",
+            corrections=job.corrections,
+            differential=job.differential,
+            score_type=ml_service.score_type
+        )
+        result.enhancementJobId = job.id
+        result.enhancementStatus = job.status
+    
+    return EnhancementJobResponse(jobId=job.id, status=job.status, result=result)
+
+@router.post("/predict/stream")
+async def predict_disease_stream(
+    request: SymptomRequest,
+    ml_service: MLService = Depends(get_ml_service),
+    gemini_service: GeminiService = Depends(get_gemini_service)
+):
+    """
+    Predict disease and stream the AI enhancement as Server-Sent Events
+    
+    Events, in order:
+    - ``prediction``: ML disease, confidence and differential (sent immediately)
+    - ``basic_info``: dataset information for the disease
+    - ``field``: ``{"name", "value"}`` for each AI field as soon as it is complete
+    - ``error``: AI enhancement failed; the final response uses basic information
+    - ``complete``: the full ``PredictionResponse``
+    """
+    try:
+        # Get ML prediction (errors are returned as regular HTTP errors)
+        predicted_disease, confidence, differential, corrections = await _predict_from_request(
+            request, ml_service
+        )
+        basic_info = ml_service.get_disease_info(predicted_disease)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prediction error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error during prediction")
+    
+    async def events():
+        yield _sse_event("prediction", {
+            "disease": predicted_disease,
+            "confidence": confidence,
+            "differential": [{"disease": name, "score": score} for name, score in differential],
+            "scoreType": ml_service.score_type,
+            "corrections": [
+                {"input": raw, "resolved": resolved, "applied": applied}
+                for raw, resolved, applied in corrections
+            ] or None
+        })
+        yield _sse_event("basic_info", basic_info)
+        
+        ai_fields: Dict[str, Any] = {}
+        fallback_reason = None if gemini_service.is_initialized else "unavailable"
+        
+        if fallback_reason is None:
+            try:
+                async for name, value in gemini_service.stream_enhancement(
+                    predicted_disease, request.symptoms, basic_info
+                ):
+                    if name in ENHANCED_FIELDS:
+                        ai_fields[name] = value
+                        yield _sse_event("field", {"name": name, "value": value})
+            except Exception as e:
+                if isinstance(e, CircuitOpenError):
+                    fallback_reason = "circuit_open"
+                    logger.debug("Gemini circuit breaker is open, streaming basic info")
+                else:
+                    fallback_reason = "error"
+                    logger.error(f"Error streaming AI enhancement: {e}")
+                yield _sse_event("error", {"message": "AI enhancement unavailable, using basic information"})
+        
+        ai_failed = fallback_reason is not None
+        if ai_failed:
+            # Keep any fields that were already streamed
+            enhanced_info = {
+                **gemini_service.basic_enhancement(predicted_disease, basic_info, reason=fallback_reason),
+                **ai_fields
+            }
+        else:
+            enhanced_info = gemini_service.build_enhanced_info(ai_fields, basic_info)
+        
+        response = _build_prediction_response(
+            predicted_disease,
+            confidence,
+            enhanced_info,
+            source="ML" if ai_failed else "ML+AI",
+            corrections=corrections,
+            differential=differential,
+            score_type=ml_service.score_type
+        )
+        yield _sse_event("complete", response.model_dump(mode="json"))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    request: BatchPredictionRequest,
+    ml_service: MLService = Depends(get_ml_service),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+    rate_limit: Optional[RateLimitBudget] = Depends(get_rate_limit)
+):
+    """
+    Predict diseases for many symptom sets with a single model call
+    
+    Items whose symptoms are not recognized get a per-item error instead of
+    failing the whole batch. AI enhancement is opt-in via ``enhance``; each
+    enhanced item is charged to the rate limit budget of ``POST /predict``.
+    """
+    settings = get_settings()
+    
+    if len(request.items) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {settings.MAX_BATCH_SIZE} items per request"
+        )
+    if request.enhance and len(request.items) > settings.MAX_ENHANCED_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large for enhance=true: at most {settings.MAX_ENHANCED_BATCH_SIZE} items per request"
+        )
+    
+    try:
+        logger.debug(f"Batch prediction request: {len(request.items)} items (enhance={request.enhance})")
+        
+        # Get ML predictions (one model call for the whole batch)
+        encoded = [ml_service.encode_symptoms(item.symptoms) for item in request.items]
+        rankings = await ml_service.rank_encoded(encoded, request.top_k or settings.PREDICTION_TOP_K)
+        
+        enhance = request.enhance and gemini_service.is_initialized
+        if enhance and rate_limit is not None:
+            enhanced_items = sum(1 for differential in rankings if differential)
+            decision = rate_limit.charge("POST", "/api/v1/predict", enhanced_items)
+            if not decision.allowed:
+                logger.warning(f"Rate limit exceeded for {rate_limit.client} (batch of {enhanced_items} enhanced items)")
+                return rate_limited_response(decision)
+        semaphore = asyncio.Semaphore(settings.BATCH_ENHANCE_CONCURRENCY)
+        basic_cache: Dict[str, Dict[str, Any]] = {}
+        
+        async def build_result(index: int, item, differential, corrections) -> BatchPredictionResult:
+            if not differential:
+                error = "No valid symptoms provided" if not item.symptoms else _unrecognized_message(corrections)
+                return BatchPredictionResult(index=index, id=item.id, error=error)
+            
+            predicted_disease, confidence = differential[0]
+            
+            ai_enhanced = False
+            if enhance:
+                async with semaphore:
+                    enhanced_info, ai_enhanced = await gemini_service.enhance_prediction(
+                        predicted_disease,
+                        ", ".join(item.symptoms),
+                        ml_service.get_disease_info(predicted_disease)
+                    )
+            else:
+                # Same content for every item with this disease
+                enhanced_info = basic_cache.get(predicted_disease)
+                if enhanced_info is None:
+                    enhanced_info = gemini_service.basic_enhancement(
+                        predicted_disease,
+                        ml_service.get_disease_info(predicted_disease)
+                    )
+                    basic_cache[predicted_disease] = enhanced_info
+            
+            return BatchPredictionResult(
+                index=index,
+                id=item.id,
+                prediction=_build_prediction_response(
+                    predicted_disease,
+                    confidence,
+                    enhanced_info,
+                    "ML+AI" if ai_enhanced else "ML",
+                    corrections,
+                    differential,
+                    ml_service.score_type
+                )
+            )
+        
+        if enhance:
+            results = await asyncio.gather(*(
+                build_result(index, item, differential, symptoms.corrections)
+                for index, (item, symptoms, differential) in enumerate(
+                    zip(request.items, encoded, rankings)
+                )
+            ))
+        else:
+            results = [
+                await build_result(index, item, differential, symptoms.corrections)
+                for index, (item, symptoms, differential) in enumerate(
+                    zip(request.items, encoded, rankings)
+                )
+            ]
+        
+        succeeded = sum(1 for result in results if result.prediction is not None)
+        logger.debug(f"Batch prediction complete: {succeeded}/{len(results)} succeeded")
+        
+        return BatchPredictionResponse(
+            results=results,
+            total=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error during batch prediction")
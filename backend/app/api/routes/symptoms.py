@@ -1,22 +1,17 @@
 """Symptoms API routes"""
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import Optional
 import logging
 
-from app.models.schemas import SymptomsListResponse, SymptomInfo
+from app.models.schemas import SymptomsListResponse, SymptomSuggestionsResponse
+from app.services.catalog import render_json
+from app.api.deps import get_ml_service
 from app.services.ml_service import MLService
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-async def get_ml_service() -> MLService:
-    """Dependency to get ML service"""
-    from main import ml_service
-    if ml_service is None:
-        raise HTTPException(status_code=503, detail="ML Service not available")
-    return ml_service
-
 @router.get("/symptoms", response_model=SymptomsListResponse)
 async def get_symptoms(
     category: Optional[str] = Query(None, description="Filter by symptom category"),
@@ -27,30 +22,11 @@ async def get_symptoms(
     Get list of available symptoms
     """
     try:
-        symptoms_data = ml_service.get_symptoms_list()
-        
-        # Filter by category if specified
-        if category:
-            symptoms_data = [s for s in symptoms_data if s['category'].lower() == category.lower()]
-        
-        # Search by name if specified
-        if search:
-            search_lower = search.lower()
-            symptoms_data = [s for s in symptoms_data if search_lower in s['name'].lower()]
-        
-        # Convert to response format
-        symptoms = [
-            SymptomInfo(
-                name=s['name'],
-                description=f"Medical symptom: {s['name']}",
-                category=s['category']
-            )
-            for s in symptoms_data
-        ]
-        
-        return SymptomsListResponse(
-            symptoms=symptoms,
-            total=len(symptoms)
+        # Category filters are index lookups; bodies without a search term
+        # are pre-serialized when the catalog is built
+        return Response(
+            content=ml_service.symptom_catalog.body(category, search),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -63,14 +39,36 @@ async def get_symptom_categories(ml_service: MLService = Depends(get_ml_service)
     Get list of symptom categories
     """
     try:
-        symptoms_data = ml_service.get_symptoms_list()
-        categories = list(set(s['category'] for s in symptoms_data))
-        
-        return {
-            "categories": sorted(categories),
-            "total": len(categories)
-        }
+        return Response(
+            content=ml_service.symptom_catalog.groups_body(),
+            media_type="application/json"
+        )
         
     except Exception as e:
         logger.error(f"Error getting symptom categories: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving symptom categories")
+
+@router.get("/symptoms/suggest", response_model=SymptomSuggestionsResponse)
+async def suggest_symptoms(
+    q: str = Query(..., min_length=1, max_length=100, description="Partial symptom name or lay term"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """
+    Autocomplete symptom names, including common lay terms
+    (e.g. "loose motion" suggests Diarrhoea)
+    """
+    try:
+        suggestions = ml_service.symptom_suggester.suggest(q, limit)
+        return Response(
+            content=render_json({
+                "query": q,
+                "suggestions": [suggestion.to_dict() for suggestion in suggestions],
+                "total": len(suggestions)
+            }),
+            media_type="application/json"
+        )
+        
+    except Exception as e:
+        logger.error(f"Error suggesting symptoms: {e}")
+        raise HTTPException(status_code=500, detail="Error suggesting symptoms")
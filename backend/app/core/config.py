@@ -1,7 +1,7 @@
 """Configuration management"""
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 from functools import lru_cache
 
@@ -22,25 +22,131 @@ class Settings(BaseSettings):
     
     # Google AI
     GOOGLE_GENERATIVE_AI_API_KEY: str = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY", "")
+    # Point at benchmarks/fake_gemini.py for load tests
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    GEMINI_MODEL: str = "gemini-2.0-flash-exp"
+    
+    # Gemini HTTP client
+    GEMINI_HTTP2: bool = False  # needs the h2 package (pip install "httpx[http2]")
+    GEMINI_MAX_CONNECTIONS: int = 20
+    GEMINI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    GEMINI_KEEPALIVE_EXPIRY: float = 30.0
+    GEMINI_CONNECT_TIMEOUT: float = 5.0
+    GEMINI_READ_TIMEOUT: float = 20.0
+    GEMINI_WRITE_TIMEOUT: float = 10.0
+    GEMINI_POOL_TIMEOUT: float = 2.0  # wait for a free connection
+    # Overall budget for one call, including retries and hedges
+    GEMINI_DEADLINE: float = 25.0
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BACKOFF: float = 0.25  # full jitter, doubling per retry
+    GEMINI_RETRY_BACKOFF_MAX: float = 4.0
+    GEMINI_RETRY_STATUSES: List[int] = [429, 500, 502, 503, 504]
+    # Hedging: send a second attempt once a call is slower than the
+    # GEMINI_HEDGE_PERCENTILE of recent latencies, for at most
+    # GEMINI_HEDGE_MAX_RATIO of calls
+    GEMINI_HEDGE_ENABLED: bool = False
+    GEMINI_HEDGE_PERCENTILE: float = 0.95
+    GEMINI_HEDGE_MIN_DELAY: float = 0.05
+    GEMINI_HEDGE_MAX_DELAY: float = 10.0
+    GEMINI_HEDGE_MAX_RATIO: float = 0.1
+    # Circuit breaker: stop calling the API for GEMINI_BREAKER_OPEN_SECONDS
+    # once GEMINI_BREAKER_FAILURE_RATE of the calls in the last
+    # GEMINI_BREAKER_WINDOW seconds (at least GEMINI_BREAKER_MIN_CALLS)
+    # failed, then let GEMINI_BREAKER_HALF_OPEN_PROBES calls test it
+    GEMINI_BREAKER_ENABLED: bool = True
+    GEMINI_BREAKER_FAILURE_RATE: float = 0.5
+    GEMINI_BREAKER_MIN_CALLS: int = 10
+    GEMINI_BREAKER_WINDOW: float = 30.0
+    GEMINI_BREAKER_OPEN_SECONDS: float = 15.0
+    GEMINI_BREAKER_HALF_OPEN_PROBES: int = 2
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON: bool = True  # one JSON object per line; LOG_FORMAT is used otherwise
+    LOG_DIR: str = "logs"
+    LOG_FILE: str = "app.log"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never block
+    # Fraction of fast, successful requests that get an access log record;
+    # errors and requests slower than LOG_SLOW_REQUEST_MS are always logged
+    LOG_SAMPLE_RATE: float = 0.1
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+    
+    # Metrics (Prometheus text format on /metrics)
+    METRICS_ENABLED: bool = True
+    # Worker processes share their metrics through snapshot files here
+    METRICS_DIR: str = "data/metrics"
+    METRICS_FLUSH_INTERVAL: float = 5.0
+    
+    # Tracing: per-request stage spans, reported in a Server-Timing header
+    TRACING_ENABLED: bool = True
+    TRACING_SERVER_TIMING: bool = True
+    # Append finished traces as OTLP/JSON lines to this file ("" disables export)
+    TRACING_EXPORT_FILE: str = ""
+    TRACING_EXPORT_SAMPLE_RATE: float = 1.0
     
     # Rate Limiting
     RATE_LIMIT_CALLS: int = 100
     RATE_LIMIT_PERIOD: int = 60
+    # Exact "METHOD /path" routes charged to a named rule instead of the default budget
+    RATE_LIMIT_ROUTES: Dict[str, str] = {
+        "POST /api/v1/predict": "gemini",
+        "POST /api/v1/predict/stream": "gemini",
+    }
+    # Budget of each rule (calls per RATE_LIMIT_PERIOD)
+    RATE_LIMIT_RULE_CALLS: Dict[str, int] = {"gemini": 30}
+    RATE_LIMIT_MAX_CLIENTS: int = 10000
     
     # ML Model Configuration
     MODEL_PATH: str = "models"
     DATASETS_PATH: str = "datasets"
+    # Model arrays exported as .npy files and memory-mapped by every worker
+    MODEL_MMAP: bool = True
+    MODEL_CACHE_DIR: str = "data/model_arrays"
+    # Score SVC models with plain numpy instead of scikit-learn/libsvm
+    MODEL_COMPILED: bool = True
+    # Typos tolerated when matching symptom names (0 disables fuzzy matching)
+    SYMPTOM_MAX_EDIT_DISTANCE: int = 2
+    # Candidate diseases returned in the differential unless a request sets top_k
+    PREDICTION_TOP_K: int = 3
+    # Predictions memoized per symptom combination (0 disables the cache)
+    PREDICTION_CACHE_SIZE: int = 4096
+    # Seconds between checks of the model file; a changed file is reloaded (0 disables)
+    MODEL_RELOAD_INTERVAL: float = 5.0
     
     # Cache Configuration
     CACHE_TTL: int = 3600  # 1 hour
+    CACHE_STALE_TTL: int = 600  # serve stale entries while refreshing
+    CACHE_MAX_ENTRIES: int = 2048
+    CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_BACKEND: str = "memory"  # "memory" or "sqlite" (persistent, shared by workers)
+    CACHE_DB_PATH: str = "data/enhancement_cache.sqlite3"
+    CACHE_DB_MAX_BYTES: int = 256 * 1024 * 1024
     
     # Performance
-    MAX_WORKERS: int = 4
+    MAX_WORKERS: int = 4  # server worker processes (python main.py)
     REQUEST_TIMEOUT: int = 30
+    INFERENCE_WORKERS: int = 4  # inference pool size per worker process
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" or "process"
+    
+    # Server
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    
+    # Deferred Enhancement Jobs
+    ENHANCEMENT_WORKERS: int = 4
+    ENHANCEMENT_MAX_JOBS: int = 1000
+    ENHANCEMENT_JOB_TTL: int = 600
+    ENHANCEMENT_MAX_WAIT: int = 30  # long-poll limit in seconds
+    # Job status and results shared by the worker processes of python main.py
+    ENHANCEMENT_JOBS_DB_PATH: str = "data/enhancement_jobs.sqlite3"
+    
+    # Batch Prediction
+    MAX_BATCH_SIZE: int = 5000
+    MAX_ENHANCED_BATCH_SIZE: int = 20  # one Gemini call per item with enhance=true
+    BATCH_ENHANCE_CONCURRENCY: int = 5
     
     class Config:
         env_file = ".env"
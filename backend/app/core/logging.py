@@ -1,27 +1,148 @@
 """Logging configuration"""
 
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
+
+from app.core.config import Settings, get_settings
+
+# Attributes present on every LogRecord; anything else was passed via ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+# Id of the request being handled, set by RequestLoggingMiddleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to records logged while handling a request"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            request_id = request_id_var.get()
+            if request_id is not None:
+                record.request_id = request_id
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the background writer without blocking the caller
+
+    Only the message is rendered on the calling thread; formatting and I/O
+    happen on the listener thread. Records are dropped (and counted) when
+    the queue is full rather than stalling the event loop.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def log_file_path(settings: Settings, worker: Optional[int] = None) -> Path:
+    """Log file of the process: ``LOG_FILE``, or ``<name>-worker<N>.log`` for worker ``N``"""
+    path = Path(settings.LOG_DIR) / settings.LOG_FILE
+    if worker is None:
+        return path
+    return path.with_name(f"{path.stem}-worker{worker}{path.suffix}")
+
+
+def setup_logging(settings: Optional[Settings] = None, worker: Optional[int] = None) -> QueueListener:
+    """Setup application logging
+
+    Records go through a bounded queue to a background thread that writes
+    them to stdout and to a size-rotated file, as JSON lines when
+    ``LOG_JSON`` is set or with ``LOG_FORMAT`` otherwise. Forked server
+    workers pass their ``worker`` index and get a file of their own, since
+    processes rotating one shared file lose lines.
+    """
+    global _listener, _listener_pid
+    settings = settings or get_settings()
+
+    # In a forked child the inherited listener thread is gone; only the
+    # process that started it may stop it
+    stop_logging()
 
-def setup_logging():
-    """Setup application logging"""
-    
     # Create logs directory
-    logs_dir = Path("logs")
+    logs_dir = Path(settings.LOG_DIR)
     logs_dir.mkdir(exist_ok=True)
-    
-    # Configure logging
+
+    formatter = JSONFormatter() if settings.LOG_JSON else logging.Formatter(settings.LOG_FORMAT)
+
+    file_handler = RotatingFileHandler(
+        log_file_path(settings, worker),
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+
+    # Configure logging (handler filters run in the caller, where the
+    # request context is available)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
     logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(logs_dir / "app.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
+        level=settings.LOG_LEVEL.upper(),
+        handlers=[queue_handler],
+        force=True
     )
-    
+
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("fastapi").setLevel(logging.INFO)
     logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread of this process"""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
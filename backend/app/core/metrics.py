@@ -0,0 +1,380 @@
+"""Process metrics in the Prometheus text exposition format
+
+A small stand-in for ``prometheus_client`` with the three metric types the
+service needs. Each series is a plain list in a dict keyed by the tuple of
+label values, so recording costs a dict lookup and an addition (about a
+microsecond for a histogram observation) and takes no lock: updates come
+from the event loop thread.
+
+Workers forked by ``app.core.server`` each have their own registry. With
+``enable_multiprocess`` every worker writes a snapshot of its series to a
+shared directory (``flush``) and ``render`` adds up the snapshots of all
+workers, so a scrape sees the totals whichever worker answers it. Counters
+and histograms of workers that exited are kept (they must not go
+backwards); their gauges are dropped.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Starlette appends "; charset=utf-8" to text media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; request latency from sub-millisecond catalog reads to slow AI calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds; pipeline stages range from microseconds (vectorizing) to seconds (Gemini)
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+class Metric:
+    """Base class: a named family of series keyed by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Labels, Any] = {}
+
+    def collect(self) -> Dict[Labels, Any]:
+        """Current value of every series"""
+        return self._series
+
+    @staticmethod
+    def merge(values: List[Any]) -> Any:
+        return sum(values)
+
+    def reset(self):
+        self._series.clear()
+
+    def render(self, series: Dict[Labels, Any]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down
+
+    ``set_function`` replaces the stored series with a callback evaluated
+    at collection time, returning a number (no labels) or a mapping of
+    label tuples to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], Any]] = None
+
+    def set(self, value: float, *labels: str):
+        self._series[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self._series[labels] = self._series.get(labels, 0) - amount
+
+    def set_function(self, function: Optional[Callable[[], Any]]):
+        self._function = function
+
+    def collect(self) -> Dict[Labels, Any]:
+        if self._function is None:
+            return self._series
+        try:
+            value = self._function()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} callback failed: {e}")
+            return {}
+        return dict(value) if isinstance(value, dict) else {(): value}
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram(Metric):
+    """Distribution of observations in fixed cumulative buckets
+
+    A series is ``[count per bucket..., count above the last bucket, sum]``;
+    bucket counts are made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self, labels)
+
+    @staticmethod
+    def merge(values: List[Any]) -> Any:
+        return [sum(column) for column in zip(*values)]
+
+    def render(self, series: Dict[Labels, Any]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        names = (*self.labelnames, "le")
+        for labels, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                label_text = _label_text(names, (*labels, "+Inf" if bound == math.inf else repr(bound)))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics exposed together, optionally merged across worker processes"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.multiprocess_dir: Optional[Path] = None
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def enable_multiprocess(self, directory: str):
+        """Share this process's series through snapshot files in ``directory``
+
+        Call in each worker after ``fork``; series recorded before the fork
+        belong to the parent and are cleared.
+        """
+        self.multiprocess_dir = Path(directory)
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        self.reset()
+
+    @staticmethod
+    def clear_multiprocess_dir(directory: str):
+        """Remove the snapshots of a previous server run (call before forking)"""
+        path = Path(directory)
+        if path.is_dir():
+            for snapshot in path.glob("*.json"):
+                snapshot.unlink(missing_ok=True)
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.multiprocess_dir / f"{pid}.json"
+
+    def snapshot(self) -> Dict[str, List]:
+        return {
+            name: [[list(labels), value] for labels, value in metric.collect().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def flush(self, snapshot: Optional[Dict[str, List]] = None):
+        """Write this process's snapshot for the other workers (atomically)"""
+        if self.multiprocess_dir is None:
+            return
+        path = self._snapshot_path(os.getpid())
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(snapshot if snapshot is not None else self.snapshot()))
+        os.replace(temporary, path)
+
+    async def flush_periodically(self, interval: float):
+        """Flush every ``interval`` seconds until cancelled, then once more"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                snapshot = self.snapshot()
+                await asyncio.to_thread(self.flush, snapshot)
+        finally:
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Failed to write final metrics snapshot: {e}")
+
+    def _other_snapshots(self) -> List[Tuple[bool, Dict[str, List]]]:
+        """``(process alive, snapshot)`` for every other worker's file"""
+        snapshots = []
+        own = os.getpid()
+        for path in self.multiprocess_dir.glob("*.json"):
+            try:
+                pid = int(path.stem)
+                if pid == own:
+                    continue
+                snapshot = json.loads(path.read_text())
+            except (ValueError, OSError):
+                continue
+            try:
+                os.kill(pid, 0)
+                alive = True
+            except ProcessLookupError:
+                alive = False
+            except PermissionError:
+                alive = True
+            snapshots.append((alive, snapshot))
+        return snapshots
+
+    def collect(self) -> Dict[str, Dict[Labels, Any]]:
+        """Copy of this process's series (on the event loop, where they are updated)"""
+        return {
+            name: {labels: list(value) if isinstance(value, list) else value for labels, value in metric.collect().items()}
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self, collected: Optional[Dict[str, Dict[Labels, Any]]] = None) -> str:
+        """All metrics in the text exposition format
+
+        Pass the result of ``collect`` to run the rest (reading the other
+        workers' snapshot files and formatting) in a thread.
+        """
+        if collected is None:
+            collected = self.collect()
+
+        if self.multiprocess_dir is not None:
+            combined: Dict[str, Dict[Labels, List]] = {
+                name: {labels: [value] for labels, value in series.items()}
+                for name, series in collected.items()
+            }
+            for alive, snapshot in self._other_snapshots():
+                for name, samples in snapshot.items():
+                    metric = self._metrics.get(name)
+                    if metric is None or (metric.kind == "gauge" and not alive):
+                        continue
+                    for labels, value in samples:
+                        combined[name].setdefault(tuple(labels), []).append(value)
+            collected = {
+                name: {labels: self._metrics[name].merge(values) for labels, values in series.items()}
+                for name, series in combined.items()
+            }
+
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.render(collected[name]))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being processed"
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "stage_duration_seconds",
+    "Time spent in each prediction pipeline stage",
+    ("stage",),
+    buckets=STAGE_BUCKETS
+))
+RATE_LIMIT_REJECTIONS = REGISTRY.register(Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter, by route rule",
+    ("rule",)
+))
+GEMINI_FALLBACKS = REGISTRY.register(Counter(
+    "gemini_fallback_responses_total",
+    "Responses built from the datasets instead of the AI answer, by reason",
+    ("reason",)
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    "upstream_retries_total",
+    "Retried upstream HTTP attempts, by upstream and status code or error",
+    ("upstream", "reason")
+))
+UPSTREAM_HEDGES = REGISTRY.register(Counter(
+    "upstream_hedged_requests_total",
+    "Upstream requests that sent a hedged second attempt, by upstream and winning attempt",
+    ("upstream", "winner")
+))
+UPSTREAM_CIRCUIT_STATE = REGISTRY.register(Gauge(
+    "upstream_circuit_breaker_state",
+    "Circuit breaker state by upstream (0 closed, 1 half open, 2 open)",
+    ("upstream",)
+))
+GEMINI_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "gemini_http_pool_connections",
+    "Connections in the Gemini HTTP client pool, by state",
+    ("state",)
+))
+GEMINI_POOL_MAX_CONNECTIONS = REGISTRY.register(Gauge(
+    "gemini_http_pool_max_connections",
+    "Connection limit of the Gemini HTTP client pool"
+))
+GEMINI_POOL_QUEUED = REGISTRY.register(Gauge(
+    "gemini_http_pool_queued_requests",
+    "Gemini requests waiting for a pool connection"
+))
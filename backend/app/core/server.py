@@ -0,0 +1,142 @@
+"""Pre-fork production server
+
+The parent process binds the listening socket, runs ``preload`` (loading
+the model, datasets and indexes once) and then forks the workers. Workers
+inherit the loaded state copy-on-write instead of each building their own
+copy, and all of them accept connections from the shared socket. The
+parent only supervises: it restarts workers that die and forwards
+SIGINT/SIGTERM for a graceful shutdown.
+
+State that must be shared between the workers (such as rate limit
+buckets) has to be set up before ``serve`` forks them.
+"""
+
+import gc
+import importlib.util
+import logging
+import os
+import signal
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.logging import stop_logging
+
+logger = logging.getLogger(__name__)
+
+# Workers that die sooner than this after starting are restarted with a delay
+_RESTART_BACKOFF = 1.0
+
+_worker_processes = 1
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_processes() -> int:
+    """Number of processes serving requests (1 unless started by ``serve``)"""
+    return _worker_processes
+
+
+def serve(
+    app,
+    host: str,
+    port: int,
+    workers: int,
+    preload: Optional[Callable[[], None]] = None,
+    after_fork: Optional[Callable[[int], None]] = None
+):
+    """Run ``app`` on ``workers`` forked uvicorn workers sharing one socket
+
+    ``after_fork`` runs first thing in every worker (e.g. to restart logging
+    threads, which do not survive ``fork``). It gets the worker's index,
+    ``0`` to ``workers - 1``; a restarted worker reuses the index of the
+    one it replaces.
+    """
+    global _worker_processes
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        # Logging is configured by the application; requests are logged by
+        # RequestLoggingMiddleware
+        log_config=None,
+        access_log=False,
+    )
+    sock = config.bind_socket()
+    logger.info(f"Server using {config.loop} event loop and {config.http} HTTP parser")
+
+    if preload:
+        preload()
+
+    # Keep preloaded objects out of future collections so the garbage
+    # collector does not touch (and un-share) their pages in the workers
+    gc.collect()
+    gc.freeze()
+
+    if workers <= 1:
+        uvicorn.Server(config).run(sockets=[sock])
+        return
+
+    _worker_processes = workers
+    # pid -> (start time, worker index)
+    children: Dict[int, Tuple[float, int]] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            status = 0
+            try:
+                if after_fork:
+                    after_fork(index)
+                uvicorn.Server(config).run(sockets=[sock])
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} crashed")
+                status = 1
+            finally:
+                stop_logging()
+                os._exit(status)
+        children[pid] = (time.monotonic(), index)
+        logger.info(f"Started worker process {pid} (worker {index})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        child = children.pop(pid, None)
+        if child is None or stopping:
+            continue
+        started, index = child
+        logger.error(f"Worker process {pid} exited (status {status}), restarting")
+        if time.monotonic() - started < _RESTART_BACKOFF:
+            time.sleep(_RESTART_BACKOFF)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    logger.info("All worker processes stopped")
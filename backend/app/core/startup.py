@@ -0,0 +1,100 @@
+"""Cold start report
+
+Measures, in a fresh interpreter, how long ``import main`` takes (with
+``python -X importtime`` per-module timings) and how long the application
+lifespan takes to bring all services up. Used by ``python main.py
+--startup-report`` to track cold-start regressions.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Packages whose presence in the import graph is worth reporting
+HEAVY_PACKAGES = ("fastapi", "pydantic", "numpy", "pandas", "httpx", "sklearn", "scipy", "uvicorn")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+_RESULT_PREFIX = "startup-report:"
+
+# Run in the child: time the import and the lifespan, report on stderr
+# next to the importtime lines (stdout carries the application logs)
+_PROBE = f"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def _lifespan():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(_lifespan())
+print("{_RESULT_PREFIX}" + json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "modules_loaded": len(sys.modules),
+}}), file=sys.stderr)
+"""
+
+
+def _parse_importtime(lines: List[str]) -> List[Dict[str, Any]]:
+    modules = []
+    for line in lines:
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return modules
+
+
+def startup_report(top: int = 15) -> Dict[str, Any]:
+    """Measure a cold start of the application in a subprocess
+
+    The probe runs in the current directory, so models and datasets are
+    found the same way as when serving.
+    """
+    backend_dir = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [backend_dir, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    stderr = result.stderr.splitlines()
+    summary = next(
+        (json.loads(line[len(_RESULT_PREFIX):]) for line in stderr if line.startswith(_RESULT_PREFIX)),
+        None
+    )
+    if result.returncode != 0 or summary is None:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+    modules = _parse_importtime(stderr)
+    heavy = {
+        package: next((m["cumulative_ms"] for m in modules if m["module"] == package), None)
+        for package in HEAVY_PACKAGES
+    }
+    return {
+        "import_ms": round(summary["import_ms"], 1),
+        "lifespan_ms": round(summary["lifespan_ms"], 1),
+        "total_ms": round(summary["import_ms"] + summary["lifespan_ms"], 1),
+        "modules_loaded": summary["modules_loaded"],
+        # Cumulative import time of each heavy package, None when not imported
+        "packages_ms": heavy,
+        "slowest_modules": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+    }
+
+
+def print_startup_report(top: int = 15):
+    """Print the startup report as JSON"""
+    print(json.dumps(startup_report(top), indent=2))
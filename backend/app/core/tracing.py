@@ -0,0 +1,315 @@
+"""Per-request stage tracing
+
+``TracingMiddleware`` starts a ``Trace`` for every request and keeps it in
+a context variable. Code on the request path wraps its stages in
+``stage(name)``, which always records the ``stage_duration_seconds``
+histogram and, inside a traced request, also records a span (nested under
+the enclosing stage). Outside a request a stage costs only the histogram
+observation.
+
+The middleware sends the stage durations back in a ``Server-Timing``
+header and, when ``configure_export`` was called, hands the finished trace
+to a background thread that appends it to a JSONL file in the OTLP/JSON
+format (one ``ExportTraceServiceRequest`` per line), readable by the
+OpenTelemetry collector's file receiver and other OTLP tooling.
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.metrics import STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+_exporter: Optional["SpanExporter"] = None
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def parse_traceparent(value: Optional[str]):
+    """``(trace_id, parent_span_id)`` of a W3C ``traceparent`` header, or ``(None, None)``"""
+    if not value:
+        return None, None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    trace_id, parent_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16)
+        int(parent_id, 16)
+    except ValueError:
+        return None, None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None, None
+    return trace_id, parent_id
+
+
+class Span:
+    """A timed operation; times are ``time.perf_counter()`` values"""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(
+        self,
+        name: str,
+        parent_id: Optional[str],
+        start: float,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.span_id = _span_id()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = start
+        self.end = start
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """The root span of a request and the spans recorded under it"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        start = time.perf_counter()
+        # Wall clock of the start, for converting perf_counter values
+        self._epoch_ns = time.time_ns()
+        self.root = Span(name, parent_id, start, kind=SPAN_KIND_SERVER, attributes=attributes)
+        self.spans: List[Span] = []
+        self.closed = False
+
+    def add(self, span: Span):
+        # Stages that outlive the request (e.g. background refreshes) are dropped
+        if not self.closed:
+            self.spans.append(span)
+
+    def finish(self, error: Optional[str] = None):
+        self.root.end = time.perf_counter()
+        self.root.error = error
+        self.closed = True
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` value: total milliseconds per stage so far, and the total"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        totals["total"] = time.perf_counter() - self.root.start
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
+
+    def _unix_nano(self, perf: float) -> str:
+        return str(self._epoch_ns + int((perf - self.root.start) * 1e9))
+
+    def _otlp_span(self, span: Span) -> Dict[str, Any]:
+        entry = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": self._unix_nano(span.start),
+            "endTimeUnixNano": self._unix_nano(span.end),
+            "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": span.error} if span.error else {"code": STATUS_UNSET},
+        }
+        if span.parent_id:
+            entry["parentSpanId"] = span.parent_id
+        return entry
+
+    def to_otlp(self, service_name: str) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ``ExportTraceServiceRequest``"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [self._otlp_span(span) for span in (self.root, *self.spans)],
+                }],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def start_trace(trace: Trace) -> Token:
+    """Make ``trace`` the current trace; pass the token to ``end_trace``"""
+    return _current_trace.set(trace)
+
+
+def end_trace(token: Token):
+    _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class stage:
+    """Context manager timing a pipeline stage
+
+    Observes ``stage_duration_seconds`` for ``name`` and, inside a traced
+    request, records a span with ``attributes``. Exceptions are recorded on
+    the span and propagate.
+    """
+
+    __slots__ = ('name', 'attributes', 'start', 'span', 'trace', 'token')
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> "stage":
+        self.trace = _current_trace.get()
+        self.start = time.perf_counter()
+        if self.trace is not None and not self.trace.closed:
+            parent = _current_span.get() or self.trace.root.span_id
+            self.span = Span(self.name, parent, self.start, attributes=self.attributes)
+            self.token = _current_span.set(self.span.span_id)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        STAGE_DURATION.observe(end - self.start, self.name)
+        span = self.span
+        if span is not None:
+            span.end = end
+            if exc_value is not None:
+                span.error = f"{exc_type.__name__}: {exc_value}"
+            _current_span.reset(self.token)
+            self.trace.add(span)
+
+
+def record_stage(name: str, start: float, end: Optional[float] = None, **attributes: Any):
+    """Record a stage measured by the caller (``time.perf_counter()`` values)"""
+    end = time.perf_counter() if end is None else end
+    STAGE_DURATION.observe(end - start, name)
+    trace = _current_trace.get()
+    if trace is not None and not trace.closed:
+        span = Span(name, _current_span.get() or trace.root.span_id, start, attributes=attributes)
+        span.end = end
+        trace.add(span)
+
+
+class SpanExporter:
+    """Appends finished traces to a JSONL file from a background thread
+
+    Serialization and I/O happen on the writer thread. Traces are dropped
+    (and counted) when ``max_queue`` are already waiting, so a slow disk
+    never stalls requests. Each line is written with a single ``write`` to
+    a file opened for appending, so worker processes can share the file.
+    """
+
+    def __init__(self, path: str, service_name: str, sample_rate: float = 1.0, max_queue: int = 10000):
+        self.path = Path(path)
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.exported = 0
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with open(self.path, "ab", buffering=0) as output:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    line = json.dumps(trace.to_otlp(self.service_name), separators=(",", ":")) + "\n"
+                    output.write(line.encode("utf-8"))
+                    self.exported += 1
+                except Exception as e:
+                    logger.warning(f"Failed to export trace: {e}")
+
+    def stop(self):
+        """Write the queued traces and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+def configure_export(path: str, service_name: str, sample_rate: float = 1.0) -> SpanExporter:
+    """Start exporting finished traces of this process to ``path``"""
+    global _exporter
+    shutdown_export()
+    _exporter = SpanExporter(path, service_name, sample_rate)
+    _exporter.start()
+    return _exporter
+
+
+def shutdown_export():
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+    _exporter = None
+
+
+def export(trace: Trace):
+    """Hand a finished trace to the exporter, if one is configured"""
+    if _exporter is not None:
+        _exporter.export(trace)
+
+
+def export_stats() -> Optional[Dict[str, Any]]:
+    return _exporter.stats() if _exporter is not None else None
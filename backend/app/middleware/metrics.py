@@ -0,0 +1,75 @@
+"""Request metrics middleware"""
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict
+import time
+
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+UNMATCHED_ROUTE = "unmatched"
+
+class RouteTemplates:
+    """Route template (``/api/v1/diseases/{disease_name}``) of a handled request
+
+    Used instead of the raw path to label requests so the number of label
+    values stays bounded; paths that match no route share ``unmatched``.
+    """
+
+    def __init__(self):
+        self._templates: Dict[Callable, str] = {}
+
+    def __call__(self, scope: Scope, status_code: int) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is not None:
+            template = self._templates.get(endpoint)
+            if template is not None:
+                return template
+        elif status_code == 404:
+            return UNMATCHED_ROUTE
+
+        # Requests answered before routing (e.g. rate limited) are matched here
+        for route in getattr(scope.get("app"), "routes", ()):
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path", UNMATCHED_ROUTE)
+                if endpoint is not None:
+                    self._templates[endpoint] = template
+                return template
+        return UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    """Request latency and in-flight metrics (pure ASGI)
+
+    Requests are labelled with their route template (see ``RouteTemplates``).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.route_template = RouteTemplates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                scope["method"],
+                self.route_template(scope, status_code),
+                str(status_code)
+            )
@@ -1,45 +1,341 @@
 """Rate limiting middleware"""
 
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import math
+import mmap
+import struct
+import tempfile
 import time
-from collections import defaultdict, deque
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+
 logger = logging.getLogger(__name__)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware"""
-    
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
+class RateLimitDecision:
+    """Outcome of a rate limit check"""
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset_after', 'retry_after', 'rule')
+
+    def __init__(
+        self,
+        allowed: bool,
+        limit: int,
+        remaining: int,
+        reset_after: float,
+        retry_after: float,
+        rule: str = "*"
+    ):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+        self.rule = rule
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+    def raw_headers(self) -> List[Tuple[bytes, bytes]]:
+        """Headers in ASGI form"""
+        return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in self.headers().items()]
+
+class SharedBuckets:
+    """Token buckets in anonymous shared memory, used by forked workers
+
+    Create it in the parent before forking: the pages and the lock file are
+    inherited, so every worker charges the same buckets and the configured
+    budgets hold however connections are spread. The lock is a POSIX record
+    lock, which the kernel releases if a worker dies holding it; it does not
+    exclude threads of one process, so call ``take`` from the event loop
+    only. Each slot holds a 64-bit hash of the bucket key, its tokens and
+    its last update (``time.monotonic()``, which is system-wide). A key
+    lives in one of ``_PROBE`` slots after its hash position; a new key
+    takes an empty or idle slot there, or else the least recently used
+    one, so memory and lookup cost are fixed.
+    """
+
+    _SLOT = struct.Struct("<Qdd")
+    _PROBE = 8
+
+    def __init__(self, max_keys: int):
+        self.slots = max(64, 2 * max_keys)
+        self._memory = mmap.mmap(-1, (self.slots + self._PROBE) * self._SLOT.size)
+        self._window = struct.Struct("<" + "Qdd" * self._PROBE)
+        self._lock_file = tempfile.TemporaryFile()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        digest = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        # 0 marks an empty slot
+        return digest or 1
+
+    def take(self, key: str, capacity: int, period: float, tokens: int, now: float) -> Tuple[bool, float]:
+        """Refill and charge a bucket; return (allowed, tokens left)"""
+        hashed = self._hash(key)
+        rate = capacity / period
+        start = hashed % self.slots
+        offset = start * self._SLOT.size
+
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+        try:
+            window = self._window.unpack_from(self._memory, offset)
+            slot = None
+            reuse, oldest = None, None
+            for index in range(self._PROBE):
+                slot_key, _, updated = window[3 * index:3 * index + 3]
+                if slot_key == hashed:
+                    slot = index
+                    break
+                if slot_key == 0 or now - updated >= period:
+                    # Empty, or idle long enough to be full again
+                    if reuse is None:
+                        reuse = index
+                elif oldest is None or updated < window[3 * oldest + 2]:
+                    oldest = index
+
+            if slot is None:
+                slot = reuse if reuse is not None else oldest
+                available = float(capacity)
+            else:
+                available = min(capacity, window[3 * slot + 1] + (now - window[3 * slot + 2]) * rate)
+
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            self._SLOT.pack_into(self._memory, offset + slot * self._SLOT.size, hashed, available, now)
+        finally:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+        return allowed, available
+
+    def __len__(self) -> int:
+        """Occupied slots (idle buckets stay until their slot is reused)"""
+        return sum(1 for slot_key, _, _ in self._SLOT.iter_unpack(self._memory) if slot_key)
+
+# Set in the pre-fork parent by share_between_processes()
+_shared_buckets: Optional[SharedBuckets] = None
+
+def share_between_processes(max_clients: int):
+    """Keep rate limit buckets in shared memory for the workers forked next
+
+    Falls back to per-process buckets, with a warning, when the platform
+    has no shared memory or record locks.
+    """
+    global _shared_buckets
+    try:
+        if fcntl is None:
+            raise OSError("fcntl record locks are not available")
+        _shared_buckets = SharedBuckets(max_clients)
+    except OSError as e:
+        logger.warning(f"Rate limits cannot be shared between workers, each worker applies them separately: {e}")
+        _shared_buckets = None
+
+class RateLimiter:
+    """Token bucket rate limiter with O(1) state per client
+
+    Each (client, rule) pair holds a bucket of tokens that refills
+    continuously over ``period`` seconds. ``routes`` maps exact
+    ``"METHOD /path"`` routes to a rule name, and ``rule_limits`` gives
+    each rule its own ``calls`` budget; several routes can share a rule
+    (and so a budget). Other requests use the default rule ``"*"`` with
+    ``calls`` tokens.
+
+    Buckets are kept in ``shared`` memory when given (see
+    ``share_between_processes``). Otherwise they live in this process,
+    in least-recently-used order: idle buckets (which would be full again
+    anyway) are swept periodically, and at most ``max_clients`` buckets
+    are tracked.
+    """
+
+    def __init__(
+        self,
+        calls: int = 100,
+        period: int = 60,
+        routes: Optional[Dict[str, str]] = None,
+        rule_limits: Optional[Dict[str, int]] = None,
+        max_clients: int = 10000,
+        sweep_interval: float = 60.0,
+        shared: Optional[SharedBuckets] = None
+    ):
         self.calls = calls
         self.period = period
-        self.clients = defaultdict(deque)
-    
-    async def dispatch(self, request: Request, call_next):
+        self.routes = dict(routes or {})
+        self.rule_limits = dict(rule_limits or {})
+        unknown = set(self.routes.values()) - set(self.rule_limits)
+        if unknown:
+            raise ValueError(f"Rate limit routes use rules without a budget: {sorted(unknown)}")
+        self.max_clients = max_clients
+        self.sweep_interval = sweep_interval
+        self.shared = shared
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self.rejected = 0
+
+    def rule(self, method: str, path: str) -> str:
+        """Name of the rule a request is charged to"""
+        return self.routes.get(f"{method} {path}", "*")
+
+    def check(self, client: str, method: str, path: str) -> RateLimitDecision:
+        """Consume one token for a request and report whether it is allowed"""
+        return self.consume(client, self.rule(method, path))
+
+    def consume(self, client: str, rule: str, tokens: int = 1) -> RateLimitDecision:
+        """Take ``tokens`` from a client's bucket for ``rule`` if it has them all
+
+        A request costing more than the whole budget is never allowed.
+        """
+        now = time.monotonic()
+        capacity = self.rule_limits.get(rule, self.calls)
+        rate = capacity / self.period
+
+        if self.shared is not None:
+            allowed, remaining = self.shared.take(f"{client} {rule}", capacity, self.period, tokens, now)
+        else:
+            allowed, remaining = self._take(client, rule, capacity, rate, tokens, now)
+        if not allowed:
+            self.rejected += 1
+
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=capacity,
+            remaining=int(remaining),
+            reset_after=(capacity - remaining) / rate,
+            retry_after=0.0 if allowed else (min(tokens, capacity) - remaining) / rate,
+            rule=rule
+        )
+
+    def _take(self, client: str, rule: str, capacity: int, rate: float, tokens: int, now: float) -> Tuple[bool, float]:
+        """Refill and charge a bucket of this process"""
+        if now - self._last_sweep > self.sweep_interval:
+            self._sweep(now)
+
+        key = (client, rule)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(capacity), now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        allowed = bucket[0] >= tokens
+        if allowed:
+            bucket[0] -= tokens
+        return allowed, bucket[0]
+
+    def _sweep(self, now: float):
+        """Drop buckets idle for a full period (oldest first)"""
+        self._last_sweep = now
+        cutoff = now - self.period
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[1] > cutoff:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self.shared) if self.shared is not None else len(self._buckets)
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracked_clients": len(self), "rejected": self.rejected}
+
+class RateLimitBudget:
+    """A client's rate limit budgets, for routes that cost more than one call
+
+    ``RateLimitMiddleware`` stores one in the request state as
+    ``rate_limit``; routes get it from ``app.api.deps.get_rate_limit``.
+    """
+
+    __slots__ = ('limiter', 'client')
+
+    def __init__(self, limiter: RateLimiter, client: str):
+        self.limiter = limiter
+        self.client = client
+
+    def charge(self, method: str, path: str, calls: int) -> RateLimitDecision:
+        """Charge ``calls`` requests to the budget of the ``method path`` route"""
+        return self.limiter.consume(self.client, self.limiter.rule(method, path), calls)
+
+def rate_limited_response(decision: RateLimitDecision) -> JSONResponse:
+    """The 429 response for a rejected request"""
+    RATE_LIMIT_REJECTIONS.inc(decision.rule)
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Too Many Requests",
+            "message": "Rate limit exceeded. Please try again later.",
+            "timestamp": time.time()
+        },
+        headers=decision.headers()
+    )
+
+class RateLimitMiddleware:
+    """Rate limiting middleware (pure ASGI)
+
+    The middleware is built on the first request, in the worker process, so
+    it picks up buckets shared by the pre-fork server's parent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        calls: int = 100,
+        period: int = 60,
+        routes: Optional[Dict[str, str]] = None,
+        rule_limits: Optional[Dict[str, int]] = None,
+        max_clients: int = 10000
+    ):
+        self.app = app
+        self.limiter = RateLimiter(calls, period, routes, rule_limits, max_clients, shared=_shared_buckets)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Get client IP
-        client_ip = request.client.host
-        
-        # Clean old requests
-        now = time.time()
-        client_requests = self.clients[client_ip]
-        
-        # Remove requests older than the period
-        while client_requests and client_requests[0] <= now - self.period:
-            client_requests.popleft()
-        
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
         # Check rate limit
-        if len(client_requests) >= self.calls:
+        decision = self.limiter.check(client_ip, scope["method"], scope["path"])
+
+        if not decision.allowed:
             logger.warning(f"Rate limit exceeded for {client_ip}")
-            raise HTTPException(
-                status_code=429,
-                detail="Rate limit exceeded. Please try again later."
-            )
-        
-        # Add current request
-        client_requests.append(now)
-        
-        # Process request
-        response = await call_next(request)
-        return response
+            await rate_limited_response(decision)(scope, receive, send)
+            return
+
+        # Routes whose requests cost more than one call charge the rest
+        scope.setdefault("state", {})["rate_limit"] = RateLimitBudget(self.limiter, client_ip)
+
+        # Process request, adding the rate limit headers to the response
+        rate_limit_headers = decision.raw_headers()
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                # A route that charged more calls reports that budget instead
+                names = {name.lower() for name, _ in headers}
+                message["headers"] = [*headers, *(header for header in rate_limit_headers if header[0] not in names)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
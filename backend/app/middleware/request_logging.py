@@ -1,32 +1,84 @@
 """Request logging middleware"""
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import random
 import time
+import uuid
 import logging
 
+from app.core.logging import request_id_var
+
 logger = logging.getLogger(__name__)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Request logging middleware"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url}")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Response: {response.status_code} - "
-            f"Duration: {duration:.3f}s - "
-            f"Path: {request.url.path}"
-        )
-        
-        return response
+REQUEST_ID_HEADER = b"x-request-id"
+
+class RequestLoggingMiddleware:
+    """Request logging middleware (pure ASGI)
+
+    Emits one structured record per request (request id, method, path,
+    status, duration). Failed requests and requests slower than
+    ``slow_request_ms`` are always logged; other requests are sampled at
+    ``sample_rate``. The request id is taken from the ``X-Request-ID``
+    header when present and echoed back on the response. While the request
+    is handled it is available from ``request_id_var`` (log records and
+    trace spans pick it up from there).
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, slow_request_ms: float = 1000.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+
+    def should_log(self, status_code: int, duration_ms: float) -> bool:
+        """Sampling decision for a finished request"""
+        if status_code >= 400 or duration_ms >= self.slow_request_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:128]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        request_id_token = request_id_var.set(request_id)
+        try:
+            # Process request
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_id_var.reset(request_id_token)
+
+            # Calculate duration
+            duration_ms = (time.perf_counter() - start_time) * 1000
+
+            # Log response
+            if self.should_log(status_code, duration_ms):
+                level = logging.WARNING if status_code >= 500 else logging.INFO
+                logger.log(
+                    level,
+                    f"{scope['method']} {scope['path']} {status_code} {duration_ms:.1f}ms",
+                    extra={
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 3),
+                    }
+                )
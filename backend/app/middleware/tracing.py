@@ -0,0 +1,66 @@
+"""Request tracing middleware"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import tracing
+from app.core.logging import request_id_var
+from app.middleware.metrics import RouteTemplates
+
+TRACEPARENT_HEADER = b"traceparent"
+SERVER_TIMING_HEADER = b"server-timing"
+
+class TracingMiddleware:
+    """Per-request trace with a ``Server-Timing`` breakdown (pure ASGI)
+
+    Starts the request's ``Trace`` (continuing the caller's trace when a
+    W3C ``traceparent`` header is sent), tags it with the request id set by
+    ``RequestLoggingMiddleware`` and, if ``server_timing`` is set, adds the
+    durations of the stages finished before the response starts to a
+    ``Server-Timing`` header. Finished traces go to the span exporter, if
+    one is configured.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+        self.route_template = RouteTemplates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER:
+                traceparent = value.decode("latin-1")
+                break
+        trace_id, parent_id = tracing.parse_traceparent(traceparent)
+
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+        request_id = request_id_var.get()
+        if request_id:
+            attributes["request.id"] = request_id
+        trace = tracing.Trace(scope["method"], trace_id, parent_id, attributes)
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    timing = trace.server_timing().encode("latin-1")
+                    message["headers"] = [*message.get("headers", ()), (SERVER_TIMING_HEADER, timing)]
+            await send(message)
+
+        token = tracing.start_trace(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            tracing.end_trace(token)
+            route = self.route_template(scope, status_code)
+            trace.root.name = f"{scope['method']} {route}"
+            trace.root.attributes["http.route"] = route
+            trace.root.attributes["http.response.status_code"] = status_code
+            trace.finish(error=f"HTTP {status_code}" if status_code >= 500 else None)
+            tracing.export(trace)
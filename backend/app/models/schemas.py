@@ -1,9 +1,12 @@
 """Pydantic models for request/response schemas"""
 
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
+# Longest accepted symptom text of one prediction (comma-separated)
+MAX_SYMPTOMS_LENGTH = 1000
+
 class SeverityLevel(str, Enum):
     MILD = "Mild"
     MODERATE = "Moderate"
@@ -14,10 +17,13 @@ class SymptomRequest(BaseModel):
     symptoms: str = Field(
         ...,
         min_length=1,
-        max_length=1000,
+        max_length=MAX_SYMPTOMS_LENGTH,
         description="Comma-separated list of symptoms",
         example="fever, headache, body ache, fatigue"
     )
+    top_k: Optional[int] = Field(
+        None, ge=1, le=10, description="Number of candidate diseases in the differential"
+    )
     
     @validator('symptoms')
     def validate_symptoms(cls, v):
@@ -25,6 +31,19 @@ class SymptomRequest(BaseModel):
             raise ValueError('Please provide valid symptoms')
         return v.strip()
 
+class SymptomCorrection(BaseModel):
+    """An input symptom matched as a lay term or after spelling correction"""
+    input: str = Field(..., description="Symptom as entered")
+    resolved: str = Field(..., description="Symptom it was matched to")
+    applied: bool = Field(
+        True, description="False when the match was too uncertain: the input was left unrecognized"
+    )
+
+class DiseaseCandidate(BaseModel):
+    """A ranked candidate disease"""
+    disease: str = Field(..., description="Disease name")
+    score: float = Field(..., description="Model score between 0 and 1 (see PredictionResponse.scoreType)")
+
 class PredictionResponse(BaseModel):
     """Response model for medical prediction"""
     disease: str = Field(..., description="Predicted disease name")
@@ -38,7 +57,66 @@ class PredictionResponse(BaseModel):
     workouts: List[str] = Field(..., description="Exercise recommendations")
     consultationAdvice: str = Field(..., description="Medical consultation advice")
     confidence: Optional[float] = Field(None, description="Prediction confidence score")
+    differential: Optional[List[DiseaseCandidate]] = Field(
+        None, description="Most likely diseases, best first (the first one is the prediction)"
+    )
+    scoreType: Optional[str] = Field(
+        None,
+        description="What confidence and differential scores are: probability (calibrated), "
+                    "relative (softmax over decision values, not a probability) or heuristic"
+    )
     source: str = Field(..., description="Prediction source (ML/AI)")
+    enhancementJobId: Optional[str] = Field(None, description="Deferred AI enhancement job id")
+    enhancementStatus: Optional[str] = Field(None, description="Deferred AI enhancement status")
+    corrections: Optional[List[SymptomCorrection]] = Field(
+        None, description="Symptoms matched as lay terms or after spelling correction"
+    )
+
+class EnhancementJobResponse(BaseModel):
+    """Status of a deferred AI enhancement job"""
+    jobId: str
+    status: str = Field(..., description="pending, running, completed or failed")
+    result: Optional[PredictionResponse] = Field(None, description="Enhanced prediction once completed")
+
+class BatchSymptomItem(BaseModel):
+    """A single symptom set within a batch request"""
+    id: Optional[str] = Field(None, description="Client reference echoed back in the result")
+    symptoms: Union[str, List[str]] = Field(
+        ...,
+        description="Comma-separated string or list of symptoms",
+        example=["fever", "headache", "body ache"]
+    )
+    
+    @validator('symptoms')
+    def split_symptoms(cls, v):
+        if isinstance(v, str):
+            v = v.split(',')
+        symptoms = [s.strip() for s in v if s and s.strip()]
+        if len(", ".join(symptoms)) > MAX_SYMPTOMS_LENGTH:
+            raise ValueError(f'Symptoms must be at most {MAX_SYMPTOMS_LENGTH} characters')
+        return symptoms
+
+class BatchPredictionRequest(BaseModel):
+    """Request model for batch prediction"""
+    items: List[BatchSymptomItem] = Field(..., min_length=1, description="Symptom sets to score")
+    enhance: bool = Field(False, description="Enhance each prediction with AI (slower)")
+    top_k: Optional[int] = Field(
+        None, ge=1, le=10, description="Number of candidate diseases in each differential"
+    )
+
+class BatchPredictionResult(BaseModel):
+    """Per-item result of a batch prediction"""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = Field(None, description="Client reference from the request")
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = Field(None, description="Why this item could not be predicted")
+
+class BatchPredictionResponse(BaseModel):
+    """Response model for batch prediction"""
+    results: List[BatchPredictionResult]
+    total: int
+    succeeded: int
+    failed: int
 
 class HealthResponse(BaseModel):
     """Health check response"""
@@ -67,6 +145,19 @@ class DiseaseInfo(BaseModel):
     symptoms: List[str]
     severity: SeverityLevel
 
+class SymptomSuggestion(BaseModel):
+    """Autocomplete suggestion"""
+    key: str
+    name: str
+    category: str
+    matched: Optional[str] = Field(None, description="Lay term that matched, when the match was a synonym")
+
+class SymptomSuggestionsResponse(BaseModel):
+    """Response for symptom autocomplete"""
+    query: str
+    suggestions: List[SymptomSuggestion]
+    total: int
+
 class SymptomsListResponse(BaseModel):
     """Response for symptoms list"""
     symptoms: List[SymptomInfo]
@@ -0,0 +1,140 @@
+"""In-process TTL + LRU cache"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import time
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'fresh_until', 'expires_at')
+
+    def __init__(self, value: Any, size: int, fresh_until: float, expires_at: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class TTLCache:
+    """LRU cache bounded by entry count and total size, with optional TTL
+
+    Entries are fresh for ``ttl`` seconds and may then be served as stale
+    for ``stale_ttl`` more seconds (stale-while-revalidate), after which
+    they expire. ``ttl=None`` keeps entries until they are evicted. Sizes
+    are supplied by the caller (e.g. encoded byte length); ``max_bytes``
+    of None disables the size bound.
+
+    Not thread-safe: intended for use from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.lookup(key, record=False)[1] is not None
+
+    def lookup(self, key: Hashable, record: bool = True) -> Tuple[Any, Optional[str]]:
+        """Return ``(value, FRESH | STALE)`` or ``(None, None)`` on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            if record:
+                self.misses += 1
+            return None, None
+
+        now = time.monotonic()
+        if now >= entry.expires_at:
+            self._remove(key)
+            self.expirations += 1
+            if record:
+                self.misses += 1
+            return None, None
+
+        self._entries.move_to_end(key)
+        if now < entry.fresh_until:
+            if record:
+                self.hits += 1
+            return entry.value, FRESH
+
+        if record:
+            self.stale_hits += 1
+        return entry.value, STALE
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh value, or ``default``"""
+        value, state = self.lookup(key)
+        return value if state == FRESH else default
+
+    def set(self, key: Hashable, value: Any, size: int = 1, ttl: Optional[float] = None):
+        """Insert or replace an entry, evicting least recently used entries"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        fresh_until = now + ttl if ttl is not None else float('inf')
+        expires_at = fresh_until + self.stale_ttl
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, size, fresh_until, expires_at)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Remove an entry if present"""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current usage"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,185 @@
+"""Persistent SQLite cache store shared by worker processes"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    fresh_until REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed_at);
+"""
+
+# Only bump accessed_at when it is older than this, to keep reads mostly read-only
+_TOUCH_INTERVAL = 60.0
+
+
+class SQLiteCacheStore:
+    """Key/value store in a SQLite file (WAL mode) with TTL and size cap
+
+    Values are JSON-serializable objects stored zlib-compressed. Several
+    uvicorn workers on the same host can share one file: WAL mode allows
+    concurrent readers with a single writer, and ``busy_timeout`` makes
+    writers wait instead of failing. Expired rows are purged, and the
+    least recently accessed rows dropped once the stored values exceed
+    ``max_bytes``, by a compaction that runs at most every
+    ``compact_interval`` seconds.
+
+    Methods are blocking; call them from a worker thread.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, compact_interval: float = 300.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._last_compact = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cache store is closed")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def make_key(key: Hashable) -> str:
+        """Stable string key for a cache key tuple"""
+        encoded = json.dumps(key, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, int, float]]:
+        """Return ``(value, size, fresh_until)`` or None if missing/expired
+
+        ``fresh_until`` is a wall-clock timestamp; entries past it are stale
+        but still usable until they expire.
+        """
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, size, fresh_until, accessed_at FROM cache_entries "
+            "WHERE key = ? AND expires_at > ?",
+            (self.make_key(key), now)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        blob, size, fresh_until, accessed_at = row
+        if now - accessed_at > _TOUCH_INTERVAL:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?",
+                (now, self.make_key(key))
+            )
+        self.hits += 1
+        return json.loads(zlib.decompress(blob)), size, fresh_until
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float, stale_ttl: float = 0.0):
+        """Store a value that is fresh for ``ttl`` and usable for ``ttl + stale_ttl``"""
+        now = time.time()
+        blob = zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(key, value, size, created_at, fresh_until, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.make_key(key), blob, size, now, now + ttl, now + ttl + stale_ttl, now)
+        )
+        self.writes += 1
+
+        if now - self._last_compact > self.compact_interval:
+            self.compact()
+
+    def compact(self):
+        """Purge expired rows and trim to ``max_bytes`` by least recent access"""
+        self._last_compact = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (self._last_compact,))
+
+        stored = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache_entries").fetchone()[0]
+        if stored > self.max_bytes:
+            # Trim to 90% of the cap so compaction does not run on every write
+            excess = stored - int(self.max_bytes * 0.9)
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(LENGTH(value)) OVER (ORDER BY accessed_at, key) - LENGTH(value) AS freed"
+                "    FROM cache_entries"
+                "  ) WHERE freed < ?"
+                ")",
+                (excess,)
+            )
+
+        self.compactions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and file size"""
+        try:
+            file_bytes = os.path.getsize(self.path)
+        except OSError:
+            file_bytes = 0
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "file_bytes": file_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "compactions": self.compactions,
+        }
+
+    def close(self):
+        """Checkpoint the WAL and close the connections of every thread
+
+        Call once at shutdown, after the last read or write; the store
+        cannot be used afterwards.
+        """
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for index, conn in enumerate(connections):
+            try:
+                if index == 0:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to close cache store connection: {e}")
@@ -0,0 +1,96 @@
+"""Precomputed catalogs for the symptom and disease listing endpoints"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models.schemas import DiseaseInfo, SeverityLevel, SymptomInfo
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize like FastAPI's JSONResponse"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class Catalog:
+    """Read-only listing with a group index and pre-serialized bodies
+
+    ``items`` are response-ready dicts (already sorted). They are grouped
+    by ``group_field`` (case-insensitively), and the bodies of the
+    unfiltered listing and of every group are rendered once. Only requests
+    with a ``search`` term are serialized per request.
+    """
+
+    __slots__ = ('list_field', 'items', 'groups', '_by_group', '_bodies', '_groups_body')
+
+    def __init__(self, list_field: str, items: Iterable[Dict[str, Any]], group_field: str):
+        self.list_field = list_field
+        self.items: Tuple[Dict[str, Any], ...] = tuple(items)
+
+        by_group: Dict[str, List[Dict[str, Any]]] = {}
+        for item in self.items:
+            by_group.setdefault(item[group_field].lower(), []).append(item)
+        self._by_group = {group: tuple(members) for group, members in by_group.items()}
+        self.groups: List[str] = sorted({item[group_field] for item in self.items})
+
+        self._bodies: Dict[Optional[str], bytes] = {None: self.render(self.items)}
+        for group, members in self._by_group.items():
+            self._bodies[group] = self.render(members)
+        self._groups_body = render_json({"categories": self.groups, "total": len(self.groups)})
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def filter(self, group: Optional[str] = None, search: Optional[str] = None) -> Sequence[Dict[str, Any]]:
+        """Items in ``group`` whose name contains ``search`` (both optional)"""
+        items = self._by_group.get(group.lower(), ()) if group else self.items
+        if search:
+            search = search.lower()
+            items = [item for item in items if search in item['name'].lower()]
+        return items
+
+    def render(self, items: Sequence[Dict[str, Any]]) -> bytes:
+        return render_json({self.list_field: list(items), "total": len(items)})
+
+    def body(self, group: Optional[str] = None, search: Optional[str] = None) -> bytes:
+        """Serialized listing response, precomputed unless ``search`` is given"""
+        if not search:
+            cached = self._bodies.get(group.lower() if group else None)
+            return cached if cached is not None else self.render(())
+        return self.render(self.filter(group, search))
+
+    def groups_body(self) -> bytes:
+        """Serialized ``{"categories": [...], "total": n}`` response"""
+        return self._groups_body
+
+
+def build_symptom_catalog(symptoms: Iterable[Dict[str, Any]]) -> Catalog:
+    """Catalog of ``GET /symptoms`` items grouped by category"""
+    items = (
+        SymptomInfo(
+            name=s['name'],
+            description=f"Medical symptom: {s['name']}",
+            category=s['category']
+        ).model_dump(mode="json")
+        for s in symptoms
+    )
+    return Catalog("symptoms", items, group_field="category")
+
+
+def build_disease_catalog(diseases: Iterable[Dict[str, Any]]) -> Catalog:
+    """Catalog of ``GET /diseases`` items grouped by severity"""
+    items = (
+        DiseaseInfo(
+            name=d['name'],
+            description=f"Medical condition: {d['name']}",
+            symptoms=[],  # Could be populated from datasets
+            severity=SeverityLevel(d['severity'])
+        ).model_dump(mode="json")
+        for d in diseases
+    )
+    return Catalog("diseases", items, group_field="severity")
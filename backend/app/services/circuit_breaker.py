@@ -0,0 +1,194 @@
+"""Circuit breaker for an upstream dependency
+
+The breaker is ``closed`` while the upstream is healthy. When at least
+``failure_rate`` of the calls in the last ``window`` seconds failed (and
+there were at least ``min_calls``), it opens: calls are rejected at once
+with ``CircuitOpenError`` instead of waiting for the upstream to time out.
+After ``open_seconds`` it is ``half_open`` and lets ``half_open_probes``
+concurrent calls through; that many successes close it again, a failure
+re-opens it.
+
+Used as ``with breaker.call() as call:`` around the upstream request; an
+exception in the block counts as a failure, ``call.record(success)``
+classifies a response explicitly, and a cancelled call (or a generator
+closed before the block ended) counts as neither.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Outcomes are counted in this many buckets per window
+_WINDOW_BUCKETS = 10
+
+
+class CircuitOpenError(Exception):
+    """The call was rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker (see module docstring)"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 2,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.enabled = enabled
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        # [bucket start, successes, failures], oldest first
+        self._buckets: deque = deque()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        # Bumped on every transition; outcomes of calls started before it are ignored
+        self.generation = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        logger.warning(f"Circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
+        self.generation += 1
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+        self._buckets.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def _counts(self, now: float):
+        """Successes and failures in the window, dropping expired buckets"""
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+        successes = sum(bucket[1] for bucket in self._buckets)
+        failures = sum(bucket[2] for bucket in self._buckets)
+        return successes, failures
+
+    def _add(self, now: float, success: bool):
+        if not self._buckets or now - self._buckets[-1][0] >= self.window / _WINDOW_BUCKETS:
+            self._buckets.append([now, 0, 0])
+        self._buckets[-1][1 if success else 2] += 1
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now (reserves a probe when half open)"""
+        if not self.enabled:
+            return True
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, success: bool, probe: bool = False, generation: Optional[int] = None):
+        """Outcome of an allowed call
+
+        ``probe``: it was let through half open; ``generation``: the
+        breaker's ``generation`` when the call started.
+        """
+        if not self.enabled or (generation is not None and generation != self.generation):
+            return
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success:
+                self._transition(OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._transition(CLOSED)
+            return
+
+        if self._state != CLOSED:
+            return
+        now = time.monotonic()
+        self._add(now, success)
+        if not success:
+            successes, failures = self._counts(now)
+            calls = successes + failures
+            if calls >= self.min_calls and failures >= self.failure_rate * calls:
+                self._transition(OPEN)
+
+    def release(self, probe: bool, generation: Optional[int] = None):
+        """An allowed call ended without an outcome (e.g. it was cancelled)"""
+        if probe and (generation is None or generation == self.generation):
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def call(self) -> "_BreakerCall":
+        """Context manager guarding one upstream call; raises ``CircuitOpenError`` if rejected"""
+        return _BreakerCall(self)
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        successes, failures = self._counts(time.monotonic())
+        calls = successes + failures
+        return {
+            "enabled": self.enabled,
+            "state": state,
+            "window_calls": calls,
+            "window_failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "retry_in_seconds": (
+                round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == OPEN else None
+            ),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class _BreakerCall:
+    __slots__ = ('breaker', 'probe', 'generation', 'outcome')
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.outcome: Optional[bool] = None
+
+    def __enter__(self) -> "_BreakerCall":
+        breaker = self.breaker
+        self.probe = breaker.enabled and breaker.state == HALF_OPEN
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker {breaker.name} is open")
+        self.generation = breaker.generation
+        return self
+
+    def record(self, success: bool):
+        """Classify the call explicitly (e.g. by response status)"""
+        self.outcome = success
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            self.breaker.release(self.probe, self.generation)
+        elif self.outcome is not None:
+            self.breaker.record(self.outcome, self.probe, self.generation)
+        else:
+            self.breaker.record(exc_type is None, self.probe, self.generation)
@@ -0,0 +1,157 @@
+"""Precomputed disease information index"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import math
+
+DEFAULT_DESCRIPTION = "No description available"
+DEFAULT_DIET = "Balanced diet recommended"
+DEFAULT_WORKOUT = ("Light exercise recommended",)
+
+PRECAUTION_COLUMNS = ('Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4')
+
+
+def normalize_disease_name(name: str) -> str:
+    """Normalize a disease name for lookups (case and whitespace insensitive)"""
+    return " ".join(str(name).split()).casefold()
+
+
+def _is_present(value: Any) -> bool:
+    """Mirror pandas.notna for the scalar values found in the datasets"""
+    if value is None:
+        return False
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    return True
+
+
+@dataclass(frozen=True, slots=True)
+class DiseaseRecord:
+    """Immutable per-disease information compiled from the datasets.
+
+    Fields are None when the backing dataset was not loaded, so that
+    ``to_info`` only reports the sections that are actually available.
+    """
+    name: str
+    description: Optional[str] = None
+    precautions: Optional[Tuple[str, ...]] = None
+    medications: Optional[Tuple[str, ...]] = None
+    diet: Optional[str] = None
+    workout: Optional[Tuple[str, ...]] = None
+
+    def to_info(self) -> Dict[str, Any]:
+        """Return the disease info dict served by the API"""
+        info: Dict[str, Any] = {}
+        if self.description is not None:
+            info['description'] = self.description
+        if self.precautions is not None:
+            info['precautions'] = list(self.precautions)
+        if self.medications is not None:
+            info['medications'] = list(self.medications)
+        if self.diet is not None:
+            info['diet'] = self.diet
+        if self.workout is not None:
+            info['workout'] = list(self.workout)
+        return info
+
+
+class DiseaseIndex:
+    """Read-only ``normalized disease name -> DiseaseRecord`` mapping"""
+
+    __slots__ = ('_records', '_default')
+
+    def __init__(self, records: Dict[str, DiseaseRecord], default: DiseaseRecord):
+        self._records = records
+        self._default = default
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, disease: str) -> bool:
+        return normalize_disease_name(disease) in self._records
+
+    def get(self, disease: str) -> DiseaseRecord:
+        """Look up a disease, returning the dataset defaults when unknown"""
+        return self._records.get(normalize_disease_name(disease), self._default)
+
+    @classmethod
+    def build(cls, datasets: Mapping[str, Any], diseases: Iterable[str] = ()) -> "DiseaseIndex":
+        """Compile the loaded datasets into an index.
+
+        ``datasets`` maps dataset keys (``description``, ``precautions``,
+        ``medications``, ``diets``, ``workout``) to tables exposing
+        ``to_dict('records')`` (pandas DataFrames) or to plain lists of row
+        dicts. ``diseases`` are the model labels, so that every predictable
+        disease gets a record even if it is missing from some dataset.
+        """
+        tables = {key: _rows(table) for key, table in datasets.items()}
+
+        names: Dict[str, str] = {}
+        for disease in diseases:
+            names.setdefault(normalize_disease_name(disease), " ".join(disease.split()))
+
+        def register(raw: Any) -> str:
+            key = normalize_disease_name(raw)
+            names.setdefault(key, " ".join(str(raw).split()))
+            return key
+
+        descriptions: Dict[str, str] = {}
+        for row in tables.get('description', ()):
+            key = register(row.get('Disease', ''))
+            if key not in descriptions and _is_present(row.get('Description')):
+                descriptions[key] = row['Description']
+
+        precautions: Dict[str, Tuple[str, ...]] = {}
+        for row in tables.get('precautions', ()):
+            key = register(row.get('Disease', ''))
+            if key not in precautions:
+                precautions[key] = tuple(
+                    row[col] for col in PRECAUTION_COLUMNS
+                    if col in row and _is_present(row[col])
+                )
+
+        medications: Dict[str, List[str]] = {}
+        for row in tables.get('medications', ()):
+            key = register(row.get('Disease', ''))
+            medications.setdefault(key, []).append(row.get('Medication'))
+
+        diets: Dict[str, str] = {}
+        for row in tables.get('diets', ()):
+            key = register(row.get('Disease', ''))
+            if key not in diets:
+                diets[key] = row.get('Diet')
+
+        workouts: Dict[str, List[str]] = {}
+        for row in tables.get('workout', ()):
+            key = register(row.get('disease', ''))
+            workouts.setdefault(key, []).append(row.get('workout'))
+
+        has = {dataset: dataset in tables for dataset in ('description', 'precautions', 'medications', 'diets', 'workout')}
+
+        records = {}
+        for key, name in names.items():
+            records[key] = DiseaseRecord(
+                name=name,
+                description=descriptions.get(key, DEFAULT_DESCRIPTION) if has['description'] else None,
+                # Precautions are only reported for diseases present in the dataset
+                precautions=precautions.get(key) if has['precautions'] else None,
+                medications=tuple(medications.get(key, ())) if has['medications'] else None,
+                diet=diets.get(key, DEFAULT_DIET) if has['diets'] else None,
+                workout=tuple(workouts.get(key, DEFAULT_WORKOUT)) if has['workout'] else None,
+            )
+
+        default = DiseaseRecord(
+            name="",
+            description=DEFAULT_DESCRIPTION if has['description'] else None,
+            medications=() if has['medications'] else None,
+            diet=DEFAULT_DIET if has['diets'] else None,
+            workout=DEFAULT_WORKOUT if has['workout'] else None,
+        )
+        return cls(records, default)
+
+
+def _rows(table: Any) -> List[Dict[str, Any]]:
+    """Convert a dataset table into a list of row dicts"""
+    if hasattr(table, 'to_dict'):
+        return table.to_dict('records')
+    return list(table)
@@ -0,0 +1,322 @@
+"""Deferred AI enhancement jobs"""
+
+import asyncio
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.gemini_service import GeminiService
+from app.services.job_store import SQLiteJobStore
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when no more enhancement jobs can be accepted"""
+
+
+class EnhancementJob:
+    """A queued ``GeminiService.enhance_prediction`` call"""
+
+    __slots__ = (
+        'id', 'disease', 'symptoms', 'basic_info', 'confidence', 'differential',
+        'corrections', 'status', 'result', 'ai_enhanced', 'created_at', 'finished_at', 'done'
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        disease: str,
+        symptoms: str,
+        basic_info: Dict,
+        confidence: float,
+        differential: Sequence[Tuple[str, float]] = (),
+        corrections: Sequence[Tuple[str, str, bool]] = ()
+    ):
+        self.id = job_id
+        self.disease = disease
+        self.symptoms = symptoms
+        self.basic_info = basic_info
+        self.confidence = confidence
+        # Kept so the enhanced result matches the immediate response
+        self.differential = differential
+        self.corrections = corrections
+        self.status = PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        # Whether ``result`` is the AI answer rather than the fallback
+        self.ai_enhanced = False
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def record(self) -> Dict[str, Any]:
+        """Fields a poll answered by another worker needs"""
+        return {
+            "disease": self.disease,
+            "confidence": self.confidence,
+            "differential": self.differential,
+            "corrections": self.corrections,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "EnhancementJob":
+        """A job read back from the shared store (run by another worker)"""
+        job = cls(
+            record["id"], record["disease"], "", {}, record["confidence"],
+            record["differential"], record["corrections"]
+        )
+        job.status = record["status"]
+        job.result = record["result"]
+        job.ai_enhanced = record["ai_enhanced"]
+        return job
+
+
+class EnhancementJobManager:
+    """Runs enhancement jobs on a bounded pool of background workers
+
+    At most ``max_jobs`` jobs are kept (queued, running or finished) and
+    each expires ``job_ttl`` seconds after submission. When the store is
+    full the oldest finished job is dropped to make room; if every slot
+    holds an unfinished job, ``submit`` raises ``JobQueueFull``.
+
+    With several worker ``processes``, pass a ``store`` shared by all of
+    them: jobs still run in the process that accepted them, but their
+    status and results are written to the store, and ``get``/``wait`` read
+    jobs of other processes from it (polling every ``poll_interval``
+    seconds). Without one, a poll could reach a process that does not know
+    the job, so the manager is not ``available``.
+    """
+
+    def __init__(
+        self,
+        gemini_service: GeminiService,
+        workers: int = 4,
+        max_jobs: int = 1000,
+        job_ttl: float = 600.0,
+        store: Optional[SQLiteJobStore] = None,
+        processes: int = 1,
+        poll_interval: float = 0.25
+    ):
+        self.gemini_service = gemini_service
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self.store = store
+        self.processes = max(1, processes)
+        self.poll_interval = poll_interval
+        self._jobs: "OrderedDict[str, EnhancementJob]" = OrderedDict()
+        self._queue: "asyncio.Queue[EnhancementJob]" = asyncio.Queue(maxsize=max_jobs)
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether a job's id can be polled from every worker process"""
+        return self.processes == 1 or self.store is not None
+
+    async def start(self):
+        """Start the background workers"""
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"enhancement-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Enhancement job workers started ({self.workers} workers)")
+
+    async def stop(self):
+        """Stop the workers and drop all jobs
+
+        Jobs that will not run any more are marked failed in the store.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self.store is not None:
+            unfinished = [job.id for job in self._jobs.values() if not job.finished]
+            try:
+                if unfinished:
+                    await asyncio.to_thread(self.store.fail, unfinished, FAILED)
+                await asyncio.to_thread(self.store.close)
+            except Exception as e:
+                logger.warning(f"Failed to close enhancement job store: {e}")
+        self._jobs.clear()
+
+    async def submit(
+        self,
+        disease: str,
+        symptoms: str,
+        basic_info: Dict,
+        confidence: float,
+        differential: Sequence[Tuple[str, float]] = (),
+        corrections: Sequence[Tuple[str, str, bool]] = ()
+    ) -> EnhancementJob:
+        """Queue an enhancement job"""
+        self._purge_expired()
+
+        evicted = None
+        if len(self._jobs) >= self.max_jobs:
+            evicted = self._evict_finished()
+            if evicted is None:
+                self.rejected += 1
+                raise JobQueueFull("Too many pending enhancement jobs")
+
+        job = EnhancementJob(
+            secrets.token_urlsafe(16), disease, symptoms, basic_info, confidence, differential, corrections
+        )
+
+        if self.store is not None:
+            if evicted is not None:
+                await self._store_call(self.store.delete, evicted)
+            # Recorded before the id is returned, so any worker can answer the first poll
+            try:
+                await asyncio.to_thread(
+                    self.store.put, job.id, job.status, job.record(), time.time() + self.job_ttl
+                )
+            except Exception as e:
+                logger.error(f"Failed to record enhancement job: {e}")
+                self.rejected += 1
+                raise JobQueueFull("Enhancement job store unavailable")
+
+        try:
+            # Expired jobs may still sit in the queue until a worker skips them
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            if self.store is not None:
+                await self._store_call(self.store.delete, job.id)
+            raise JobQueueFull("Too many pending enhancement jobs")
+        self._jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[EnhancementJob]:
+        """Look up a job that has not expired, in this process or the store"""
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is not None or self.store is None:
+            return job
+        return await self._load(job_id)
+
+    async def wait(self, job: EnhancementJob, timeout: float) -> EnhancementJob:
+        """Wait up to ``timeout`` seconds for a job to finish (long-poll)"""
+        if job.finished or timeout <= 0:
+            return job
+
+        if self._jobs.get(job.id) is job:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return job
+
+        # Run by another worker process: poll the store
+        deadline = time.monotonic() + timeout
+        while not job.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(self.poll_interval, remaining))
+            job = await self._load(job.id) or job
+        return job
+
+    async def _load(self, job_id: str) -> Optional[EnhancementJob]:
+        try:
+            record = await asyncio.to_thread(self.store.get, job_id)
+        except Exception as e:
+            logger.warning(f"Enhancement job lookup failed: {e}")
+            return None
+        return None if record is None else EnhancementJob.from_record(record)
+
+    async def _store_call(self, method: Callable[..., None], *args):
+        """Write to the shared store without failing the job"""
+        try:
+            await asyncio.to_thread(method, *args)
+        except Exception as e:
+            logger.warning(f"Failed to update enhancement job store: {e}")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.id not in self._jobs:
+                    # Expired while queued
+                    continue
+
+                job.status = RUNNING
+                if self.store is not None:
+                    await self._store_call(self.store.update, job.id, RUNNING)
+                job.result, job.ai_enhanced = await self.gemini_service.enhance_prediction(
+                    job.disease, job.symptoms, job.basic_info
+                )
+                job.status = COMPLETED
+                self.completed += 1
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Enhancement job {job.id} failed: {e}")
+                job.status = FAILED
+                self.failed += 1
+            finally:
+                if job.status == RUNNING:
+                    # Cancelled while running
+                    job.status = FAILED
+                if job.finished and self.store is not None:
+                    await asyncio.shield(
+                        self._store_call(self.store.update, job.id, job.status, job.result, job.ai_enhanced)
+                    )
+                job.finished_at = time.monotonic()
+                job.done.set()
+                self._queue.task_done()
+
+    def _purge_expired(self):
+        """Drop jobs older than the TTL (jobs are ordered by creation time)"""
+        cutoff = time.monotonic() - self.job_ttl
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.created_at > cutoff:
+                break
+            del self._jobs[job.id]
+            self.expired += 1
+
+    def _evict_finished(self) -> Optional[str]:
+        """Drop the oldest finished job to make room and return its id"""
+        for job_id, job in self._jobs.items():
+            if job.finished:
+                del self._jobs[job_id]
+                self.expired += 1
+                return job_id
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Job store usage and counters"""
+        return {
+            "workers": self.workers,
+            "available": self.available,
+            "shared_store": self.store is not None,
+            "jobs": len(self._jobs),
+            "max_jobs": self.max_jobs,
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
@@ -0,0 +1,103 @@
+"""Typo-tolerant term lookup (SymSpell-style deletion index)"""
+
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to ``max_distance`` characters"""
+    variants = {term}
+    for distance in range(1, min(max_distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), distance):
+            skip = set(positions)
+            variants.add("".join(char for i, char in enumerate(term) if i not in skip))
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count as one edit)
+
+    Returns ``max_distance + 1`` as soon as the distance is known to exceed
+    ``max_distance``.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """Finds the closest known term within a bounded edit distance
+
+    Every term is indexed under all of its deletions up to
+    ``max_distance``; a query generates its own deletions and only the
+    terms sharing one of them are compared exactly. The allowed distance
+    grows with the query length so that short words are not "corrected"
+    into unrelated ones: none for 4 characters or fewer, 1 up to 11, then
+    ``max_distance``. Queries longer than any term can match are rejected
+    before generating deletions, whose number grows with the cube of the
+    query length.
+    """
+
+    def __init__(self, terms: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        self._terms: Set[str] = set(terms)
+        self._longest = max(map(len, self._terms), default=0)
+        self._index: Dict[str, Set[str]] = {}
+        for term in self._terms:
+            for variant in _deletes(term, max_distance):
+                self._index.setdefault(variant, set()).add(term)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def allowed_distance(self, length: int) -> int:
+        if length <= 4:
+            return 0
+        if length < 12:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def match(self, query: str) -> Optional[Tuple[str, int, bool]]:
+        """Closest term, its distance and whether it is the only term that close
+
+        Returns None when nothing is close enough. Ties are broken by length
+        difference and then alphabetically, so the result is deterministic.
+        """
+        if query in self._terms:
+            return query, 0, True
+        max_distance = self.allowed_distance(len(query))
+        if max_distance == 0 or len(query) > self._longest + max_distance:
+            return None
+
+        candidates: Set[str] = set()
+        for variant in _deletes(query, max_distance):
+            candidates.update(self._index.get(variant, ()))
+
+        best: Optional[Tuple[int, int, str]] = None
+        unique = True
+        for term in candidates:
+            distance = edit_distance(query, term, max_distance)
+            if distance <= max_distance:
+                rank = (distance, abs(len(term) - len(query)), term)
+                if best is not None and distance == best[0]:
+                    unique = False
+                elif best is None or distance < best[0]:
+                    unique = True
+                if best is None or rank < best:
+                    best = rank
+        return (best[2], best[0], unique) if best else None
@@ -2,23 +2,117 @@
 
 import logging
 import asyncio
-import httpx
-from typing import Dict, Any, Optional
+import importlib.util
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple, AsyncIterator
 import json
 import time
 
+from app.core.config import get_settings
+from app.core.metrics import (
+    GEMINI_FALLBACKS,
+    GEMINI_POOL_CONNECTIONS,
+    GEMINI_POOL_MAX_CONNECTIONS,
+    GEMINI_POOL_QUEUED,
+    UPSTREAM_CIRCUIT_STATE,
+)
+from app.core.tracing import record_stage, stage
+from app.services.cache import TTLCache, FRESH, STALE
+from app.services.cache_store import SQLiteCacheStore
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, CircuitOpenError
+from app.services.disease_index import normalize_disease_name
+from app.services.http_resilience import HedgePolicy, ResilientSender, RetryPolicy
+from app.services.json_stream import JSONObjectStreamParser
+from app.services.singleflight import SingleFlight
+from app.services.symptom_vectorizer import normalize_symptom
+
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
+# Bump when the prompt or response handling changes so cached answers are not reused
+PROMPT_VERSION = "1"
+
+class ConnectTimer:
+    """httpx ``trace`` extension timing new connections (TCP connect and TLS)
+
+    ``elapsed`` stays 0 when the request reused a pooled connection.
+    """
+
+    __slots__ = ('started', 'elapsed')
+
+    def __init__(self):
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    async def __call__(self, event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.started":
+            self.started = time.perf_counter()
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self.elapsed = time.perf_counter() - self.started
+
+    def observe(self, started: float):
+        """Record connect time and the rest of the time since ``started`` as waiting"""
+        connected = started
+        if self.elapsed:
+            connected = self.started + self.elapsed
+            record_stage("gemini_connect", self.started, connected)
+        record_stage("gemini_wait", connected)
+
 class GeminiService:
     """Google Gemini AI service for enhanced medical predictions"""
     
     def __init__(self, api_key: str):
+        settings = get_settings()
+        self.settings = settings
+        
         self.api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
-        self.model = "gemini-2.0-flash-exp"
-        self.client: Optional[httpx.AsyncClient] = None
+        self.base_url = settings.GEMINI_BASE_URL.rstrip("/")
+        self.model = settings.GEMINI_MODEL
+        self.client: Optional["httpx.AsyncClient"] = None
         self.is_initialized = False
         
+        self.store: Optional[SQLiteCacheStore] = None
+        self.cache = TTLCache(
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            max_bytes=settings.CACHE_MAX_BYTES,
+            ttl=settings.CACHE_TTL,
+            stale_ttl=settings.CACHE_STALE_TTL
+        )
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+        self.inflight = SingleFlight()
+        
+        # Retries and hedging for API calls
+        hedge = None
+        if settings.GEMINI_HEDGE_ENABLED:
+            hedge = HedgePolicy(
+                percentile=settings.GEMINI_HEDGE_PERCENTILE,
+                min_delay=settings.GEMINI_HEDGE_MIN_DELAY,
+                max_delay=settings.GEMINI_HEDGE_MAX_DELAY,
+                max_ratio=settings.GEMINI_HEDGE_MAX_RATIO
+            )
+        self.sender = ResilientSender(
+            "gemini",
+            RetryPolicy(
+                max_retries=settings.GEMINI_MAX_RETRIES,
+                backoff=settings.GEMINI_RETRY_BACKOFF,
+                backoff_max=settings.GEMINI_RETRY_BACKOFF_MAX,
+                statuses=settings.GEMINI_RETRY_STATUSES
+            ),
+            hedge=hedge,
+            deadline=settings.GEMINI_DEADLINE
+        )
+        # Fail fast (with the fallback answer) while the API keeps failing
+        self.breaker = CircuitBreaker(
+            "gemini",
+            failure_rate=settings.GEMINI_BREAKER_FAILURE_RATE,
+            min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+            window=settings.GEMINI_BREAKER_WINDOW,
+            open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.GEMINI_BREAKER_HALF_OPEN_PROBES,
+            enabled=settings.GEMINI_BREAKER_ENABLED
+        )
+        
     async def initialize(self):
         """Initialize Gemini service"""
         try:
@@ -28,22 +122,82 @@ class GeminiService:
                 logger.warning("No Gemini API key provided, service will be disabled")
                 return
             
-            # Initialize HTTP client
-            self.client = httpx.AsyncClient(
-                timeout=30.0,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-            )
+            # Open persistent cache shared by all workers on this host
+            if self.settings.CACHE_BACKEND == "sqlite":
+                try:
+                    self.store = await asyncio.to_thread(
+                        SQLiteCacheStore,
+                        self.settings.CACHE_DB_PATH,
+                        self.settings.CACHE_DB_MAX_BYTES
+                    )
+                    logger.info(f"Persistent enhancement cache: {self.settings.CACHE_DB_PATH}")
+                except Exception as e:
+                    logger.error(f"Failed to open persistent cache, using memory only: {e}")
+                    self.store = None
+            
+            # Initialize HTTP client (httpx is only imported when the API is used)
+            self.client = self._create_client()
             
             # Test API connection
             await self._test_connection()
             
             self.is_initialized = True
+            self._register_pool_metrics()
             logger.info("Gemini Service initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize Gemini Service: {e}")
             self.is_initialized = False
     
+    def _create_client(self) -> "httpx.AsyncClient":
+        """HTTP client with the pool, timeouts and protocol from settings"""
+        import httpx
+        settings = self.settings
+        
+        http2 = settings.GEMINI_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("GEMINI_HTTP2 needs the h2 package (pip install 'httpx[http2]'), using HTTP/1.1")
+            http2 = False
+        
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(
+                connect=settings.GEMINI_CONNECT_TIMEOUT,
+                read=settings.GEMINI_READ_TIMEOUT,
+                write=settings.GEMINI_WRITE_TIMEOUT,
+                pool=settings.GEMINI_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.GEMINI_KEEPALIVE_EXPIRY
+            )
+        )
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Connection pool utilization of ``client`` (empty if unavailable)"""
+        pool = getattr(getattr(self.client, '_transport', None), '_pool', None)
+        if pool is None:
+            return {}
+        connections = pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "active": len(connections) - idle,
+            "idle": idle,
+            "max_connections": pool._max_connections,
+            "queued": sum(1 for request in pool._requests if request.is_queued()),
+        }
+    
+    def _register_pool_metrics(self):
+        """Expose ``pool_stats`` through the pool gauges, read at scrape time"""
+        GEMINI_POOL_CONNECTIONS.set_function(
+            lambda: {(state,): count for state, count in self.pool_stats().items() if state in ("active", "idle")}
+        )
+        GEMINI_POOL_MAX_CONNECTIONS.set_function(lambda: self.pool_stats().get("max_connections", 0))
+        GEMINI_POOL_QUEUED.set_function(lambda: self.pool_stats().get("queued", 0))
+        states = {CLOSED: 0, HALF_OPEN: 1}
+        UPSTREAM_CIRCUIT_STATE.set_function(lambda: {(self.breaker.name,): states.get(self.breaker.state, 2)})
+    
     async def _test_connection(self):
         """Test Gemini API connection"""
         try:
@@ -60,10 +214,9 @@ class GeminiService:
                 }
             }
             
-            response = await self.client.post(
-                f"{url}?key={self.api_key}",
-                headers=headers,
-                json=payload
+            response = await self.sender.send(
+                lambda: self.client.post(f"{url}?key={self.api_key}", headers=headers, json=payload),
+                hedge=False
             )
             
             if response.status_code != 200:
@@ -75,27 +228,159 @@ class GeminiService:
             logger.error(f"Gemini API connection test failed: {e}")
             raise
     
-    async def enhance_prediction(self, disease: str, symptoms: str, basic_info: Dict) -> Dict[str, Any]:
-        """Enhance basic ML prediction with AI-generated content"""
+    async def enhance_prediction(self, disease: str, symptoms: str, basic_info: Dict) -> Tuple[Dict[str, Any], bool]:
+        """Enhance basic ML prediction with AI-generated content
+        
+        Returns the content and whether it is the AI answer (False when the
+        fallback built from ``basic_info`` was used).
+        """
         if not self.is_initialized or not self.client:
-            logger.warning("Gemini service not available, returning basic info")
-            return self._create_fallback_response(disease, basic_info)
+            logger.debug("Gemini service not available, returning basic info")
+            return self._create_fallback_response(disease, basic_info, reason="unavailable"), False
         
         try:
-            # Create enhanced prompt
-            prompt = self._create_medical_prompt(disease, symptoms, basic_info)
+            # Generate (or reuse) AI response
+            with stage("gemini_enhance"):
+                parsed_response = await self._get_ai_content(disease, symptoms, basic_info)
             
-            # Generate AI response
-            ai_response = await self._generate_content(prompt)
-            
-            # Parse and structure response
-            enhanced_info = self._parse_ai_response(ai_response, basic_info)
-            
-            return enhanced_info
+            # Structure response
+            return self.build_enhanced_info(parsed_response, basic_info), True
             
+        except CircuitOpenError:
+            logger.debug("Gemini circuit breaker is open, returning basic info")
+            return self._create_fallback_response(disease, basic_info, reason="circuit_open"), False
         except Exception as e:
             logger.error(f"Error enhancing prediction with AI: {e}")
-            return self._create_fallback_response(disease, basic_info)
+            return self._create_fallback_response(disease, basic_info, reason="error"), False
+    
+    def cache_key(self, disease: str, symptoms: str) -> Tuple:
+        """Cache key: model, prompt version, disease and canonical symptom set"""
+        symptom_set = sorted({normalize_symptom(s) for s in symptoms.split(',') if s.strip()})
+        return (self.model, PROMPT_VERSION, normalize_disease_name(disease), tuple(symptom_set))
+    
+    async def _get_ai_content(self, disease: str, symptoms: str, basic_info: Dict) -> Dict[str, Any]:
+        """Return the parsed AI answer, serving from cache when possible"""
+        with stage("gemini_cache"):
+            key = self.cache_key(disease, symptoms)
+            cached, state = self.cache.lookup(key)
+            
+            if cached is None and self.store is not None:
+                cached, state = await self._load_from_store(key)
+        
+        if cached is not None:
+            if state == STALE:
+                self._schedule_refresh(key, disease, symptoms, basic_info)
+            return cached
+        
+        # Identical concurrent requests share one upstream call
+        return await self.inflight.do(
+            key, lambda: self._generate_and_cache(key, disease, symptoms, basic_info)
+        )
+    
+    async def _generate_and_cache(self, key: Tuple, disease: str, symptoms: str, basic_info: Dict) -> Dict[str, Any]:
+        """Call the API and cache the parsed answer"""
+        with stage("gemini_prompt"):
+            prompt = self._create_medical_prompt(disease, symptoms, basic_info)
+        ai_response = await self._generate_content(prompt)
+        
+        # Only well-formed answers are cached
+        parsed_response = self._extract_json(ai_response)
+        await self._cache_result(key, parsed_response, len(ai_response.encode('utf-8')))
+        return parsed_response
+    
+    async def _cache_result(self, key: Tuple, parsed_response: Dict[str, Any], size: int):
+        """Store a parsed answer in memory and, if configured, on disk"""
+        self.cache.set(key, parsed_response, size=size)
+        
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(
+                    self.store.set, key, parsed_response, size,
+                    self.settings.CACHE_TTL, self.settings.CACHE_STALE_TTL
+                )
+            except Exception as e:
+                logger.warning(f"Failed to persist enhancement cache entry: {e}")
+    
+    async def _load_from_store(self, key: Tuple) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Look up the persistent cache and promote hits into memory"""
+        try:
+            stored = await asyncio.to_thread(self.store.get, key)
+        except Exception as e:
+            logger.warning(f"Persistent cache lookup failed: {e}")
+            return None, None
+        
+        if stored is None:
+            return None, None
+        
+        value, size, fresh_until = stored
+        remaining = fresh_until - time.time()
+        self.cache.set(key, value, size=size, ttl=max(0.0, remaining))
+        return value, FRESH if remaining > 0 else STALE
+    
+    def _schedule_refresh(self, key: Tuple, disease: str, symptoms: str, basic_info: Dict):
+        """Refresh a stale entry in the background (at most one refresh per key)"""
+        if key in self._refreshing or key in self.inflight:
+            return
+        
+        async def refresh():
+            try:
+                await self.inflight.do(
+                    key, lambda: self._generate_and_cache(key, disease, symptoms, basic_info)
+                )
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {disease}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+        
+        self._refreshing[key] = asyncio.create_task(refresh())
+    
+    async def stream_enhancement(
+        self, disease: str, symptoms: str, basic_info: Dict
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ``(field, value)`` pairs of the AI answer as each one completes
+        
+        Cached answers (and answers already being generated for the same
+        key) are replayed at once; otherwise the answer is streamed with
+        ``streamGenerateContent`` and cached when complete. Raises if the
+        service is unavailable or the upstream call fails.
+        """
+        if not self.is_initialized or not self.client:
+            raise RuntimeError("Gemini service not available")
+        
+        key = self.cache_key(disease, symptoms)
+        cached, state = self.cache.lookup(key)
+        if cached is None and self.store is not None:
+            cached, state = await self._load_from_store(key)
+        
+        if cached is None and key in self.inflight:
+            # Join the identical request already being generated
+            cached = await self.inflight.do(
+                key, lambda: self._generate_and_cache(key, disease, symptoms, basic_info)
+            )
+        elif state == STALE:
+            self._schedule_refresh(key, disease, symptoms, basic_info)
+        
+        if cached is not None:
+            for field, value in cached.items():
+                yield field, value
+            return
+        
+        with stage("gemini_prompt"):
+            prompt = self._create_medical_prompt(disease, symptoms, basic_info)
+        parser = JSONObjectStreamParser()
+        chunks = []
+        
+        async for text in self._stream_content(prompt):
+            chunks.append(text)
+            for field, value in parser.feed(text):
+                yield field, value
+        
+        ai_response = "".join(chunks)
+        try:
+            parsed_response = self._extract_json(ai_response)
+            await self._cache_result(key, parsed_response, len(ai_response.encode('utf-8')))
+        except Exception as e:
+            logger.warning(f"Streamed AI response not cached: {e}")
     
     def _create_medical_prompt(self, disease: str, symptoms: str, basic_info: Dict) -> str:
         """Create comprehensive medical prompt for Indian healthcare context"""
@@ -167,98 +452,175 @@ Please provide the response in JSON format with the following structure:
 
         return prompt
     
+    def _build_payload(self, prompt: str) -> Dict[str, Any]:
+        """Build the generateContent request body"""
+        return {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.3,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": 2048,
+                "stopSequences": []
+            },
+            "safetySettings": [
+                {
+                    "category": "HARM_CATEGORY_HARASSMENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_HATE_SPEECH", 
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                },
+                {
+                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+                }
+            ]
+        }
+    
     async def _generate_content(self, prompt: str) -> str:
         """Generate content using Gemini API"""
         try:
             url = f"{self.base_url}/models/{self.model}:generateContent"
             headers = {"Content-Type": "application/json"}
             
-            payload = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 2048,
-                    "stopSequences": []
-                },
-                "safetySettings": [
-                    {
-                        "category": "HARM_CATEGORY_HARASSMENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_HATE_SPEECH", 
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    }
-                ]
-            }
+            payload = self._build_payload(prompt)
             
-            response = await self.client.post(
-                f"{url}?key={self.api_key}",
-                headers=headers,
-                json=payload
-            )
+            async def attempt():
+                timer = ConnectTimer()
+                started = time.perf_counter()
+                response = await self.client.post(
+                    f"{url}?key={self.api_key}",
+                    headers=headers,
+                    json=payload,
+                    extensions={"trace": timer}
+                )
+                timer.observe(started)
+                return response
+            
+            # Retried (and possibly hedged) attempts; errors left after
+            # retrying count against the circuit breaker, including 4xx
+            # answers such as an invalid key or an exhausted quota
+            with self.breaker.call() as call:
+                response = await self.sender.send(attempt)
+                call.record(response.status_code == 200)
             
             if response.status_code != 200:
                 raise Exception(f"API request failed: {response.status_code} - {response.text}")
             
-            result = response.json()
-            
-            if 'candidates' not in result or not result['candidates']:
-                raise Exception("No content generated")
-            
-            content = result['candidates'][0]['content']['parts'][0]['text']
+            with stage("gemini_parse"):
+                result = response.json()
+                
+                if 'candidates' not in result or not result['candidates']:
+                    raise Exception("No content generated")
+                
+                content = result['candidates'][0]['content']['parts'][0]['text']
             return content
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error generating content: {e}")
             raise
     
-    def _parse_ai_response(self, ai_response: str, basic_info: Dict) -> Dict[str, Any]:
-        """Parse AI response and structure it"""
-        try:
-            # Try to extract JSON from response
-            start_idx = ai_response.find('{')
-            end_idx = ai_response.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = ai_response[start_idx:end_idx]
-                parsed_response = json.loads(json_str)
-                
-                # Validate and clean response
-                enhanced_info = {
-                    'description': parsed_response.get('description', basic_info.get('description', '')),
-                    'severity': parsed_response.get('severity', 'Moderate'),
-                    'precautions': parsed_response.get('precautions', basic_info.get('precautions', [])),
-                    'medications': parsed_response.get('medications', basic_info.get('medications', [])),
-                    'traditionalMedicines': parsed_response.get('traditionalMedicines', []),
-                    'homeRemedies': parsed_response.get('homeRemedies', []),
-                    'diet': parsed_response.get('diet', basic_info.get('diet', '')),
-                    'workouts': parsed_response.get('workouts', basic_info.get('workout', [])),
-                    'consultationAdvice': parsed_response.get('consultationAdvice', 'Consult healthcare provider if symptoms persist')
-                }
-                
-                return enhanced_info
-            else:
-                raise Exception("No valid JSON found in response")
+    async def _stream_content(self, prompt: str) -> AsyncIterator[str]:
+        """Stream generated text using the streamGenerateContent API (SSE)"""
+        url = f"{self.base_url}/models/{self.model}:streamGenerateContent"
+        headers = {"Content-Type": "application/json"}
+        
+        payload = self._build_payload(prompt)
+        
+        async def attempt():
+            timer = ConnectTimer()
+            started = time.perf_counter()
+            request = self.client.build_request(
+                "POST",
+                f"{url}?alt=sse&key={self.api_key}",
+                headers=headers,
+                json=payload,
+                extensions={"trace": timer}
+            )
+            response = await self.client.send(request, stream=True)
+            # Waiting ends with the response headers; the body is consumed as it streams
+            timer.observe(started)
+            return response
+        
+        # Opening the stream is retried; once text was yielded it is not.
+        # The breaker call lasts until the body is consumed: an error status
+        # or a failure mid-body (e.g. a read timeout) counts against it, a
+        # consumer that stops early (cancelled or closed) counts as neither
+        with self.breaker.call():
+            response = await self.sender.send(attempt, hedge=False)
+            try:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"API stream request failed: {response.status_code} - {body.decode(errors='replace')}")
                 
-        except Exception as e:
-            logger.error(f"Error parsing AI response: {e}")
-            return self._create_fallback_response("Unknown", basic_info)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[5:])
+                    for candidate in event.get('candidates', [])[:1]:
+                        for part in candidate.get('content', {}).get('parts', []):
+                            if part.get('text'):
+                                yield part['text']
+            finally:
+                await response.aclose()
+    
+    def _extract_json(self, ai_response: str) -> Dict[str, Any]:
+        """Extract the JSON object from an AI response"""
+        start_idx = ai_response.find('{')
+        end_idx = ai_response.rfind('}') + 1
+        
+        if start_idx == -1 or end_idx == 0:
+            raise Exception("No valid JSON found in response")
+        
+        parsed_response = json.loads(ai_response[start_idx:end_idx])
+        if not isinstance(parsed_response, dict):
+            raise Exception("No valid JSON found in response")
+        return parsed_response
+    
+    def build_enhanced_info(self, parsed_response: Dict[str, Any], basic_info: Dict) -> Dict[str, Any]:
+        """Validate and clean a parsed AI response"""
+        return {
+            'description': parsed_response.get('description', basic_info.get('description', '')),
+            'severity': parsed_response.get('severity', 'Moderate'),
+            'precautions': parsed_response.get('precautions', basic_info.get('precautions', [])),
+            'medications': parsed_response.get('medications', basic_info.get('medications', [])),
+            'traditionalMedicines': parsed_response.get('traditionalMedicines', []),
+            'homeRemedies': parsed_response.get('homeRemedies', []),
+            'diet': parsed_response.get('diet', basic_info.get('diet', '')),
+            'workouts': parsed_response.get('workouts', basic_info.get('workout', [])),
+            'consultationAdvice': parsed_response.get('consultationAdvice', 'Consult healthcare provider if symptoms persist')
+        }
+    
+    def basic_enhancement(self, disease: str, basic_info: Dict, reason: Optional[str] = None) -> Dict[str, Any]:
+        """Build response content from the ML datasets only, without calling the API
+        
+        ML-only responses by choice (deferred, batch) are not fallbacks;
+        pass ``reason`` when the AI answer failed to count it as one.
+        """
+        if reason is not None:
+            return self._create_fallback_response(disease, basic_info, reason=reason)
+        return self._basic_content(disease, basic_info)
+    
+    def _create_fallback_response(self, disease: str, basic_info: Dict, reason: str = "error") -> Dict[str, Any]:
+        """Create fallback response when AI is not available
+        
+        ``reason`` labels the ``gemini_fallback_responses_total`` metric.
+        """
+        GEMINI_FALLBACKS.inc(reason)
+        return self._basic_content(disease, basic_info)
     
-    def _create_fallback_response(self, disease: str, basic_info: Dict) -> Dict[str, Any]:
-        """Create fallback response when AI is not available"""
+    def _basic_content(self, disease: str, basic_info: Dict) -> Dict[str, Any]:
+        """Response content built from the datasets, with generic defaults"""
         return {
             'description': basic_info.get('description', f"**{disease}** is a medical condition that requires proper attention and care. Please consult with a **qualified healthcare professional** for accurate diagnosis and treatment."),
             'severity': 'Moderate',
@@ -299,6 +661,18 @@ Please provide the response in JSON format with the following structure:
     async def cleanup(self):
         """Cleanup Gemini service"""
         logger.info("Cleaning up Gemini Service...")
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        self.inflight.cancel_all()
+        for gauge in (GEMINI_POOL_CONNECTIONS, GEMINI_POOL_MAX_CONNECTIONS, GEMINI_POOL_QUEUED, UPSTREAM_CIRCUIT_STATE):
+            gauge.set_function(None)
         if self.client:
             await self.client.aclose()
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.close)
+            except Exception as e:
+                logger.warning(f"Failed to close persistent cache: {e}")
+            self.store = None
         self.is_initialized = False
@@ -0,0 +1,283 @@
+"""Retries and hedging for outbound HTTP calls
+
+``ResilientSender.send`` runs a request factory with:
+
+- bounded retries with full-jitter exponential backoff for transport
+  errors and retryable status codes, never beyond an overall deadline
+  (a ``Retry-After`` header longer than the maximum backoff ends retrying)
+- optional hedging: when an attempt has not answered after an adaptive
+  delay (a percentile of recently observed latencies), a second attempt is
+  sent and whichever succeeds first is used; hedges are capped at a
+  fraction of requests so a slow upstream is not sent twice the load
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from app.core.metrics import UPSTREAM_HEDGES, UPSTREAM_RETRIES
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Which failures are retried, how often and after how long"""
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        backoff: float = 0.25,
+        backoff_max: float = 4.0,
+        statuses: Iterable[int] = (429, 500, 502, 503, 504)
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+
+    def retryable_status(self, status_code: int) -> bool:
+        return status_code in self.statuses
+
+    @staticmethod
+    def retryable_error(error: BaseException) -> bool:
+        """Transport failures, except waiting for a pool connection (local overload)"""
+        import httpx
+        return isinstance(error, httpx.TransportError) and not isinstance(error, httpx.PoolTimeout)
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds before retry number ``retry`` (0-based), or None to stop retrying"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** retry))
+        if retry_after is not None:
+            if retry_after > self.backoff_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+
+class LatencyTracker:
+    """Percentiles of the most recent ``size`` latencies
+
+    The sorted window is rebuilt at most every ``refresh`` samples, so a
+    lookup is usually a list index.
+    """
+
+    def __init__(self, size: int = 256, min_samples: int = 20, refresh: int = 16):
+        self.min_samples = min_samples
+        self.refresh = refresh
+        self._samples: deque = deque(maxlen=size)
+        self._sorted: list = []
+        self._stale = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._stale += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until ``min_samples`` were recorded"""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._stale >= self.refresh or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._stale = 0
+        index = min(len(self._sorted) - 1, max(0, int(fraction * len(self._sorted) + 0.5) - 1))
+        return self._sorted[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgePolicy:
+    """When to send a second attempt
+
+    The delay is the ``percentile`` of recent latencies, clamped to
+    ``[min_delay, max_delay]``; no hedge is sent until enough latencies
+    were observed. At most ``max_ratio`` of requests are hedged.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 10.0,
+        max_ratio: float = 0.1
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_ratio = max_ratio
+        self.requests = 0
+        self.hedged = 0
+
+    def delay(self, latencies: LatencyTracker) -> Optional[float]:
+        observed = latencies.percentile(self.percentile)
+        if observed is None:
+            return None
+        return min(self.max_delay, max(self.min_delay, observed))
+
+    def count_request(self):
+        self.requests += 1
+        # Keep the budget recent: halve both counts now and then
+        if self.requests >= 10000:
+            self.requests //= 2
+            self.hedged //= 2
+
+    def allow(self) -> bool:
+        if self.hedged + 1 > self.max_ratio * self.requests:
+            return False
+        self.hedged += 1
+        return True
+
+
+def _retry_after(response: "httpx.Response") -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ResilientSender:
+    """Sends requests with retries and optional hedging (see module docstring)"""
+
+    def __init__(
+        self,
+        name: str,
+        retry: RetryPolicy,
+        hedge: Optional[HedgePolicy] = None,
+        deadline: float = 30.0
+    ):
+        self.name = name
+        self.retry = retry
+        self.hedge = hedge
+        self.deadline = deadline
+        self.latencies = LatencyTracker()
+        self.retries = 0
+
+    async def send(
+        self,
+        request: Callable[[], Awaitable["httpx.Response"]],
+        hedge: bool = True
+    ) -> "httpx.Response":
+        """Response of the first successful attempt, or of the last failed one
+
+        ``request`` starts a new attempt each time it is called. Raises the
+        last transport error if no attempt got a response; unsuccessful
+        responses are returned for the caller to report. ``hedge=False``
+        disables hedging for this call (e.g. for streamed responses, whose
+        time to the headers would also skew the observed latencies).
+        """
+        started = time.monotonic()
+        if hedge and self.hedge is not None:
+            self.hedge.count_request()
+
+        retry = 0
+        while True:
+            response: Optional["httpx.Response"] = None
+            error: Optional[BaseException] = None
+            try:
+                remaining = self.deadline - (time.monotonic() - started)
+                response = await asyncio.wait_for(self._attempt(request, hedge), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                if not self.retry.retryable_error(e):
+                    raise
+                error = e
+
+            if response is not None and not self.retry.retryable_status(response.status_code):
+                return response
+
+            if retry >= self.retry.max_retries:
+                return self._give_up(response, error)
+            delay = self.retry.delay(retry, _retry_after(response) if response is not None else None)
+            if delay is None or time.monotonic() - started + delay >= self.deadline:
+                return self._give_up(response, error)
+
+            reason = str(response.status_code) if response is not None else type(error).__name__
+            UPSTREAM_RETRIES.inc(self.name, reason)
+            self.retries += 1
+            logger.warning(f"Retrying {self.name} request in {delay:.2f}s ({reason})")
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            retry += 1
+
+    @staticmethod
+    def _give_up(response: Optional["httpx.Response"], error: Optional[BaseException]) -> "httpx.Response":
+        if response is not None:
+            return response
+        raise error
+
+    async def _timed(self, request: Callable[[], Awaitable["httpx.Response"]]) -> "httpx.Response":
+        """Run an attempt, recording the latency of successful ones"""
+        started = time.perf_counter()
+        response = await request()
+        if not self.retry.retryable_status(response.status_code):
+            self.latencies.record(time.perf_counter() - started)
+        return response
+
+    def _succeeded(self, task: asyncio.Task) -> bool:
+        return task.exception() is None and not self.retry.retryable_status(task.result().status_code)
+
+    async def _attempt(self, request: Callable[[], Awaitable["httpx.Response"]], hedge: bool) -> "httpx.Response":
+        """One attempt, raced against a hedged second one if it is slow"""
+        if not hedge or self.hedge is None:
+            return await request()
+        delay = self.hedge.delay(self.latencies)
+        if delay is None:
+            return await self._timed(request)
+
+        primary = asyncio.ensure_future(self._timed(request))
+        tasks: Set[asyncio.Task] = {primary}
+        last: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.hedge.allow():
+                tasks.add(asyncio.ensure_future(self._timed(request)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task
+                    if self._succeeded(task):
+                        if len(tasks) > 1:
+                            UPSTREAM_HEDGES.inc(self.name, "primary" if task is primary else "hedge")
+                        return task.result()
+            # Every attempt failed; report the last one (the others are closed below)
+            return last.result()
+        finally:
+            await self._discard(tasks, keep=last)
+
+    @staticmethod
+    async def _discard(tasks: Set[asyncio.Task], keep: Optional[asyncio.Task]):
+        """Cancel unfinished attempts and close the responses that were not used"""
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                response = await task
+            except BaseException:
+                continue
+            if task is not keep and not response.is_closed:
+                await response.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "retries": self.retries,
+            "latency_samples": len(self.latencies),
+        }
+        if self.hedge is not None:
+            delay = self.hedge.delay(self.latencies)
+            stats.update({
+                "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+                "hedged": self.hedge.hedged,
+                "hedge_budget_requests": self.hedge.requests,
+            })
+        return stats
@@ -0,0 +1,155 @@
+"""Executor for running model inference off the event loop"""
+
+import asyncio
+import logging
+import pickle
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Model loaded in each process pool worker
+_worker_model: Any = None
+
+
+def _init_process_worker(model_bytes: bytes):
+    """Process pool initializer: unpickle the model once per worker"""
+    global _worker_model
+    _worker_model = pickle.loads(model_bytes)
+
+
+def _call_process_model(method: str, X) -> tuple:
+    """Run a model method inside a process pool worker"""
+    started = time.monotonic()
+    return started, getattr(_worker_model, method)(X)
+
+
+class InferenceExecutor:
+    """Runs model calls on a sized thread or process pool
+
+    ``thread`` mode suits models that release the GIL (numpy / libsvm);
+    ``process`` mode isolates CPU-heavy pure-Python models and falls back to
+    threads when the model cannot be pickled. Queue depth and wait times are
+    tracked so saturation is visible in the detailed health check.
+    """
+
+    def __init__(self, max_workers: int = 4, mode: str = "thread"):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self.max_workers = max(1, max_workers)
+        self.mode = mode
+        self.model: Any = None
+        self._executor: Optional[Executor] = None
+
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def start(self, model: Any):
+        """Create the worker pool for a loaded model"""
+        self.shutdown()
+        self.model = model
+
+        if self.mode == "process":
+            try:
+                model_bytes = pickle.dumps(model)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_process_worker,
+                    initargs=(model_bytes,)
+                )
+            except Exception as e:
+                logger.warning(f"Model cannot be shared with worker processes ({e}), using threads")
+                self.mode = "thread"
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+
+        logger.info(f"Inference executor started ({self.mode} pool, {self.max_workers} workers)")
+
+    def set_model(self, model: Any):
+        """Use ``model`` for new calls; calls already submitted finish on the old one"""
+        if self.mode == "thread":
+            self.model = model
+            return
+        previous, self._executor = self._executor, None
+        self.start(model)
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    async def call_model(self, method: str, X) -> Any:
+        """Call ``model.<method>(X)`` on the pool and await the result"""
+        if self._executor is None:
+            raise RuntimeError("Inference executor not started")
+
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        self._in_flight += 1
+
+        try:
+            if self.mode == "process":
+                started, result = await loop.run_in_executor(
+                    self._executor, _call_process_model, method, X
+                )
+                self._record_wait(started - submitted)
+            else:
+                func = getattr(self.model, method)
+
+                def run():
+                    # Counters are updated from worker threads without a lock;
+                    # they are monitoring figures, not exact accounting
+                    self._record_wait(time.monotonic() - submitted)
+                    self._running += 1
+                    try:
+                        return func(X)
+                    finally:
+                        self._running -= 1
+
+                result = await loop.run_in_executor(self._executor, run)
+
+            self._completed += 1
+            return result
+
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def _record_wait(self, wait: float):
+        wait = max(0.0, wait)
+        self._total_wait += wait
+        if wait > self._max_wait:
+            self._max_wait = wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization and wait-time statistics"""
+        finished = self._completed + self._failed
+        if self.mode == "process":
+            # Worker start times are only reported back on completion
+            active = min(self._in_flight, self.max_workers)
+        else:
+            active = self._running
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "queue_depth": max(0, self._in_flight - active),
+            "active": active,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": round(self._total_wait / finished * 1000, 3) if finished else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 3),
+        }
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,131 @@
+"""SQLite store for enhancement jobs shared by worker processes"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS enhancement_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    job BLOB NOT NULL,
+    result BLOB,
+    ai_enhanced INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_enhancement_jobs_expires ON enhancement_jobs (expires_at);
+"""
+
+# Expired rows are deleted at most this often
+_PURGE_INTERVAL = 30.0
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return None if blob is None else json.loads(zlib.decompress(blob))
+
+
+class SQLiteJobStore:
+    """Job status and results in a SQLite file (WAL mode)
+
+    The worker process that accepts a job runs it and records its status
+    and result here, so a poll answered by any other worker on the host
+    can read it. Only what the poll response needs is stored (never the
+    symptom text). Rows expire at a wall-clock ``expires_at``.
+
+    Methods are blocking; call them from a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._last_purge = 0.0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Job store is closed")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def put(self, job_id: str, status: str, job: Dict[str, Any], expires_at: float):
+        """Record a new job"""
+        now = time.time()
+        conn = self._connection()
+        if now - self._last_purge > _PURGE_INTERVAL:
+            self._last_purge = now
+            conn.execute("DELETE FROM enhancement_jobs WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT OR REPLACE INTO enhancement_jobs (id, status, job, expires_at) VALUES (?, ?, ?, ?)",
+            (job_id, status, _pack(job), expires_at)
+        )
+
+    def update(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, ai_enhanced: bool = False):
+        """Record a job's status and, once finished, its result"""
+        self._connection().execute(
+            "UPDATE enhancement_jobs SET status = ?, result = ?, ai_enhanced = ? WHERE id = ?",
+            (status, None if result is None else _pack(result), int(ai_enhanced), job_id)
+        )
+
+    def fail(self, job_ids: Iterable[str], status: str):
+        """Mark jobs that will never finish (their worker is stopping)"""
+        self._connection().executemany(
+            "UPDATE enhancement_jobs SET status = ? WHERE id = ?",
+            ((status, job_id) for job_id in job_ids)
+        )
+
+    def delete(self, job_id: str):
+        self._connection().execute("DELETE FROM enhancement_jobs WHERE id = ?", (job_id,))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job that has not expired, or None"""
+        row = self._connection().execute(
+            "SELECT status, job, result, ai_enhanced FROM enhancement_jobs WHERE id = ? AND expires_at > ?",
+            (job_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, job, result, ai_enhanced = row
+        record = _unpack(job)
+        record.update(id=job_id, status=status, result=_unpack(result), ai_enhanced=bool(ai_enhanced))
+        return record
+
+    def close(self):
+        """Checkpoint the WAL and close the connections of every thread"""
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for index, conn in enumerate(connections):
+            try:
+                if index == 0:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to close job store connection: {e}")
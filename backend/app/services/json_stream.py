@@ -0,0 +1,108 @@
+"""Incremental parser for a streamed JSON object"""
+
+import json
+from typing import Any, List, Tuple
+
+# Parser states
+_BEFORE_OBJECT = 0
+_BEFORE_KEY = 1
+_IN_KEY = 2
+_BEFORE_COLON = 3
+_BEFORE_VALUE = 4
+_IN_VALUE = 5
+_DONE = 6
+
+
+class JSONObjectStreamParser:
+    """Emits the top-level members of a JSON object as soon as each is complete
+
+    Text is fed in arbitrary chunks (e.g. LLM output tokens). Anything
+    before the first ``{`` (such as a Markdown code fence) is ignored.
+    Members whose value is not valid JSON are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._state = _BEFORE_OBJECT
+        self._key_start = 0
+        self._key = ""
+        self._value_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the object has been seen"""
+        return self._state == _DONE
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add text and return the ``(key, value)`` members completed by it"""
+        self._buffer += text
+        members: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer) and self._state != _DONE:
+            char = buffer[pos]
+            state = self._state
+
+            if state == _BEFORE_OBJECT:
+                if char == '{':
+                    self._state = _BEFORE_KEY
+
+            elif state == _BEFORE_KEY:
+                if char == '"':
+                    self._state = _IN_KEY
+                    self._key_start = pos
+                elif char == '}':
+                    self._state = _DONE
+
+            elif state == _IN_KEY:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._key = json.loads(buffer[self._key_start:pos + 1])
+                    self._state = _BEFORE_COLON
+
+            elif state == _BEFORE_COLON:
+                if char == ':':
+                    self._state = _BEFORE_VALUE
+
+            elif state == _BEFORE_VALUE:
+                if not char.isspace():
+                    self._state = _IN_VALUE
+                    self._value_start = pos
+                    self._depth = 0
+                    self._in_string = False
+                    continue
+
+            elif state == _IN_VALUE:
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == '\\':
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in '[{':
+                    self._depth += 1
+                elif char in ']}' and self._depth > 0:
+                    self._depth -= 1
+                elif char in ',}' and self._depth == 0:
+                    raw = buffer[self._value_start:pos].strip()
+                    try:
+                        members.append((self._key, json.loads(raw)))
+                    except ValueError:
+                        pass
+                    self._state = _BEFORE_KEY if char == ',' else _DONE
+
+            pos += 1
+
+        self._pos = pos
+        return members
@@ -1,18 +1,34 @@
 """Machine Learning Service with dummy model"""
 
 import logging
-import numpy as np
-import pandas as pd
 import pickle
 import random
+import time
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 import asyncio
 
+from app.core.config import get_settings
+from app.core.tracing import stage
 from app.models.schemas import SeverityLevel
+from app.services.cache import TTLCache
+from app.services.catalog import build_disease_catalog, build_symptom_catalog
+from app.services.disease_index import DiseaseIndex
+from app.services.inference_executor import InferenceExecutor
+from app.services.model_store import load_model, model_version
+from app.services.ranking import ClassScorer
+from app.services.svc_engine import compile_model
+from app.services.symptom_suggest import SymptomSuggester
+from app.services.symptom_synonyms import LAY_SYNONYMS, RELATED_TERMS
+from app.services.symptom_vectorizer import EncodedSymptoms, SymptomVectorizer
 
 logger = logging.getLogger(__name__)
 
+MODEL_PATH = Path("models/svc.pkl")
+
+# Candidates kept per cached prediction (the largest top_k a request may ask for)
+CACHED_TOP_K = 10
+
 class MLService:
     """Machine Learning service with dummy model fallback"""
     
@@ -21,21 +37,53 @@ class MLService:
         self.symptoms_dict = {}
         self.diseases_list = {}
         self.datasets = {}
+        self.disease_index = DiseaseIndex.build({})
+        self.vectorizer = SymptomVectorizer({})
+        self._build_catalogs()
+        self.scorer: Optional[ClassScorer] = None
+        self.executor: Optional[InferenceExecutor] = None
+        self.model_version: Optional[str] = None
+        self.prediction_cache = TTLCache(max_entries=get_settings().PREDICTION_CACHE_SIZE, ttl=None)
+        self._next_model_check = 0.0
+        self._reload_task: Optional[asyncio.Task] = None
+        self.is_loaded = False
         self.is_initialized = False
         
-    async def initialize(self):
-        """Initialize ML service"""
+    def load(self):
+        """Load the model, datasets and lookup indexes
+        
+        Starts no threads, so it can run in a pre-fork parent process; the
+        loaded state is then shared with the workers copy-on-write.
+        """
         try:
-            logger.info("Initializing ML Service...")
-            
             # Try to load real model and data
-            await self._load_model_and_data()
+            self._load_model_and_data()
             
             # If real model fails, use dummy model
             if not self.model:
                 logger.warning("Real model not available, using dummy model")
                 self._initialize_dummy_model()
             
+        except Exception as e:
+            logger.error(f"Failed to load ML model: {e}")
+            # Fallback to dummy model
+            self._initialize_dummy_model()
+        
+        self._build_indexes()
+        self.model = self._prepare_model(self.model)
+        self._configure_scoring()
+        self.prediction_cache.clear()
+        self.is_loaded = True
+    
+    async def initialize(self):
+        """Initialize ML service (loading it first unless preloaded)"""
+        try:
+            logger.info("Initializing ML Service...")
+            
+            if not self.is_loaded:
+                self.load()
+            
+            self._start_executor()
             self.is_initialized = True
             logger.info("ML Service initialized successfully")
             
@@ -43,20 +91,23 @@ class MLService:
             logger.error(f"Failed to initialize ML Service: {e}")
             # Fallback to dummy model
             self._initialize_dummy_model()
+            self._build_indexes()
+            self._configure_scoring()
+            self._start_executor()
             self.is_initialized = True
             logger.info("ML Service initialized with dummy model")
     
-    async def _load_model_and_data(self):
+    def _load_model_and_data(self):
         """Load real model and datasets"""
         try:
             # Define paths
-            model_path = Path("models/svc.pkl")
             datasets_path = Path("datasets")
             
-            # Load model if exists
-            if model_path.exists():
-                with open(model_path, 'rb') as f:
-                    self.model = pickle.load(f)
+            # Load model if exists (numeric arrays are memory-mapped and
+            # shared between worker processes)
+            if MODEL_PATH.exists():
+                self.model_version = model_version(MODEL_PATH)
+                self.model = self._read_model()
                 logger.info("Real ML model loaded successfully")
             
             # Load datasets if they exist
@@ -72,6 +123,8 @@ class MLService:
             for key, filename in dataset_files.items():
                 file_path = datasets_path / filename
                 if file_path.exists():
+                    # pandas is only imported when there is a CSV to read
+                    import pandas as pd
                     self.datasets[key] = pd.read_csv(file_path)
                     logger.info(f"Loaded dataset: {filename}")
             
@@ -141,6 +194,97 @@ class MLService:
             2: 'Acne', 38: 'Urinary tract infection', 35: 'Psoriasis', 27: 'Impetigo'
         }
     
+    def _build_indexes(self):
+        """Compile the loaded datasets into lookup indexes"""
+        self.disease_index = DiseaseIndex.build(self.datasets, self.diseases_list.values())
+        self.vectorizer = SymptomVectorizer(
+            self.symptoms_dict,
+            synonyms=LAY_SYNONYMS,
+            max_edit_distance=get_settings().SYMPTOM_MAX_EDIT_DISTANCE,
+            related=RELATED_TERMS
+        )
+        self._build_catalogs()
+        logger.info(f"Disease index built with {len(self.disease_index)} diseases")
+    
+    def _read_model(self):
+        """Unpickle the model file"""
+        settings = get_settings()
+        if settings.MODEL_MMAP:
+            return load_model(MODEL_PATH, Path(settings.MODEL_CACHE_DIR))
+        with open(MODEL_PATH, 'rb') as f:
+            return pickle.load(f)
+    
+    def _prepare_model(self, model):
+        """Compiled version of a loaded model when enabled and verified"""
+        if get_settings().MODEL_COMPILED:
+            return compile_model(model, [self._dataset_symptom_matrix()])
+        return model
+    
+    async def _check_model_file(self):
+        """Reload the model in the background when its file changed
+        
+        Checked at most every ``MODEL_RELOAD_INTERVAL`` seconds. Requests
+        keep using the current model until the new one is ready.
+        """
+        interval = get_settings().MODEL_RELOAD_INTERVAL
+        now = time.monotonic()
+        if not interval or self.model_version is None or now < self._next_model_check:
+            return
+        self._next_model_check = now + interval
+        
+        try:
+            version = model_version(MODEL_PATH)
+        except OSError:
+            return
+        if version != self.model_version and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_model(version))
+    
+    async def _reload_model(self, version: str):
+        """Load a new model version and swap it in with an empty prediction cache"""
+        try:
+            logger.info("Model file changed, reloading...")
+            model = await asyncio.to_thread(lambda: self._prepare_model(self._read_model()))
+            scorer = ClassScorer(model)
+            
+            self.model = model
+            self.scorer = scorer
+            self.model_version = version
+            self.executor.set_model(model)
+            self.prediction_cache.clear()
+            logger.info(f"Model reloaded (version {version})")
+            
+        except Exception as e:
+            logger.error(f"Failed to reload model, keeping the current one: {e}")
+        finally:
+            self._reload_task = None
+    
+    def _dataset_symptom_matrix(self):
+        """Feature rows for the symptom sets in the symptoms dataset (model verification)"""
+        symptoms = self.datasets.get('symptoms')
+        if symptoms is None or not hasattr(symptoms, 'filter'):
+            return self.vectorizer.to_matrix([])
+        columns = symptoms.filter(like='Symptom')
+        masks = [
+            self.vectorizer.encode([value for value in row if isinstance(value, str)]).mask
+            for row in columns.itertuples(index=False)
+        ]
+        return self.vectorizer.to_matrix(masks)
+    
+    def _configure_scoring(self):
+        """Pick the model method that returns per-class scores for ranking"""
+        self.scorer = ClassScorer(self.model)
+        logger.info(f"Predictions ranked with {self.scorer.method or 'predict'}")
+    
+    def _start_executor(self):
+        """Start the inference pool so model calls do not block the event loop"""
+        settings = get_settings()
+        if self.executor is None:
+            self.executor = InferenceExecutor(
+                max_workers=settings.INFERENCE_WORKERS,
+                mode=settings.INFERENCE_EXECUTOR
+            )
+        self.executor.start(self.model)
+    
     def _initialize_dummy_model(self):
         """Initialize dummy model for testing"""
         logger.info("Initializing dummy ML model...")
@@ -154,15 +298,18 @@ class MLService:
         
         # Dummy model class
         class DummyModel:
+            def __init__(self, labels):
+                self.labels = labels
+            
             def predict(self, X):
-                # Return random disease prediction
-                return [random.choice(list(self.diseases_list.keys()))]
+                # Return a random disease prediction per row
+                return [random.choice(self.labels) for _ in range(len(X))]
         
-        self.model = DummyModel()
+        self.model = DummyModel(list(self.diseases_list.keys()))
         logger.info("Dummy ML model initialized")
     
     def _create_dummy_datasets(self):
-        """Create dummy datasets for testing"""
+        """Create dummy datasets for testing (plain lists of row dicts)"""
         # Create dummy data for each dataset
         diseases = list(self.diseases_list.values())
         
@@ -173,7 +320,7 @@ class MLService:
                 'Disease': disease,
                 'Description': f"This is a medical condition characterized by various symptoms. {disease} requires proper medical attention and care."
             })
-        self.datasets['description'] = pd.DataFrame(descriptions)
+        self.datasets['description'] = descriptions
         
         # Dummy precautions
         precautions = []
@@ -185,7 +332,7 @@ class MLService:
                 'Precaution_3': 'Get adequate rest',
                 'Precaution_4': 'Consult healthcare provider'
             })
-        self.datasets['precautions'] = pd.DataFrame(precautions)
+        self.datasets['precautions'] = precautions
         
         # Dummy medications
         medications = []
@@ -194,7 +341,7 @@ class MLService:
                 'Disease': disease,
                 'Medication': f'Standard medication for {disease}'
             })
-        self.datasets['medications'] = pd.DataFrame(medications)
+        self.datasets['medications'] = medications
         
         # Dummy diets
         diets = []
@@ -203,7 +350,7 @@ class MLService:
                 'Disease': disease,
                 'Diet': 'Balanced diet with plenty of fluids and nutritious foods'
             })
-        self.datasets['diets'] = pd.DataFrame(diets)
+        self.datasets['diets'] = diets
         
         # Dummy workouts
         workouts = []
@@ -212,85 +359,118 @@ class MLService:
                 'disease': disease,
                 'workout': 'Light exercise as recommended by healthcare provider'
             })
-        self.datasets['workout'] = pd.DataFrame(workouts)
+        self.datasets['workout'] = workouts
     
     async def predict_disease(self, symptoms: List[str]) -> Tuple[Optional[str], float]:
         """Predict disease from symptoms"""
+        results = await self.predict_batch([symptoms])
+        return results[0]
+    
+    async def predict_batch(self, symptom_sets: List[List[str]]) -> List[Tuple[Optional[str], float]]:
+        """Predict diseases for many symptom sets with a single model call
+        
+        Returns one ``(disease, confidence)`` pair per input set, with
+        ``(None, 0.0)`` for sets where no symptom was recognized.
+        """
         if not self.is_initialized:
             raise RuntimeError("ML Service not initialized")
         
         try:
             # Process symptoms
-            processed_symptoms = [s.strip().lower().replace(" ", "_") for s in symptoms]
-            
-            # Create input vector
-            input_vector = np.zeros(len(self.symptoms_dict))
-            valid_symptoms = 0
-            
-            for symptom in processed_symptoms:
-                if symptom in self.symptoms_dict:
-                    input_vector[self.symptoms_dict[symptom]] = 1
-                    valid_symptoms += 1
-            
-            if valid_symptoms == 0:
-                return None, 0.0
-            
-            # Make prediction
-            prediction = self.model.predict([input_vector])[0]
-            disease = self.diseases_list.get(prediction, "Unknown Disease")
-            
-            # Calculate confidence (dummy calculation)
-            confidence = min(0.95, 0.6 + (valid_symptoms * 0.1))
-            
-            return disease, confidence
+            encoded = [self.encode_symptoms(symptoms) for symptoms in symptom_sets]
+            return await self.predict_encoded(encoded)
             
         except Exception as e:
             logger.error(f"Error in disease prediction: {e}")
             raise
     
+    def encode_symptoms(self, symptoms: List[str]) -> EncodedSymptoms:
+        """Resolve raw symptoms (including lay terms and typos) for ``predict_encoded``"""
+        with stage("vectorize"):
+            return self.vectorizer.encode(symptoms)
+    
+    async def predict_encoded(self, encoded: List[EncodedSymptoms]) -> List[Tuple[Optional[str], float]]:
+        """Predict diseases for symptom sets already encoded by the vectorizer"""
+        rankings = await self.rank_encoded(encoded, top_k=1)
+        return [ranking[0] if ranking else (None, 0.0) for ranking in rankings]
+    
+    async def rank_encoded(self, encoded: List[EncodedSymptoms], top_k: int) -> List[List[Tuple[str, float]]]:
+        """Rank the ``top_k`` most likely diseases for each encoded symptom set
+        
+        Rankings are memoized per symptom bitmask; all other recognized sets
+        are scored with a single model call. Returns ``(disease, score)``
+        pairs, best first, and an empty list for sets where no symptom was
+        recognized. The first disease is the model's ``predict`` label.
+        Scores come from ``predict_proba`` or a softmax over
+        ``decision_function`` (see ``score_type``); models with neither rank
+        a single disease with a heuristic confidence.
+        """
+        if not self.is_initialized:
+            raise RuntimeError("ML Service not initialized")
+        
+        await self._check_model_file()
+        
+        results: List[List[Tuple[str, float]]] = [[] for _ in encoded]
+        # Positions to score per bitmask (a batch may repeat a combination)
+        pending: Dict[int, List[int]] = {}
+        
+        for position, item in enumerate(encoded):
+            if not item.count:
+                continue
+            cached = self.prediction_cache.get(item.mask)
+            if cached is not None:
+                results[position] = list(cached[:top_k])
+            else:
+                pending.setdefault(item.mask, []).append(position)
+        
+        if not pending:
+            return results
+        
+        # Score every class (one model call for all uncached sets)
+        masks = list(pending)
+        matrix = self.vectorizer.to_matrix(masks)
+        scorer = self.scorer
+        version = self.model_version
+        
+        if scorer:
+            with stage("model_predict"):
+                scores = await self.executor.call_model(scorer.method, matrix)
+                predictions = await self.executor.call_model("predict", matrix) if scorer.needs_predict else None
+            rankings = [
+                tuple((self.diseases_list.get(label, "Unknown Disease"), score) for label, score in ranking)
+                for ranking in scorer.rank(scores, max(top_k, CACHED_TOP_K), predictions)
+            ]
+        else:
+            with stage("model_predict"):
+                predictions = await self.executor.call_model("predict", matrix)
+            rankings = []
+            for mask, prediction in zip(masks, predictions):
+                disease = self.diseases_list.get(prediction, "Unknown Disease")
+                
+                # Calculate confidence (dummy calculation)
+                confidence = min(0.95, 0.6 + (encoded[pending[mask][0]].count * 0.1))
+                rankings.append(((disease, confidence),))
+        
+        # Results of a model replaced while this call ran are not cached
+        cache = version == self.model_version
+        for mask, ranking in zip(masks, rankings):
+            if cache:
+                self.prediction_cache.set(mask, ranking)
+            for position in pending[mask]:
+                results[position] = list(ranking[:top_k])
+        
+        return results
+    
+    @property
+    def score_type(self) -> str:
+        """What ranking scores are: ``probability``, ``relative`` (not calibrated) or ``heuristic``"""
+        return self.scorer.score_type if self.scorer else "heuristic"
+    
     def get_disease_info(self, disease: str) -> Dict:
         """Get comprehensive disease information"""
         try:
-            info = {}
-            
-            # Get description
-            if 'description' in self.datasets:
-                desc_df = self.datasets['description']
-                desc_row = desc_df[desc_df['Disease'] == disease]
-                info['description'] = desc_row['Description'].iloc[0] if not desc_row.empty else "No description available"
-            
-            # Get precautions
-            if 'precautions' in self.datasets:
-                prec_df = self.datasets['precautions']
-                prec_row = prec_df[prec_df['Disease'] == disease]
-                if not prec_row.empty:
-                    precautions = []
-                    for col in ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']:
-                        if col in prec_row.columns:
-                            val = prec_row[col].iloc[0]
-                            if pd.notna(val):
-                                precautions.append(val)
-                    info['precautions'] = precautions
-            
-            # Get medications
-            if 'medications' in self.datasets:
-                med_df = self.datasets['medications']
-                med_rows = med_df[med_df['Disease'] == disease]
-                info['medications'] = med_rows['Medication'].tolist() if not med_rows.empty else []
-            
-            # Get diet
-            if 'diets' in self.datasets:
-                diet_df = self.datasets['diets']
-                diet_row = diet_df[diet_df['Disease'] == disease]
-                info['diet'] = diet_row['Diet'].iloc[0] if not diet_row.empty else "Balanced diet recommended"
-            
-            # Get workout
-            if 'workout' in self.datasets:
-                workout_df = self.datasets['workout']
-                workout_row = workout_df[workout_df['disease'] == disease]
-                info['workout'] = workout_row['workout'].tolist() if not workout_row.empty else ["Light exercise recommended"]
-            
-            return info
+            with stage("disease_info"):
+                return self.disease_index.get(disease).to_info()
             
         except Exception as e:
             logger.error(f"Error getting disease info: {e}")
@@ -298,6 +478,14 @@ class MLService:
     
     def get_symptoms_list(self) -> List[Dict]:
         """Get list of all available symptoms"""
+        return list(self._symptoms_list)
+    
+    def get_diseases_list(self) -> List[Dict]:
+        """Get list of all available diseases"""
+        return list(self._diseases_list)
+    
+    def _build_catalogs(self):
+        """Materialize the symptom and disease listings with their categories and severities"""
         symptoms = []
         for symptom, index in self.symptoms_dict.items():
             symptoms.append({
@@ -306,10 +494,8 @@ class MLService:
                 'index': index,
                 'category': self._get_symptom_category(symptom)
             })
-        return sorted(symptoms, key=lambda x: x['name'])
-    
-    def get_diseases_list(self) -> List[Dict]:
-        """Get list of all available diseases"""
+        self._symptoms_list = tuple(sorted(symptoms, key=lambda x: x['name']))
+        
         diseases = []
         for index, disease in self.diseases_list.items():
             diseases.append({
@@ -317,7 +503,11 @@ class MLService:
                 'index': index,
                 'severity': self._get_disease_severity(disease)
             })
-        return sorted(diseases, key=lambda x: x['name'])
+        self._diseases_list = tuple(sorted(diseases, key=lambda x: x['name']))
+        
+        self.symptom_catalog = build_symptom_catalog(self._symptoms_list)
+        self.disease_catalog = build_disease_catalog(self._diseases_list)
+        self.symptom_suggester = SymptomSuggester(self._symptoms_list)
     
     def _get_symptom_category(self, symptom: str) -> str:
         """Categorize symptoms"""
@@ -349,6 +539,17 @@ class MLService:
     async def cleanup(self):
         """Cleanup ML service"""
         logger.info("Cleaning up ML Service...")
+        if self._reload_task:
+            self._reload_task.cancel()
+        if self.executor:
+            self.executor.shutdown()
         self.model = None
+        self.scorer = None
+        self.model_version = None
+        self.prediction_cache.clear()
         self.datasets.clear()
+        self.disease_index = DiseaseIndex.build({})
+        self.vectorizer = SymptomVectorizer({})
+        self._build_catalogs()
+        self.is_loaded = False
         self.is_initialized = False
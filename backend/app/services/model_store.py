@@ -0,0 +1,114 @@
+"""Memory-mapped model artifacts
+
+A pickled model is split once into a small "shell" pickle plus one
+``.npy`` file per large numeric array attribute (support vectors, dual
+coefficients, ...). Loading maps the arrays read-only with
+``np.load(mmap_mode="r")``, so every worker process on the host shares the
+same page-cache pages instead of holding its own unpickled copy.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Arrays smaller than this stay in the shell pickle (a mapping costs a page)
+MMAP_MIN_BYTES = 4096
+
+_SHELL_FILE = "model.pkl"
+
+
+def model_version(model_path: Path) -> str:
+    """Identify a model file version by path, size and modification time"""
+    stat = model_path.stat()
+    raw = f"{model_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _split_arrays(model: Any) -> Dict[str, np.ndarray]:
+    """Top-level numeric ndarray attributes worth memory-mapping"""
+    attributes = getattr(model, "__dict__", {})
+    return {
+        name: value for name, value in attributes.items()
+        if type(value) is np.ndarray and value.dtype != object and value.nbytes >= MMAP_MIN_BYTES
+    }
+
+
+def export_model(model: Any, directory: Path) -> int:
+    """Write ``model`` as a shell pickle plus ``.npy`` arrays; returns the array count"""
+    arrays = _split_arrays(model)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+    shell = object.__new__(type(model))
+    shell.__dict__.update(model.__dict__)
+    for name in arrays:
+        shell.__dict__[name] = None
+    with open(directory / _SHELL_FILE, "wb") as f:
+        pickle.dump((shell, sorted(arrays)), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(arrays)
+
+
+def load_exported_model(directory: Path) -> Any:
+    """Load a model written by ``export_model`` with its arrays memory-mapped"""
+    with open(directory / _SHELL_FILE, "rb") as f:
+        model, array_names = pickle.load(f)
+    for name in array_names:
+        model.__dict__[name] = np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+    return model
+
+
+def load_model(model_path: Path, cache_dir: Path) -> Any:
+    """Load a pickled model, memory-mapping its arrays from ``cache_dir``
+
+    The first load of a given model file exports it under
+    ``cache_dir/<version>/``; later loads (other workers, restarts) only map
+    the exported arrays. Export is atomic, so concurrent workers may race
+    safely. Falls back to a plain ``pickle.load`` when the model cannot be
+    exported (e.g. objects without ``__dict__``) or the cache is not writable.
+    """
+    target = cache_dir / model_version(model_path)
+    if (target / _SHELL_FILE).exists():
+        return load_exported_model(target)
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+
+    if not _split_arrays(model):
+        return model
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".export-", dir=cache_dir))
+        try:
+            count = export_model(model, staging)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Another worker exported the same version first
+                if not (target / _SHELL_FILE).exists():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        _remove_stale_exports(cache_dir, keep=target.name)
+        logger.info(f"Exported {count} model arrays for memory mapping to {target}")
+        return load_exported_model(target)
+    except Exception as e:
+        logger.warning(f"Model arrays not memory-mapped, using the unpickled model: {e}")
+        return model
+
+
+def _remove_stale_exports(cache_dir: Path, keep: str):
+    """Delete exports of previous model versions (best effort)"""
+    for entry in cache_dir.iterdir():
+        if entry.is_dir() and entry.name != keep and not entry.name.startswith("."):
+            shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,143 @@
+"""Ranking model class scores into a top-k differential"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.svc_engine import class_pairs, ovo_votes, ovr_from_ovo
+
+# Model methods that return one score per class, preferred first
+SCORE_METHODS = ("predict_proba", "decision_function")
+
+# What the scores of a ranking are (``ClassScorer.score_type``)
+PROBABILITY = "probability"
+RELATIVE = "relative"
+
+
+def top_k(probabilities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and scores of the ``k`` best classes per row, best first
+
+    Uses ``argpartition`` so only the selected columns are sorted.
+    """
+    n_classes = probabilities.shape[1]
+    k = max(1, min(k, n_classes))
+    if k < n_classes:
+        columns = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+    else:
+        columns = np.broadcast_to(np.arange(n_classes), probabilities.shape).copy()
+    selected = np.take_along_axis(probabilities, columns, axis=1)
+    order = np.argsort(-selected, axis=1, kind="stable")
+    return np.take_along_axis(columns, order, axis=1), np.take_along_axis(selected, order, axis=1)
+
+
+def softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class ClassScorer:
+    """Turns one model call into ranked per-class scores
+
+    Uses ``predict_proba`` when the model has it (``SVC`` only does when
+    trained with ``probability=True``), otherwise ``decision_function``
+    followed by a softmax, which keeps the model's ranking and puts the
+    scores on a 0-1 scale. Those are relative scores, not calibrated
+    probabilities: an SVC's ``ovr`` values are dominated by pairwise vote
+    counts.
+
+    The first class of every ranking is the one ``predict`` returns, even
+    where the scores order the classes differently: an SVC's votes break
+    ties differently from its ``ovr`` values, and Platt-scaled
+    probabilities can disagree with the votes. For ``predict_proba`` the
+    caller passes the ``predict`` labels (``needs_predict``); for SVCs
+    they are taken from the pairwise votes.
+
+    sklearn builds a multi-class SVC's ``ovr`` decision values from the
+    one-vs-one ones in a Python loop over every class pair, which costs far
+    more than the model itself. For SVCs (sklearn or ``CompiledSVC``) the
+    scorer switches the model to ``decision_function_shape="ovo"``
+    (``predict`` ignores it) and aggregates the pairwise values with
+    vectorized ``bincount`` calls instead, giving the same values as ``ovr``.
+    """
+
+    def __init__(self, model: Any):
+        self.method: Optional[str] = next((m for m in SCORE_METHODS if hasattr(model, m)), None)
+        classes = getattr(model, 'classes_', None)
+        self.classes: List[Any] = list(classes.tolist() if hasattr(classes, 'tolist') else classes or [])
+        if not self.classes:
+            self.method = None
+
+        self._pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        n_classes = len(self.classes)
+        if (
+            self.method == "decision_function"
+            and n_classes > 2
+            and getattr(model, 'decision_function_shape', None) == "ovr"
+        ):
+            self._pairs = class_pairs(n_classes)
+            model.decision_function_shape = "ovo"
+
+    def __bool__(self) -> bool:
+        return self.method is not None
+
+    @property
+    def needs_predict(self) -> bool:
+        """Whether ``rank`` needs the ``predict`` labels of the same rows"""
+        return self.method == "predict_proba"
+
+    @property
+    def score_type(self) -> str:
+        return PROBABILITY if self.method == "predict_proba" else RELATIVE
+
+    def probabilities(self, scores: Any) -> np.ndarray:
+        """Rows of class scores that sum to 1, in ``classes`` order"""
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.method == "predict_proba":
+            return scores
+        if scores.ndim == 1:
+            # Binary classifiers return a single column for the positive class
+            scores = np.column_stack((-scores, scores))
+        elif self._pairs is not None:
+            scores = ovr_from_ovo(scores, self._pairs, len(self.classes))
+        return softmax(scores)
+
+    def _predicted_columns(self, scores: Any, predictions: Optional[Sequence[Any]]) -> Optional[List[int]]:
+        """Column of the ``predict`` label of each row, if it can differ from the best score"""
+        if predictions is not None:
+            columns = {label: column for column, label in enumerate(self.classes)}
+            return [columns[label] for label in np.asarray(predictions).tolist()]
+        if self._pairs is not None:
+            # libsvm: the first class of a pair wins on a positive value; ties go to the lowest class
+            votes = ovo_votes(np.asarray(scores, dtype=np.float64), self._pairs, len(self.classes), ties_first=False)
+            return np.argmax(votes, axis=1).tolist()
+        return None
+
+    def rank(
+        self, scores: Any, k: int, predictions: Optional[Sequence[Any]] = None
+    ) -> List[List[Tuple[Any, float]]]:
+        """``(class label, score)`` pairs of the top ``k`` classes for each row
+
+        The predicted class comes first (see class docstring); ``predictions``
+        are the ``predict`` labels of the rows when ``needs_predict``.
+        """
+        probabilities = self.probabilities(scores)
+        predicted = self._predicted_columns(scores, predictions)
+        columns, values = top_k(probabilities, k)
+        rankings = []
+        for row, (row_columns, row_values) in enumerate(zip(columns.tolist(), values.tolist())):
+            if predicted is not None and row_columns[0] != predicted[row]:
+                lead = predicted[row]
+                if lead in row_columns:
+                    position = row_columns.index(lead)
+                    del row_columns[position], row_values[position]
+                else:
+                    row_columns.pop()
+                    row_values.pop()
+                row_columns.insert(0, lead)
+                row_values.insert(0, float(probabilities[row, lead]))
+            rankings.append(
+                [(self.classes[column], float(value)) for column, value in zip(row_columns, row_values)]
+            )
+        return rankings
@@ -0,0 +1,55 @@
+"""Single-flight coalescing of identical concurrent calls"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share it
+
+    The shared call runs as its own task, so a caller being cancelled (for
+    example a client disconnecting) does not cancel it for the others.
+    Every caller receives the same result or the same exception.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()``, or join the identical call already in flight"""
+        task = self._tasks.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def cancel_all(self):
+        """Cancel all in-flight calls"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Upstream call and deduplication counters"""
+        return {
+            "in_flight": len(self._tasks),
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+        }
@@ -0,0 +1,152 @@
+"""Symptom autocomplete index"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import re
+
+from app.services.symptom_synonyms import LAY_SYNONYMS
+from app.services.symptom_vectorizer import normalize_symptom
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+# Match tiers, best first
+_EXACT = 0
+_PREFIX = 1
+_WORD_PREFIX = 2
+_SUBSTRING = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(frozen=True, slots=True)
+class _Term:
+    text: str  # normalized form (``skin_rash``)
+    key: str  # symptom key the term resolves to
+    synonym: bool
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    """A ranked autocomplete result"""
+    key: str
+    name: str
+    category: str
+    matched: Optional[str]  # the lay term that matched, if it was a synonym
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {"key": self.key, "name": self.name, "category": self.category, "matched": self.matched}
+
+
+class SymptomSuggester:
+    """Ranked prefix/word/substring search over symptom names and lay synonyms
+
+    Built once from the symptom listing. Terms (symptom names plus
+    ``LAY_SYNONYMS``) are kept in a sorted array for whole-term prefix
+    range scans, their words in a second sorted array for per-word prefix
+    matches ("pain" finds ``chest_pain``), and a trigram index for infix
+    matches ("rin" finds ``dark_urine``). Results are ranked exact > prefix
+    > word prefix > substring, canonical names before synonyms, then
+    shorter names first, and memoized per query.
+    """
+
+    def __init__(
+        self,
+        symptoms: Iterable[Mapping[str, str]],
+        synonyms: Mapping[str, str] = LAY_SYNONYMS,
+        memo_size: int = 4096
+    ):
+        self._symptoms: Dict[str, Tuple[str, str]] = {}
+        terms: List[_Term] = []
+        for symptom in symptoms:
+            self._symptoms[symptom['key']] = (symptom['name'], symptom['category'])
+            terms.append(_Term(normalize_symptom(symptom['key']), symptom['key'], False))
+        for phrase, key in synonyms.items():
+            if key in self._symptoms:
+                terms.append(_Term(normalize_symptom(phrase), key, True))
+
+        self._terms: Tuple[_Term, ...] = tuple(terms)
+        self._by_text: List[Tuple[str, int]] = sorted((term.text, i) for i, term in enumerate(terms))
+        self._by_word: List[Tuple[str, int]] = sorted(
+            (word, i) for i, term in enumerate(terms) for word in set(_WORDS.findall(term.text))
+        )
+        self._ngrams: Dict[str, Set[int]] = {}
+        for i, term in enumerate(terms):
+            for gram in _trigrams(term.text):
+                self._ngrams.setdefault(gram, set()).add(i)
+
+        self._suggest_cached = lru_cache(maxsize=memo_size)(self._suggest)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @staticmethod
+    def _prefix_range(index: List[Tuple[str, int]], prefix: str) -> Iterable[Tuple[str, int]]:
+        position = bisect_left(index, (prefix, -1))
+        while position < len(index) and index[position][0].startswith(prefix):
+            yield index[position]
+            position += 1
+
+    def suggest(self, query: str, limit: int = 10) -> Tuple[Suggestion, ...]:
+        """Top ``limit`` symptoms matching ``query``"""
+        return self._suggest_cached(normalize_symptom(query), limit)
+
+    def _suggest(self, query: str, limit: int) -> Tuple[Suggestion, ...]:
+        if not query or limit <= 0:
+            return ()
+
+        tiers: Dict[int, int] = {}
+
+        def offer(term_id: int, tier: int):
+            if tier < tiers.get(term_id, _SUBSTRING + 1):
+                tiers[term_id] = tier
+
+        for text, term_id in self._prefix_range(self._by_text, query):
+            offer(term_id, _EXACT if text == query else _PREFIX)
+
+        tokens = _WORDS.findall(query)
+        if tokens:
+            matches: Optional[Set[int]] = None
+            for token in tokens:
+                found = {term_id for _, term_id in self._prefix_range(self._by_word, token)}
+                matches = found if matches is None else matches & found
+                if not matches:
+                    break
+            for term_id in matches or ():
+                offer(term_id, _WORD_PREFIX)
+
+        if len(query) >= 3:
+            candidates: Optional[Set[int]] = None
+            for gram in _trigrams(query):
+                ids = self._ngrams.get(gram)
+                if not ids:
+                    candidates = set()
+                    break
+                candidates = set(ids) if candidates is None else candidates & ids
+            for term_id in candidates or ():
+                if query in self._terms[term_id].text:
+                    offer(term_id, _SUBSTRING)
+
+        # Best term per symptom
+        best: Dict[str, Tuple[int, bool, int, str, _Term]] = {}
+        for term_id, tier in tiers.items():
+            term = self._terms[term_id]
+            rank = (tier, term.synonym, len(term.text), term.text, term)
+            current = best.get(term.key)
+            if current is None or rank[:4] < current[:4]:
+                best[term.key] = rank
+
+        suggestions = []
+        for rank in sorted(best.values(), key=lambda rank: rank[:4])[:limit]:
+            term = rank[4]
+            name, category = self._symptoms[term.key]
+            suggestions.append(Suggestion(
+                key=term.key,
+                name=name,
+                category=category,
+                matched=term.text.replace("_", " ") if term.synonym else None
+            ))
+        return tuple(suggestions)
@@ -0,0 +1,151 @@
+"""Common lay terms for the model's symptom names"""
+
+from typing import Dict, Tuple
+
+# Lay term -> symptom key in ``symptoms_dict``. Terms are written the way
+# patients type them; they are normalized like symptom names before use.
+# Only terms that mean the same as the feature belong here: they are
+# applied to the prediction.
+LAY_SYNONYMS: Dict[str, str] = {
+    # General
+    "tiredness": "fatigue",
+    "tired": "fatigue",
+    "exhaustion": "fatigue",
+    "feeling unwell": "malaise",
+    "low grade fever": "mild_fever",
+    "shivers": "shivering",
+    "losing weight": "weight_loss",
+    "putting on weight": "weight_gain",
+    "always hungry": "excessive_hunger",
+    "no appetite": "loss_of_appetite",
+    "dizzy": "dizziness",
+    "giddiness": "dizziness",
+    "lightheaded": "dizziness",
+    "room spinning": "spinning_movements",
+    "vertigo": "spinning_movements",
+    "poor concentration": "lack_of_concentration",
+    "anxious": "anxiety",
+    "nervousness": "anxiety",
+    "irritable": "irritability",
+    "dehydrated": "dehydration",
+    # Head, eyes, nose and throat
+    "head ache": "headache",
+    "head pain": "headache",
+    "blurry vision": "blurred_and_distorted_vision",
+    "blurred vision": "blurred_and_distorted_vision",
+    "red eyes": "redness_of_eyes",
+    "watery eyes": "watering_from_eyes",
+    "yellow eyes": "yellowing_of_eyes",
+    "blocked nose": "congestion",
+    "stuffy nose": "congestion",
+    "nasal congestion": "congestion",
+    "slurring": "slurred_speech",
+    # Chest and breathing
+    "shortness of breath": "breathlessness",
+    "breathing difficulty": "breathlessness",
+    "difficulty breathing": "breathlessness",
+    "out of breath": "breathlessness",
+    "coughing": "cough",
+    "coughing blood": "blood_in_sputum",
+    "racing heart": "fast_heart_rate",
+    "heart racing": "fast_heart_rate",
+    "palpitation": "palpitations",
+    # Digestion
+    "loose motion": "diarrhoea",
+    "loose motions": "diarrhoea",
+    "loose stools": "diarrhoea",
+    "diarrhea": "diarrhoea",
+    "throwing up": "vomiting",
+    "puking": "vomiting",
+    "vomit": "vomiting",
+    "queasy": "nausea",
+    "stomach ache": "stomach_pain",
+    "tummy ache": "belly_pain",
+    "tummy pain": "belly_pain",
+    "abdomen pain": "abdominal_pain",
+    "heartburn": "acidity",
+    "acid reflux": "acidity",
+    "flatulence": "passage_of_gases",
+    "swollen stomach": "swelling_of_stomach",
+    "constipated": "constipation",
+    "blood in stool": "bloody_stool",
+    # Urine
+    "burning urination": "burning_micturition",
+    "urge to urinate": "continuous_feel_of_urine",
+    "smelly urine": "foul_smell_of urine",
+    "dark pee": "dark_urine",
+    # Skin
+    "itchy": "itching",
+    "itchy skin": "itching",
+    "rash": "skin_rash",
+    "skin rashes": "skin_rash",
+    "peeling skin": "skin_peeling",
+    "yellow skin": "yellowish_skin",
+    "blisters": "blister",
+    "bruises": "bruising",
+    "red spots": "red_spots_over_body",
+    "scarring": "scurring",
+    # Muscles and joints
+    "body ache": "muscle_pain",
+    "body pain": "muscle_pain",
+    "muscle ache": "muscle_pain",
+    "joint ache": "joint_pain",
+    "aching joints": "joint_pain",
+    "swollen joints": "swelling_joints",
+    "back ache": "back_pain",
+    "backache": "back_pain",
+    "neck ache": "neck_pain",
+    "leg swelling": "swollen_legs",
+    "swollen feet": "swollen_extremeties",
+    "swollen glands": "swelled_lymph_nodes",
+}
+
+# Lay term -> symptom keys it may mean. These are close but not the same
+# (a symptom of a different kind, broader, narrower or only part of the
+# feature), so they are never applied: the input stays unrecognized and
+# the keys are reported as suggestions, like uncertain typo matches.
+RELATED_TERMS: Dict[str, Tuple[str, ...]] = {
+    # General
+    "fever": ("high_fever", "mild_fever"),
+    "temperature": ("mild_fever", "high_fever"),
+    "weakness": ("muscle_weakness", "fatigue", "weakness_in_limbs"),
+    "cold sweats": ("sweating",),
+    "night sweats": ("sweating",),
+    "not hungry": ("loss_of_appetite",),
+    "fainting": ("dizziness", "loss_of_balance"),
+    "unconscious": ("coma", "altered_sensorium"),
+    "confusion": ("altered_sensorium",),
+    "sad": ("depression",),
+    "low mood": ("depression",),
+    # Head, eyes, nose and throat
+    "migraine": ("headache",),
+    "puffy eyes": ("puffy_face_and_eyes",),
+    "sneezing": ("continuous_sneezing",),
+    "sore throat": ("throat_irritation", "patches_in_throat"),
+    "throat pain": ("throat_irritation",),
+    "mouth ulcers": ("ulcers_on_tongue",),
+    "dry lips": ("drying_and_tingling_lips",),
+    "loss of taste": ("loss_of_smell",),
+    # Chest and breathing
+    "wheezing": ("breathlessness",),
+    "mucus": ("phlegm", "mucoid_sputum"),
+    "sputum": ("mucoid_sputum", "rusty_sputum", "phlegm"),
+    "chest tightness": ("chest_pain", "breathlessness"),
+    # Digestion
+    "feeling sick": ("nausea", "malaise"),
+    "gas": ("passage_of_gases", "distention_of_abdomen"),
+    "bloating": ("distention_of_abdomen",),
+    "piles pain": ("pain_in_anal_region", "pain_during_bowel_movements"),
+    "itchy bottom": ("irritation_in_anus",),
+    # Urine
+    "painful urination": ("burning_micturition",),
+    "frequent urination": ("polyuria", "continuous_feel_of_urine"),
+    # Skin
+    "pimples": ("pus_filled_pimples", "blackheads"),
+    "acne": ("pus_filled_pimples", "blackheads"),
+    # Muscles and joints
+    "stiff joints": ("movement_stiffness", "joint_pain"),
+    "varicose veins": ("prominent_veins_on_calf",),
+    "cold hands": ("cold_hands_and_feets",),
+    "cold feet": ("cold_hands_and_feets",),
+}
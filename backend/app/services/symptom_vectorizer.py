@@ -0,0 +1,184 @@
+"""Compiled symptom vectorizer"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+
+from app.services.fuzzy_match import FuzzyMatcher
+
+_SEPARATORS = re.compile(r"[\s_]+")
+
+
+def normalize_symptom(raw: str) -> str:
+    """Normalize a symptom name to its canonical key form
+
+    Case-insensitive, with runs of spaces/underscores collapsed to a single
+    underscore, so ``"Skin Rash"``, ``" skin_rash "`` and the dataset key
+    ``"spotting_ urination"`` normalize to ``skin_rash`` / ``spotting_urination``.
+    """
+    return "_".join(part for part in _SEPARATORS.split(raw.strip().lower()) if part)
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedSymptoms:
+    """A symptom set resolved against the model features"""
+    mask: int
+    indices: Tuple[int, ...]
+    unrecognized: Tuple[str, ...]
+    # (raw input, feature name, applied) for inputs matched as lay terms,
+    # related terms or typos; unapplied ones are possible matches of
+    # unrecognized inputs
+    corrections: Tuple[Tuple[str, str, bool], ...] = ()
+
+    @property
+    def count(self) -> int:
+        """Number of distinct recognized symptoms"""
+        return len(self.indices)
+
+
+class SymptomVectorizer:
+    """Encodes raw symptom strings into model feature vectors
+
+    Built once from ``symptoms_dict`` (feature name -> column index). Raw
+    strings are resolved through a memoized lookup: exact feature names
+    first, then lay ``synonyms``, then ``related`` terms, then the closest
+    feature name within ``max_edit_distance`` typos. Lay terms are not
+    typo-matched: short phrases such as ``ear pain`` are a few edits away
+    from unrelated features. Related terms are never applied, and a typo
+    match is only applied when no other feature is as close and it keeps
+    the first letter; otherwise the input stays unrecognized and the
+    features are only reported as suggestions. Symptom sets are
+    represented as an integer bitmask that can be expanded into a compact
+    ``uint8`` row, a dense matrix or a CSR sparse matrix for batches.
+    """
+
+    def __init__(
+        self,
+        symptoms_dict: Dict[str, int],
+        memo_size: int = 4096,
+        synonyms: Optional[Mapping[str, str]] = None,
+        max_edit_distance: int = 0,
+        related: Optional[Mapping[str, Sequence[str]]] = None
+    ):
+        self.n_features = len(symptoms_dict)
+        self.feature_names: Tuple[str, ...] = tuple(
+            name for name, _ in sorted(symptoms_dict.items(), key=lambda item: item[1])
+        )
+        self._index: Dict[str, int] = {}
+        for name, index in symptoms_dict.items():
+            self._index.setdefault(normalize_symptom(name), index)
+        self._synonyms: Dict[str, int] = {}
+        for phrase, name in (synonyms or {}).items():
+            if name in symptoms_dict:
+                self._synonyms.setdefault(normalize_symptom(phrase), symptoms_dict[name])
+        self._related: Dict[str, Tuple[int, ...]] = {}
+        for phrase, names in (related or {}).items():
+            indices = tuple(symptoms_dict[name] for name in names if name in symptoms_dict)
+            if indices:
+                self._related.setdefault(normalize_symptom(phrase), indices)
+        self._fuzzy = FuzzyMatcher(self._index, max_edit_distance) if max_edit_distance > 0 else None
+        self._resolve_cached = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def __len__(self) -> int:
+        return self.n_features
+
+    def _resolve(self, raw: str) -> Tuple[Optional[int], Tuple[int, ...]]:
+        """Feature index for a raw string and the features it was corrected to
+
+        The second item is set for lay terms and typos; with a None index it
+        holds suggestions: related terms, or a typo match that was too
+        uncertain to apply.
+        """
+        key = normalize_symptom(raw)
+        index = self._index.get(key)
+        if index is not None:
+            return index, ()
+        index = self._synonyms.get(key)
+        if index is not None:
+            return index, (index,)
+        suggestions = self._related.get(key)
+        if suggestions is not None:
+            return None, suggestions
+        if self._fuzzy is not None and key:
+            match = self._fuzzy.match(key)
+            if match is not None:
+                term, _, unique = match
+                index = self._index[term]
+                if unique and term[0] == key[0]:
+                    return index, (index,)
+                return None, (index,)
+        return None, ()
+
+    def resolve(self, raw: str) -> Optional[int]:
+        """Resolve a raw symptom string to its feature index (None if unknown)"""
+        return self._resolve_cached(raw)[0]
+
+    def encode(self, symptoms: Iterable[str]) -> EncodedSymptoms:
+        """Resolve a symptom set into a bitmask of recognized features"""
+        mask = 0
+        unrecognized = []
+        corrections = []
+        for raw in symptoms:
+            index, corrected = self._resolve_cached(raw)
+            if index is None:
+                unrecognized.append(raw)
+            else:
+                mask |= 1 << index
+            for feature in corrected:
+                corrections.append((raw, self.feature_names[feature], index is not None))
+        return EncodedSymptoms(mask, self.mask_indices(mask), tuple(unrecognized), tuple(corrections))
+
+    @staticmethod
+    def mask_indices(mask: int) -> Tuple[int, ...]:
+        """Feature indices set in a bitmask, in ascending order"""
+        indices = []
+        while mask:
+            low = mask & -mask
+            indices.append(low.bit_length() - 1)
+            mask ^= low
+        return tuple(indices)
+
+    def feature_keys(self, mask: int) -> List[str]:
+        """Feature names set in a bitmask"""
+        return [self.feature_names[index] for index in self.mask_indices(mask)]
+
+    def to_row(self, mask: int) -> np.ndarray:
+        """Expand a bitmask into a ``uint8`` feature row"""
+        row = np.zeros(self.n_features, dtype=np.uint8)
+        row[list(self.mask_indices(mask))] = 1
+        return row
+
+    def to_matrix(self, masks: Sequence[int]) -> np.ndarray:
+        """Expand bitmasks into a dense ``uint8`` feature matrix"""
+        rows, cols = self._coordinates(masks)
+        matrix = np.zeros((len(masks), self.n_features), dtype=np.uint8)
+        matrix[rows, cols] = 1
+        return matrix
+
+    def to_csr(self, masks: Sequence[int]):
+        """Expand bitmasks into a ``scipy.sparse.csr_matrix`` feature matrix"""
+        from scipy.sparse import csr_matrix
+
+        indptr = np.zeros(len(masks) + 1, dtype=np.int32)
+        indices = []
+        for position, mask in enumerate(masks):
+            row_indices = self.mask_indices(mask)
+            indices.extend(row_indices)
+            indptr[position + 1] = indptr[position] + len(row_indices)
+        data = np.ones(len(indices), dtype=np.uint8)
+        return csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(masks), self.n_features)
+        )
+
+    def _coordinates(self, masks: Sequence[int]) -> Tuple[List[int], List[int]]:
+        rows: List[int] = []
+        cols: List[int] = []
+        for position, mask in enumerate(masks):
+            row_indices = self.mask_indices(mask)
+            rows.extend([position] * len(row_indices))
+            cols.extend(row_indices)
+        return rows, cols
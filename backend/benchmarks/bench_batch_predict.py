@@ -0,0 +1,60 @@
+"""Throughput benchmark for POST /api/v1/predict/batch (ML-only path)
+
+Drives the endpoint in-process with batches of random symptom sets and
+reports rows per second end to end (request parsing, one model call,
+response building and serialization).
+
+Run from the backend directory (uses models/ and datasets/ when present):
+
+    python benchmarks/bench_batch_predict.py --sizes 1 100 1000 5000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GOOGLE_GENERATIVE_AI_API_KEY", "")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+def random_items(symptoms, size, rng):
+    return [
+        {"id": str(i), "symptoms": [s.replace("_", " ") for s in rng.sample(symptoms, rng.randint(2, 6))]}
+        for i in range(size)
+    ]
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+
+    with TestClient(main.app) as client:
+        symptoms = list(main.app.state.ml_service.symptoms_dict)
+        print(f"{'batch size':>10} {'best ms':>10} {'rows/s':>12}")
+        for size in args.sizes:
+            body = {"items": random_items(symptoms, size, rng)}
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.post("/api/v1/predict/batch", json=body)
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+            best = min(timings)
+            print(f"{size:>10} {best * 1000:>10.1f} {size / best:>12.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+"""Micro-benchmark: per-lookup cost of MLService.get_disease_info
+
+Compares the previous implementation (five boolean-mask scans over the
+pandas DataFrames per call) with the precomputed DiseaseIndex lookup.
+
+Run from the backend directory (uses models/ and datasets/ when present,
+otherwise the dummy datasets):
+
+    python benchmarks/bench_disease_info.py
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.ml_service import MLService  # noqa: E402
+
+
+def legacy_get_disease_info(datasets, disease):
+    """Previous per-call pandas implementation, kept for comparison"""
+    info = {}
+    if 'description' in datasets:
+        desc_df = datasets['description']
+        desc_row = desc_df[desc_df['Disease'] == disease]
+        info['description'] = desc_row['Description'].iloc[0] if not desc_row.empty else "No description available"
+    if 'precautions' in datasets:
+        prec_df = datasets['precautions']
+        prec_row = prec_df[prec_df['Disease'] == disease]
+        if not prec_row.empty:
+            precautions = []
+            for col in ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']:
+                if col in prec_row.columns:
+                    val = prec_row[col].iloc[0]
+                    if pd.notna(val):
+                        precautions.append(val)
+            info['precautions'] = precautions
+    if 'medications' in datasets:
+        med_df = datasets['medications']
+        med_rows = med_df[med_df['Disease'] == disease]
+        info['medications'] = med_rows['Medication'].tolist() if not med_rows.empty else []
+    if 'diets' in datasets:
+        diet_df = datasets['diets']
+        diet_row = diet_df[diet_df['Disease'] == disease]
+        info['diet'] = diet_row['Diet'].iloc[0] if not diet_row.empty else "Balanced diet recommended"
+    if 'workout' in datasets:
+        workout_df = datasets['workout']
+        workout_row = workout_df[workout_df['disease'] == disease]
+        info['workout'] = workout_row['workout'].tolist() if not workout_row.empty else ["Light exercise recommended"]
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20, help="Lookups per disease")
+    args = parser.parse_args()
+
+    service = MLService()
+    asyncio.run(service.initialize())
+    diseases = list(service.diseases_list.values())
+    lookups = args.rounds * len(diseases)
+    # The dummy datasets are plain row lists; the legacy code needs DataFrames
+    frames = {
+        key: table if isinstance(table, pd.DataFrame) else pd.DataFrame(table)
+        for key, table in service.datasets.items()
+    }
+
+    def run_legacy():
+        for disease in diseases:
+            legacy_get_disease_info(frames, disease)
+
+    def run_indexed():
+        for disease in diseases:
+            service.get_disease_info(disease)
+
+    legacy = min(timeit.repeat(run_legacy, number=args.rounds, repeat=3)) / lookups
+    indexed = min(timeit.repeat(run_indexed, number=args.rounds, repeat=3)) / lookups
+
+    print(f"diseases: {len(diseases)}, lookups per run: {lookups}")
+    print(f"pandas filtering : {legacy * 1e6:9.2f} us/lookup")
+    print(f"disease index    : {indexed * 1e6:9.2f} us/lookup")
+    print(f"speedup          : {legacy / indexed:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Micro-benchmark: symptom resolution with typo tolerance
+
+Reports the cost of encoding a request's symptoms when every input is an
+exact feature name, when inputs contain typos and the resolution is not
+memoized yet (fuzzy lookup), and when it is (the steady state for common
+misspellings).
+
+Run from the backend directory:
+
+    python benchmarks/bench_fuzzy.py
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.ml_service import MLService  # noqa: E402
+from app.services.symptom_synonyms import LAY_SYNONYMS  # noqa: E402
+from app.services.symptom_vectorizer import SymptomVectorizer  # noqa: E402
+
+EXACT = ["headache", "vomiting", "skin_rash", "fatigue"]
+TYPOS = ["hedache", "vomitting", "skin rsh", "fatige"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    service = MLService()
+    asyncio.run(service.initialize())
+    memoized = service.vectorizer
+    uncached = SymptomVectorizer(service.symptoms_dict, memo_size=0, synonyms=LAY_SYNONYMS, max_edit_distance=2)
+
+    for raw in TYPOS:
+        assert memoized.resolve(raw) is not None, raw
+
+    print(f"symptoms: {len(memoized)}, inputs per request: {len(EXACT)}")
+    for name, fn in (
+        ("exact names", lambda: memoized.encode(EXACT)),
+        ("typos (uncached)", lambda: uncached.encode(TYPOS)),
+        ("typos (memoized)", lambda: memoized.encode(TYPOS)),
+    ):
+        number = max(1, args.number // 50) if "uncached" in name else args.number
+        best = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{name:<18}: {best * 1e6:8.2f} us/request")
+
+    service.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Micro-benchmark: building the GET /symptoms and GET /diseases bodies
+
+Compares the previous per-request path (rebuild the listing, re-run the
+category/severity scans, build Pydantic models, serialize them) with the
+precomputed catalogs.
+
+Run from the backend directory:
+
+    python benchmarks/bench_listings.py
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.models.schemas import (  # noqa: E402
+    DiseaseInfo, DiseasesListResponse, SeverityLevel, SymptomInfo, SymptomsListResponse
+)
+from app.services.catalog import render_json  # noqa: E402
+from app.services.ml_service import MLService  # noqa: E402
+
+
+def legacy_symptoms_body(service, category=None, search=None):
+    """Previous per-request implementation, kept for comparison"""
+    symptoms_data = sorted(
+        (
+            {
+                'name': symptom.replace('_', ' ').title(),
+                'key': symptom,
+                'index': index,
+                'category': service._get_symptom_category(symptom)
+            }
+            for symptom, index in service.symptoms_dict.items()
+        ),
+        key=lambda x: x['name']
+    )
+    if category:
+        symptoms_data = [s for s in symptoms_data if s['category'].lower() == category.lower()]
+    if search:
+        symptoms_data = [s for s in symptoms_data if search.lower() in s['name'].lower()]
+    symptoms = [
+        SymptomInfo(name=s['name'], description=f"Medical symptom: {s['name']}", category=s['category'])
+        for s in symptoms_data
+    ]
+    return render_json(jsonable_encoder(SymptomsListResponse(symptoms=symptoms, total=len(symptoms))))
+
+
+def legacy_diseases_body(service, severity=None):
+    """Previous per-request implementation, kept for comparison"""
+    diseases_data = sorted(
+        (
+            {'name': disease, 'index': index, 'severity': service._get_disease_severity(disease)}
+            for index, disease in service.diseases_list.items()
+        ),
+        key=lambda x: x['name']
+    )
+    if severity:
+        diseases_data = [d for d in diseases_data if d['severity'].lower() == severity.lower()]
+    diseases = [
+        DiseaseInfo(
+            name=d['name'], description=f"Medical condition: {d['name']}",
+            symptoms=[], severity=SeverityLevel(d['severity'])
+        )
+        for d in diseases_data
+    ]
+    return render_json(jsonable_encoder(DiseasesListResponse(diseases=diseases, total=len(diseases))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    service = MLService()
+    asyncio.run(service.initialize())
+
+    cases = {
+        "GET /symptoms": (
+            lambda: legacy_symptoms_body(service),
+            lambda: service.symptom_catalog.body(),
+        ),
+        "GET /symptoms?category=": (
+            lambda: legacy_symptoms_body(service, category="Pain Related"),
+            lambda: service.symptom_catalog.body("Pain Related"),
+        ),
+        "GET /symptoms?search=": (
+            lambda: legacy_symptoms_body(service, search="pain"),
+            lambda: service.symptom_catalog.body(search="pain"),
+        ),
+        "GET /diseases": (
+            lambda: legacy_diseases_body(service),
+            lambda: service.disease_catalog.body(),
+        ),
+        "GET /diseases?severity=": (
+            lambda: legacy_diseases_body(service, severity="Mild"),
+            lambda: service.disease_catalog.body("Mild"),
+        ),
+    }
+
+    print(f"{'endpoint':<26}{'per request':>14}{'catalog':>12}{'speedup':>10}")
+    for name, (legacy, catalog) in cases.items():
+        assert legacy() == catalog(), name
+        old = min(timeit.repeat(legacy, number=args.number, repeat=3)) / args.number
+        new = min(timeit.repeat(catalog, number=args.number, repeat=3)) / args.number
+        print(f"{name:<26}{old * 1e6:>12.1f}us{new * 1e6:>10.2f}us{old / new:>9.0f}x")
+
+    service.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
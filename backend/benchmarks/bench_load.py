@@ -0,0 +1,259 @@
+"""Load and latency benchmark for the main API endpoints
+
+Drives each scenario with ``--concurrency`` parallel clients for
+``--duration`` seconds (after ``--warmup`` seconds that are not recorded)
+and reports throughput and p50/p95/p99 latency per endpoint:
+
+- ``predict``: ``POST /predict`` with AI enhancement from the fake Gemini API
+- ``predict_ml``: ``POST /predict?deferred=true`` (the ML result only; the
+  enhancement runs in the background)
+- ``symptoms``: ``GET /symptoms``
+- ``diseases``: ``GET /diseases``
+- ``disease_info``: ``GET /diseases/{name}``
+
+By default the API runs in-process (same event loop as the clients) with
+Gemini served by ``benchmarks/fake_gemini.py`` on a local port; latency,
+error rate and answer size of the fake are configurable. ``--target``
+benchmarks a running server instead; start it with ``GEMINI_BASE_URL``
+pointing at a fake (``python benchmarks/fake_gemini.py``) and with rate
+limits raised.
+
+Results are written as JSON to ``--output``. With ``--baseline`` the run is
+compared against an earlier result and the script exits with status 1 if
+any endpoint's p95 latency or throughput regressed by more than
+``--max-regression``.
+
+Run from the backend directory:
+
+    python benchmarks/bench_load.py --concurrency 32 --duration 20 --output load.json
+    python benchmarks/bench_load.py --baseline load.json --max-regression 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from fake_gemini import FakeGeminiServer, add_arguments, config_from_args  # noqa: E402
+
+SCENARIOS = ("predict", "predict_ml", "symptoms", "diseases", "disease_info")
+
+# Lower is better for these metrics, higher for the others
+LATENCY_METRICS = ("p95_ms",)
+THROUGHPUT_METRICS = ("throughput_rps",)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status == "error" or int(status) >= 400)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def build_requests(
+    client: httpx.AsyncClient,
+    symptoms: List[str],
+    diseases: List[str],
+    combinations: int,
+    rng: random.Random
+) -> Dict[str, Callable]:
+    """Request factories per scenario; symptom sets come from a fixed pool"""
+    pool = [
+        ", ".join(s.replace("_", " ") for s in rng.sample(symptoms, rng.randint(2, 5)))
+        for _ in range(combinations)
+    ]
+    return {
+        "predict": lambda: client.post("/api/v1/predict", json={"symptoms": rng.choice(pool)}),
+        "predict_ml": lambda: client.post(
+            "/api/v1/predict", params={"deferred": "true"}, json={"symptoms": rng.choice(pool)}
+        ),
+        "symptoms": lambda: client.get("/api/v1/symptoms"),
+        "diseases": lambda: client.get("/api/v1/diseases"),
+        "disease_info": lambda: client.get(f"/api/v1/diseases/{rng.choice(diseases)}"),
+    }
+
+
+async def run_scenario(make_request: Callable, concurrency: int, warmup: float, duration: float) -> Dict[str, Any]:
+    """Closed-loop load: each client sends its next request when the previous one finishes"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    record_from = started + warmup
+    deadline = record_from + duration
+
+    async def client_loop():
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                return
+            try:
+                response = await make_request()
+                status = response.status_code
+            except Exception:
+                status = "error"
+            end = time.perf_counter()
+            if start >= record_from:
+                latencies.append(end - start)
+                statuses[status] += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - max(record_from, started)
+    return summarize(latencies, statuses, elapsed)
+
+
+async def run_all(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict[str, Any]:
+    symptoms = [s["name"].lower() for s in (await client.get("/api/v1/symptoms")).json()["symptoms"]]
+    diseases = [d["name"] for d in (await client.get("/api/v1/diseases")).json()["diseases"]]
+    requests = build_requests(client, symptoms, diseases, args.combinations, random.Random(args.seed))
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(requests[name], args.concurrency, args.warmup, args.duration)
+        summary = results[name]
+        print(
+            f"{name:<14}{summary['requests']:>9}{summary['throughput_rps']:>10.1f}"
+            f"{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}"
+            f"{summary['error_rate'] * 100:>8.1f}%",
+            flush=True
+        )
+    return results
+
+
+async def run_in_process(args: argparse.Namespace, fake_url: str) -> Dict[str, Any]:
+    os.environ["GEMINI_BASE_URL"] = fake_url
+    os.environ.setdefault("GOOGLE_GENERATIVE_AI_API_KEY", "load-test")
+    # A single client address would hit the per-client rate limits immediately
+    os.environ["RATE_LIMIT_CALLS"] = str(10 ** 9)
+    os.environ["RATE_LIMIT_RULE_CALLS"] = json.dumps({"gemini": 10 ** 9})
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_all(client, args)
+
+
+async def run_against(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, timeout=60, limits=limits) as client:
+        return await run_all(client, args)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Regressions beyond ``max_regression`` (a fraction) against a baseline run"""
+    failures = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        for metric in LATENCY_METRICS:
+            if previous[metric] and current[metric] > previous[metric] * (1 + max_regression):
+                failures.append(f"{name} {metric}: {previous[metric]} -> {current[metric]}")
+        for metric in THROUGHPUT_METRICS:
+            if previous[metric] and current[metric] < previous[metric] * (1 - max_regression):
+                failures.append(f"{name} {metric}: {previous[metric]} -> {current[metric]}")
+    return failures
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", help="Base URL of a running server (default: in-process)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Recorded seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unrecorded seconds per scenario")
+    parser.add_argument("--combinations", type=int, default=500, help="Distinct symptom sets sent")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # Handlers still format and filter records; only output is suppressed
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()], force=True)
+
+    fake = None
+    if not args.target:
+        fake = FakeGeminiServer(config_from_args(args)).start()
+
+    print(f"{'endpoint':<14}{'requests':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    try:
+        if args.target:
+            endpoints = asyncio.run(run_against(args))
+        else:
+            endpoints = asyncio.run(run_in_process(args, fake.base_url))
+    finally:
+        if fake:
+            fake.stop()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": args.target or "in-process",
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "combinations": args.combinations,
+            "fake_gemini": None if args.target else {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "error_rate": args.error_rate,
+                "slow_rate": args.slow_rate,
+                "slow_ms": args.slow_ms,
+                "response_bytes": args.response_bytes,
+            },
+        },
+        "endpoints": endpoints,
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        failures = compare(results, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        if failures:
+            print(f"Regressions beyond {args.max_regression:.0%}:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    run()
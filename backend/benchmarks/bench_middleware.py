@@ -0,0 +1,130 @@
+"""Per-request overhead of the middleware stack
+
+Builds the API three times (no middleware, the previous BaseHTTPMiddleware
+implementations, and the current pure ASGI middleware) and measures
+sequential in-process request latency for GET /api/v1/symptoms and the
+ML-only POST /api/v1/predict. The overhead is the difference against the
+app without middleware.
+
+Run from the backend directory:
+
+    python benchmarks/bench_middleware.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GOOGLE_GENERATIVE_AI_API_KEY", "")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+import main  # noqa: E402
+from app.api.routes import diseases, health, predict, symptoms  # noqa: E402
+from app.middleware.rate_limit import RateLimitMiddleware  # noqa: E402
+from app.middleware.request_logging import RequestLoggingMiddleware  # noqa: E402
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """Previous request logging middleware, kept for comparison"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        logging.getLogger(__name__).info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        duration = time.time() - start_time
+        logging.getLogger(__name__).info(
+            f"Response: {response.status_code} - Duration: {duration:.3f}s - Path: {request.url.path}"
+        )
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Previous rate limiting middleware, kept for comparison"""
+
+    def __init__(self, app, calls: int = 100, period: int = 60):
+        super().__init__(app)
+        self.calls = calls
+        self.period = period
+        self.clients = defaultdict(deque)
+
+    async def dispatch(self, request: Request, call_next):
+        now = time.time()
+        client_requests = self.clients[request.client.host]
+        while client_requests and client_requests[0] <= now - self.period:
+            client_requests.popleft()
+        if len(client_requests) >= self.calls:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
+        client_requests.append(now)
+        return await call_next(request)
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI(lifespan=main.lifespan)
+    limit = 10 ** 9
+    if variant == "legacy":
+        app.add_middleware(LegacyRequestLoggingMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware, calls=limit, period=60)
+    elif variant == "asgi":
+        app.add_middleware(RequestLoggingMiddleware)
+        app.add_middleware(RateLimitMiddleware, calls=limit, period=60, routes={"POST /api/v1/predict": "gemini"}, rule_limits={"gemini": limit})
+    for module in (health, predict, symptoms, diseases):
+        app.include_router(module.router, prefix="/api/v1")
+    return app
+
+
+async def measure(app: FastAPI, requests: int):
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            cases = {
+                "GET /symptoms": lambda: client.get("/api/v1/symptoms"),
+                "POST /predict (ML)": lambda: client.post(
+                    "/api/v1/predict", json={"symptoms": "itching, skin rash, chills"}
+                ),
+            }
+            for name, call in cases.items():
+                for _ in range(50):
+                    await call()
+                timings = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = await call()
+                    timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.text
+                results[name] = statistics.median(timings) * 1e6
+    return results
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Handlers still format and filter records; only output is suppressed
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()], force=True)
+
+    variants = {variant: asyncio.run(measure(build_app(variant), args.requests))
+                for variant in ("none", "legacy", "asgi")}
+
+    print(f"{'endpoint':<22}{'no middleware':>15}{'BaseHTTP':>12}{'pure ASGI':>12}"
+          f"{'overhead old':>15}{'overhead new':>15}")
+    for name in variants["none"]:
+        base = variants["none"][name]
+        old = variants["legacy"][name]
+        new = variants["asgi"][name]
+        print(f"{name:<22}{base:>13.0f}us{old:>10.0f}us{new:>10.0f}us{old - base:>13.0f}us{new - base:>13.0f}us")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,62 @@
+"""Micro-benchmark: symptom autocomplete latency
+
+Simulates typing a set of queries one keystroke at a time and reports the
+per-keystroke cost of the previous linear substring scan (the
+``GET /symptoms?search=`` filter) and of SymptomSuggester, both uncached
+(memo disabled) and memoized.
+
+Run from the backend directory:
+
+    python benchmarks/bench_suggest.py
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.ml_service import MLService  # noqa: E402
+from app.services.symptom_suggest import SymptomSuggester  # noqa: E402
+
+QUERIES = ("fever", "headache", "skin rash", "loose motion", "stomach pain", "urine", "tired", "breath")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    service = MLService()
+    asyncio.run(service.initialize())
+    symptoms = service.get_symptoms_list()
+    keystrokes = [query[:i] for query in QUERIES for i in range(1, len(query) + 1)]
+
+    def linear_scan():
+        for prefix in keystrokes:
+            search = prefix.lower()
+            [s for s in symptoms if search in s['name'].lower()]
+
+    uncached = SymptomSuggester(symptoms, memo_size=0)
+    cached = service.symptom_suggester
+
+    def run(suggester):
+        for prefix in keystrokes:
+            suggester.suggest(prefix, 10)
+
+    print(f"symptoms: {len(symptoms)}, indexed terms: {len(cached)}, keystrokes per run: {len(keystrokes)}")
+    for name, fn in (
+        ("linear substring scan", linear_scan),
+        ("suggester (uncached)", lambda: run(uncached)),
+        ("suggester (memoized)", lambda: run(cached)),
+    ):
+        best = min(timeit.repeat(fn, number=args.number, repeat=3)) / args.number / len(keystrokes)
+        print(f"{name:<24}: {best * 1e6:8.2f} us/keystroke")
+
+    service.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Micro-benchmark: compiled numpy SVC versus scikit-learn
+
+Loads ``models/svc.pkl`` and reports ``predict`` and ``decision_function``
+latency for single rows and batches with scikit-learn (libsvm) and with
+CompiledSVC, after checking that both predict the same labels.
+
+Run from the backend directory:
+
+    python benchmarks/bench_svc_engine.py [--data train_X.npy]
+
+``--data`` verifies on a saved feature matrix (e.g. the training set) in
+addition to the support vectors and random symptom sets.
+"""
+
+import argparse
+import pickle
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.svc_engine import CompiledSVC  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="models/svc.pkl")
+    parser.add_argument("--data", help="Feature matrix (.npy) to verify predictions on")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        model = pickle.load(f)
+    compiled = CompiledSVC(model)
+    n_features = model.n_features_in_
+
+    rng = np.random.default_rng(0)
+    random_rows = (rng.random((10000, n_features)) < 4 / n_features).astype(np.uint8)
+    checks = {"support vectors": model.support_vectors_, "random rows": random_rows}
+    if args.data:
+        checks["--data"] = np.load(args.data)
+    for name, X in checks.items():
+        same = int((compiled.predict(X) == model.predict(X)).sum())
+        print(f"{name:<16}: {same}/{len(X)} identical predictions")
+
+    # The service scores with one-vs-one decision values (see ranking.py)
+    model.decision_function_shape = compiled.decision_function_shape = "ovo"
+
+    print(f"\n{model.kernel} kernel, {len(model.classes_)} classes, {len(model.support_vectors_)} support vectors")
+    print(f"{'method':<18}{'rows':>6}{'sklearn':>12}{'compiled':>12}{'speedup':>9}")
+    for method in ("predict", "decision_function"):
+        for size in args.sizes:
+            X = random_rows[:size]
+            times = []
+            for target in (model, compiled):
+                fn = getattr(target, method)
+                number = max(1, args.number * 10 // size)
+                times.append(min(timeit.repeat(lambda: fn(X), number=number, repeat=3)) / number)
+            print(
+                f"{method:<18}{size:>6}{times[0] * 1e6:>10.0f}us{times[1] * 1e6:>10.0f}us"
+                f"{times[0] / times[1]:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Per-worker memory of multi-process deployments
+
+Starts the API with several worker processes in two ways and reports the
+memory of each worker after warming it up with requests:
+
+- ``uvicorn``: ``uvicorn main:app --workers N`` with ``MODEL_MMAP=false``
+  (the previous deployment: every worker unpickles the model and parses
+  the CSVs itself)
+- ``prefork``: ``python main.py --workers N`` (model and datasets loaded
+  once in the parent, workers forked from it, model arrays memory-mapped)
+
+USS (unique set size) is the memory that would be freed if the worker
+exited; pages shared with the parent or other workers are not counted.
+Read from /proc, so Linux only.
+
+Run from the backend directory (uses models/ and datasets/ when present):
+
+    python benchmarks/bench_worker_memory.py --workers 4
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch(mode: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(BACKEND_DIR),
+        GOOGLE_GENERATIVE_AI_API_KEY="",
+        RATE_LIMIT_CALLS="1000000000",
+        RATE_LIMIT_ROUTES="{}",
+        LOG_SAMPLE_RATE="0",
+    )
+    if mode == "uvicorn":
+        env["MODEL_MMAP"] = "false"
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers)]
+    else:
+        command = [sys.executable, str(BACKEND_DIR / "main.py"), "--port", str(port), "--workers", str(workers)]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def children(pid: int) -> List[int]:
+    """Worker processes of ``pid``"""
+    result = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        # The command may contain spaces; fields after it are space separated
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid and b"resource_tracker" not in cmdline:
+            result.append(int(entry.name))
+    return sorted(result)
+
+
+def memory(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS of a process in MiB"""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"] / 1024,
+        "pss": fields["Pss"] / 1024,
+        "uss": (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024,
+    }
+
+
+def measure(mode: str, workers: int, requests: int) -> Dict[str, List[Dict[str, float]]]:
+    port = free_port()
+    process = launch(mode, workers, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}/api/v1"
+        deadline = time.monotonic() + 120
+        with httpx.Client(base_url=base_url, timeout=10) as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError(f"{mode} server did not start")
+                time.sleep(0.2)
+            # Let the remaining workers finish their startup
+            time.sleep(2)
+
+            for _ in range(requests):
+                client.post("/predict", json={"symptoms": "itching, skin rash, chills"})
+                client.get("/diseases")
+
+        return {
+            "parent": [memory(process.pid)],
+            "workers": [memory(pid) for pid in children(process.pid)],
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="Warm-up requests (spread over the workers)")
+    args = parser.parse_args()
+
+    results = {mode: measure(mode, args.workers, args.requests) for mode in ("uvicorn", "prefork")}
+
+    print(f"{'mode':<10}{'process':<10}{'RSS MiB':>10}{'PSS MiB':>10}{'USS MiB':>10}")
+    for mode, processes in results.items():
+        for role, entries in processes.items():
+            for i, entry in enumerate(entries):
+                name = role if role == "parent" else f"worker {i}"
+                print(f"{mode:<10}{name:<10}{entry['rss']:>10.1f}{entry['pss']:>10.1f}{entry['uss']:>10.1f}")
+        workers = processes["workers"]
+        total_uss = sum(entry["uss"] for entry in workers)
+        total_pss = sum(entry["pss"] for entry in processes["parent"] + workers)
+        print(f"{mode:<10}{'total':<10}{'':>10}{total_pss:>10.1f}{total_uss:>10.1f}  (PSS incl. parent, USS of workers)")
+
+
+if __name__ == "__main__":
+    run()
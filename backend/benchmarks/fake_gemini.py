@@ -0,0 +1,172 @@
+"""Local stand-in for the Gemini generateContent API
+
+Serves ``POST /v1beta/models/<model>:generateContent`` and
+``:streamGenerateContent?alt=sse`` with a well-formed enhancement answer,
+after an injectable latency (with an optional slow tail), failing a
+configurable fraction of calls and padding answers to a configurable size. Point the service at it with
+``GEMINI_BASE_URL``:
+
+    python benchmarks/fake_gemini.py --port 8090 --latency-ms 400 --error-rate 0.02
+    GEMINI_BASE_URL=http://127.0.0.1:8090/v1beta GOOGLE_GENERATIVE_AI_API_KEY=fake python main.py
+
+``benchmarks/bench_load.py`` starts it automatically.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0
+    # Fraction of calls that take slow_ms longer (a latency tail)
+    slow_rate: float = 0.0
+    slow_ms: float = 0.0
+    response_bytes: int = 2000
+    stream_chunks: int = 8
+    seed: Optional[int] = None
+
+
+def _answer_text(disease: str, size: int) -> str:
+    answer = {
+        "description": f"{disease} is a condition described by the benchmark stand-in. ",
+        "severity": "Moderate",
+        "precautions": ["Rest", "Drink fluids", "Avoid triggers", "See a doctor if it worsens"],
+        "medications": ["Paracetamol", "Oral rehydration salts"],
+        "traditionalMedicines": ["Tulsi", "Ginger"],
+        "homeRemedies": ["Warm water", "Honey"],
+        "diet": "Light, balanced meals",
+        "workouts": ["Walking", "Stretching"],
+        "consultationAdvice": "Consult a doctor if symptoms persist",
+    }
+    padding = size - len(json.dumps(answer))
+    if padding > 0:
+        answer["description"] += "x" * padding
+    return json.dumps(answer)
+
+
+def create_app(config: FakeGeminiConfig) -> FastAPI:
+    """Fake API app; ``app.state.calls`` and ``app.state.errors`` count requests"""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.errors = 0
+    rng = random.Random(config.seed)
+
+    def latency() -> float:
+        latency_ms = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if config.slow_rate and rng.random() < config.slow_rate:
+            latency_ms += config.slow_ms
+        return max(0.0, latency_ms) / 1000
+
+    @app.post("/v1beta/models/{target}")
+    async def generate(target: str, request: Request):
+        app.state.calls += 1
+        _, _, method = target.partition(":")
+        payload = await request.json()
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        disease = prompt.split("Predicted condition:", 1)[-1].split("\n", 1)[0].strip() or "Unknown"
+        text = _answer_text(disease, config.response_bytes)
+        delay = latency()
+
+        if rng.random() < config.error_rate:
+            app.state.errors += 1
+            await asyncio.sleep(delay)
+            return JSONResponse({"error": {"code": 503, "message": "Injected failure"}}, status_code=503)
+
+        if method == "generateContent":
+            await asyncio.sleep(delay)
+            return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+        if method == "streamGenerateContent":
+            chunks = max(1, config.stream_chunks)
+            step = -(-len(text) // chunks)
+
+            async def events():
+                for start in range(0, len(text), step):
+                    await asyncio.sleep(delay / chunks)
+                    event = {"candidates": [{"content": {"parts": [{"text": text[start:start + step]}]}}]}
+                    yield f"data: {json.dumps(event)}\r\n\r\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return Response(status_code=404)
+
+    return app
+
+
+class FakeGeminiServer:
+    """Runs the fake API with uvicorn on a background thread"""
+
+    def __init__(self, config: FakeGeminiConfig, host: str = "127.0.0.1", port: int = 0):
+        import uvicorn
+
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="fake-gemini", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake Gemini server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean fake API latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Uniform +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of calls with extra latency")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="Extra latency of slow calls")
+    parser.add_argument("--response-bytes", type=int, default=2000, help="Size of the generated answer text")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeGeminiConfig:
+    return FakeGeminiConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        response_bytes=args.response_bytes,
+        seed=getattr(args, "seed", None),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    print(f"Fake Gemini API on http://{args.host}:{args.port}/v1beta")
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,49 +4,94 @@ Integrates Google Gemini-2.0-Flash with dummy ML model fallback
 Designed for Indian healthcare market
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import uvicorn
 import logging
 from contextlib import asynccontextmanager
+import asyncio
 import time
 from typing import Optional
 
-from app.api.routes import health, predict, symptoms, diseases
+from app.api.deps import get_gemini_service, get_ml_service
+from app.api.routes import health, predict, symptoms, diseases, metrics
 from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.metrics import REGISTRY
+from app.core import tracing
+from app.core.server import worker_processes
 from app.services.ml_service import MLService
 from app.services.gemini_service import GeminiService
-from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.enhancement_jobs import EnhancementJobManager
+from app.services.job_store import SQLiteJobStore
+from app.middleware.rate_limit import RateLimitMiddleware, share_between_processes
 from app.middleware.request_logging import RequestLoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# Global services
-ml_service: Optional[MLService] = None
-gemini_service: Optional[GeminiService] = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Application lifespan manager"""
-    global ml_service, gemini_service
-    
+    """Application lifespan manager
+
+    Services live on ``app.state`` and are handed to routes by the
+    providers in ``app.api.deps``.
+    """
     logger.info("Starting Medical Prediction API...")
     
+    ml_service: Optional[MLService] = None
+    gemini_service: Optional[GeminiService] = None
+    enhancement_jobs: Optional[EnhancementJobManager] = None
+    metrics_flush: Optional[asyncio.Task] = None
+    
     try:
         # Initialize services
         settings = get_settings()
         
-        # Initialize ML Service (dummy model)
-        ml_service = MLService()
+        # Initialize ML Service (dummy model), reusing the state loaded by
+        # the pre-fork parent when there is one
+        ml_service = getattr(app.state, "preloaded_ml_service", None) or MLService()
         await ml_service.initialize()
+        app.state.ml_service = ml_service
         
         # Initialize Gemini Service
         gemini_service = GeminiService(api_key=settings.GOOGLE_GENERATIVE_AI_API_KEY)
         await gemini_service.initialize()
+        app.state.gemini_service = gemini_service
+        
+        # Initialize deferred enhancement workers; with several worker
+        # processes, jobs are shared through SQLite so any of them can answer a poll
+        job_store = None
+        if worker_processes() > 1:
+            try:
+                job_store = await asyncio.to_thread(SQLiteJobStore, settings.ENHANCEMENT_JOBS_DB_PATH)
+            except Exception as e:
+                logger.error(f"Failed to open enhancement job store, deferred mode disabled: {e}")
+        enhancement_jobs = EnhancementJobManager(
+            gemini_service,
+            workers=settings.ENHANCEMENT_WORKERS,
+            max_jobs=settings.ENHANCEMENT_MAX_JOBS,
+            job_ttl=settings.ENHANCEMENT_JOB_TTL,
+            store=job_store,
+            processes=worker_processes()
+        )
+        await enhancement_jobs.start()
+        app.state.enhancement_jobs = enhancement_jobs
+        
+        # Export finished traces (one writer thread per worker process)
+        if settings.TRACING_ENABLED and settings.TRACING_EXPORT_FILE:
+            tracing.configure_export(
+                settings.TRACING_EXPORT_FILE,
+                settings.PROJECT_NAME,
+                sample_rate=settings.TRACING_EXPORT_SAMPLE_RATE
+            )
+        
+        # Share metrics with the other worker processes
+        if REGISTRY.multiprocess_dir is not None:
+            metrics_flush = asyncio.create_task(REGISTRY.flush_periodically(settings.METRICS_FLUSH_INTERVAL))
         
         logger.info("All services initialized successfully")
         
@@ -57,10 +102,19 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down Medical Prediction API...")
+        app.state.ml_service = None
+        app.state.gemini_service = None
+        app.state.enhancement_jobs = None
+        if metrics_flush:
+            metrics_flush.cancel()
+            await asyncio.gather(metrics_flush, return_exceptions=True)
+        if enhancement_jobs:
+            await enhancement_jobs.stop()
         if ml_service:
             await ml_service.cleanup()
         if gemini_service:
             await gemini_service.cleanup()
+        tracing.shutdown_export()
 
 # Create FastAPI app
 app = FastAPI(
@@ -83,19 +137,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(RequestLoggingMiddleware)
-app.add_middleware(RateLimitMiddleware, calls=100, period=60)
-
-# Dependency to get services
-async def get_ml_service() -> MLService:
-    if ml_service is None:
-        raise HTTPException(status_code=503, detail="ML Service not available")
-    return ml_service
-
-async def get_gemini_service() -> GeminiService:
-    if gemini_service is None:
-        raise HTTPException(status_code=503, detail="Gemini Service not available")
-    return gemini_service
+# Inside RequestLoggingMiddleware, which sets the request id the trace is tagged with
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, server_timing=settings.TRACING_SERVER_TIMING)
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    slow_request_ms=settings.LOG_SLOW_REQUEST_MS
+)
+app.add_middleware(
+    RateLimitMiddleware,
+    calls=settings.RATE_LIMIT_CALLS,
+    period=settings.RATE_LIMIT_PERIOD,
+    routes=settings.RATE_LIMIT_ROUTES,
+    rule_limits=settings.RATE_LIMIT_RULE_CALLS,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS
+)
+# Outermost, so rate limited requests are measured too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(
@@ -125,6 +185,9 @@ app.include_router(
     dependencies=[Depends(get_ml_service)]
 )
 
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["metrics"])
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -148,11 +211,68 @@ async def root():
         "docs": "/docs"
     }
 
+def preload_services():
+    """Load the ML model, datasets and indexes before worker processes fork"""
+    ml_service = MLService()
+    ml_service.load()
+    app.state.preloaded_ml_service = ml_service
+
+def start_worker(index: int):
+    """Per worker setup after ``fork``: logging threads and shared metrics"""
+    setup_logging(worker=index)
+    if settings.METRICS_ENABLED:
+        REGISTRY.enable_multiprocess(settings.METRICS_DIR)
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Medical Prediction API")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.MAX_WORKERS,
+        help="Worker processes forked after preloading (default: MAX_WORKERS)"
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Development server: single process, reload on code changes"
     )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Measure a cold start (imports and service startup) and print it as JSON"
+    )
+    args = parser.parse_args()
+    
+    if args.startup_report:
+        from app.core.startup import print_startup_report
+        print_startup_report()
+        raise SystemExit(0)
+    
+    if args.reload:
+        import uvicorn
+        
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        from app.core.server import serve
+        
+        if args.workers > 1:
+            REGISTRY.clear_multiprocess_dir(settings.METRICS_DIR)
+            share_between_processes(settings.RATE_LIMIT_MAX_CLIENTS)
+        serve(
+            app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            preload=preload_services,
+            after_fork=start_worker
+        )
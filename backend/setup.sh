@@ -16,7 +16,7 @@ pip install -r requirements.txt
 
 # Create necessary directories
 echo "📁 Creating directories..."
-mkdir -p logs models datasets
+mkdir -p logs models datasets data
 
 # Copy environment file
 if [ ! -f .env ]; then
@@ -0,0 +1,279 @@
+"""Tests for the Gemini circuit breaker state machine
+
+Run from ``backend/`` with ``python -m pytest tests``.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(failure_rate=0.5, min_calls=4, window=30.0, open_seconds=10.0, half_open_probes=2)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def fail(breaker: CircuitBreaker):
+    with pytest.raises(RuntimeError):
+        with breaker.call():
+            raise RuntimeError("upstream failed")
+
+
+def succeed(breaker: CircuitBreaker):
+    with breaker.call():
+        pass
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.min_calls):
+        fail(breaker)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_stays_closed_below_failure_rate(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        succeed(breaker)
+    for _ in range(2):
+        fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_rate_and_rejects(clock):
+    breaker = make_breaker()
+    succeed(breaker)
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+    with pytest.raises(CircuitOpenError):
+        with breaker.call():
+            pytest.fail("an open breaker must not let calls through")
+    assert breaker.rejected == 1
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        fail(breaker)
+    clock.now += 31.0
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_explicit_record_overrides_a_clean_exit(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        with breaker.call() as call:
+            call.record(False)
+    assert breaker.state == OPEN
+
+
+def test_half_open_after_open_seconds_limits_probes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 9.9
+    assert breaker.state == OPEN
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN
+
+    first = breaker.call().__enter__()
+    second = breaker.call().__enter__()
+    assert first.probe and second.probe
+    with pytest.raises(CircuitOpenError):
+        breaker.call().__enter__()
+
+
+def test_probe_successes_close_the_breaker(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10.0
+    succeed(breaker)
+    assert breaker.state == HALF_OPEN
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+    # The window starts empty again
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10.0
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    clock.now += 10.0
+    assert breaker.state == HALF_OPEN
+
+
+def test_full_cycle(clock):
+    breaker = make_breaker()
+    states = [breaker.state]
+    trip(breaker)
+    states.append(breaker.state)
+    clock.now += 10.0
+    states.append(breaker.state)
+    succeed(breaker)
+    succeed(breaker)
+    states.append(breaker.state)
+    assert states == [CLOSED, OPEN, HALF_OPEN, CLOSED]
+
+
+def test_outcomes_from_an_earlier_generation_are_ignored(clock):
+    breaker = make_breaker()
+    slow = breaker.call().__enter__()
+    trip(breaker)
+
+    # Started while closed, finished after the breaker opened
+    slow.__exit__(RuntimeError, RuntimeError("late failure"), None)
+    assert breaker.times_opened == 1
+
+    clock.now += 10.0
+    probe = breaker.call().__enter__()
+    stale = breaker.call().__enter__()
+    probe.__exit__(RuntimeError, RuntimeError("probe failed"), None)
+    assert breaker.state == OPEN
+
+    # A success of the previous half-open period must not count
+    clock.now += 10.0
+    assert breaker.state == HALF_OPEN
+    stale.__exit__(None, None, None)
+    assert breaker._probe_successes == 0
+    assert breaker.state == HALF_OPEN
+
+
+def test_cancelled_probe_frees_its_slot_without_an_outcome(clock):
+    breaker = make_breaker(half_open_probes=1)
+    trip(breaker)
+    clock.now += 10.0
+
+    async def cancelled_call():
+        with breaker.call():
+            await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(cancelled_call())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.state == HALF_OPEN
+    # The slot is free again, and the cancellation was neither a success nor a failure
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_generator_closed_early_counts_as_neither(clock):
+    breaker = make_breaker(half_open_probes=1)
+    trip(breaker)
+    clock.now += 10.0
+
+    async def chunks():
+        with breaker.call():
+            yield "a"
+            yield "b"
+
+    async def run():
+        stream = chunks()
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+
+    asyncio.run(run())
+    assert breaker.state == HALF_OPEN
+    assert breaker._probes_in_flight == 0
+
+
+def test_disabled_breaker_always_allows(clock):
+    breaker = make_breaker(enabled=False)
+    for _ in range(10):
+        fail(breaker)
+    assert breaker.state == CLOSED
+    succeed(breaker)
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    """A 200 response whose body fails after the first event"""
+
+    async def __aiter__(self):
+        yield b'data: {"candidates": [{"content": {"parts": [{"text": "{\\"a\\": 1"}]}}]}\n\n'
+        raise httpx.ReadTimeout("read timed out")
+
+
+def _gemini_service(handler):
+    from app.services.gemini_service import GeminiService
+
+    service = GeminiService(api_key="test")
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.is_initialized = True
+    service.breaker = make_breaker(min_calls=1)
+    return service
+
+
+async def _consume(service) -> list:
+    texts = []
+    try:
+        async for text in service._stream_content("prompt"):
+            texts.append(text)
+    finally:
+        await service.client.aclose()
+    return texts
+
+
+def test_stream_failing_mid_body_counts_as_a_failure(clock):
+    service = _gemini_service(lambda request: httpx.Response(200, stream=_BrokenStream()))
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(_consume(service))
+    assert service.breaker.state == OPEN
+
+
+def test_stream_consumed_fully_counts_as_a_success(clock):
+    body = b'data: {"candidates": [{"content": {"parts": [{"text": "{}"}]}}]}\n\n'
+    service = _gemini_service(lambda request: httpx.Response(200, content=body))
+    assert asyncio.run(_consume(service)) == ["{}"]
+    assert service.breaker._counts(clock.now) == (1, 0)
+
+
+@pytest.mark.parametrize("status", [400, 401, 403])
+def test_client_errors_count_as_failures(clock, status):
+    service = _gemini_service(lambda request: httpx.Response(status, json={"error": {"code": status}}))
+    with pytest.raises(Exception, match=str(status)):
+        asyncio.run(service._generate_content("prompt"))
+    assert service.breaker.state == OPEN